@@ -0,0 +1,30 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django():
+    """
+    Configure Django against a throwaway test database: an on-disk SQLite
+    file, or test_<name> on the configured PostgreSQL server.
+    """
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+    import django
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    if connection.vendor == "sqlite":
+        test_db = Path(tempfile.mkdtemp()) / "bench.sqlite3"
+        connection.settings_dict["TEST"]["NAME"] = str(test_db)
+
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    return connection
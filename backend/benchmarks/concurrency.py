@@ -0,0 +1,240 @@
+"""
+Read/write throughput of the upload and history endpoints under concurrency,
+per database mode.
+
+    cd backend
+    python -m benchmarks.concurrency --writers 4 --readers 8 --rows 20000
+    EQUIPMENT_DB_USER=... python -m benchmarks.concurrency --modes sqlite-wal postgresql
+
+Modes:
+  sqlite-legacy  rollback journal, synchronous=FULL, 5 s lock timeout and a
+                 new connection per request (the settings before WAL)
+  sqlite-wal     the configured SQLite settings
+  postgresql     EQUIPMENT_DB_* settings against a PostgreSQL server
+
+Each mode runs against its own test database. Writer processes POST the
+same generated CSV to upload/ while reader processes GET history/ every
+--read-interval seconds until the writers finish; throughput is measured from the first writer start to
+the last writer finish. Errors count non-2xx responses, such as 500s from
+"database is locked".
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from . import BACKEND_DIR, setup_django
+from .data import write_csv
+
+MODES = ["sqlite-legacy", "sqlite-wal", "postgresql"]
+
+
+def configure(mode):
+    """Adjust settings.DATABASES for ``mode`` before the first connection."""
+    from django.conf import settings
+
+    database = settings.DATABASES["default"]
+    if mode == "sqlite-legacy":
+        database["CONN_MAX_AGE"] = 0
+        database["OPTIONS"] = {
+            "transaction_mode": "IMMEDIATE",
+            "init_command": "PRAGMA journal_mode=DELETE;PRAGMA synchronous=FULL;",
+        }
+
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _setup_client_process(mode, database_name):
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+    os.environ["EQUIPMENT_DB_ENGINE"] = "postgresql" if mode == "postgresql" else "sqlite"
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    configure(mode)
+
+    from django.conf import settings
+
+    settings.DATABASES["default"]["NAME"] = database_name
+    settings.EQUIPMENT_UPLOAD_CACHE = {**settings.EQUIPMENT_UPLOAD_CACHE, "ENABLED": False}
+    settings.EQUIPMENT_RETENTION = {**settings.EQUIPMENT_RETENTION, "AUTO_PRUNE": False}
+
+    import django
+    django.setup()
+
+    from django.contrib.auth.models import User
+    from django.test.utils import setup_test_environment
+    from rest_framework.test import APIClient
+
+    setup_test_environment()
+    # Failed requests are counted, not logged one by one.
+    logging.getLogger("django.request").setLevel(logging.CRITICAL)
+
+    api = APIClient(raise_request_exception=False)
+    api.force_authenticate(User.objects.get(username="benchmark"))
+    return api
+
+
+def _client_process(kind, mode, database_name, path, uploads, read_interval, writing, queue):
+    """One writer or reader; puts its (seconds, status) samples on ``queue``."""
+    api = _setup_client_process(mode, database_name)
+    samples = []
+    if kind == "write":
+        for _ in range(uploads):
+            start = time.perf_counter()
+            with open(path, "rb") as handle:
+                response = api.post("/api/equipment/upload/", {"file": handle}, format="multipart")
+            samples.append((time.perf_counter() - start, response.status_code))
+    else:
+        while writing.is_set():
+            start = time.perf_counter()
+            response = api.get("/api/equipment/history/")
+            samples.append((time.perf_counter() - start, response.status_code))
+            time.sleep(read_interval)
+    queue.put((kind, samples))
+
+
+def run_mode(mode, path, rows, writers, uploads, readers, read_interval):
+    os.environ["EQUIPMENT_DB_ENGINE"] = "postgresql" if mode == "postgresql" else "sqlite"
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    configure(mode)
+    connection = setup_django()
+
+    from django.contrib.auth.models import User
+
+    User.objects.create_user("benchmark", password="benchmark")
+    database_name = connection.settings_dict["NAME"]
+    connection.close()
+
+    # Separate processes, like separate server workers: threads in one
+    # process would mostly measure contention for the GIL.
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    writing = context.Event()
+    writing.set()
+
+    def start(kind, count):
+        processes = [
+            context.Process(
+                target=_client_process,
+                args=(kind, mode, database_name, path, uploads, read_interval, writing, queue),
+            )
+            for _ in range(count)
+        ]
+        for process in processes:
+            process.start()
+        return processes
+
+    reader_processes = start("read", readers)
+    started = time.perf_counter()
+    writer_processes = start("write", writers)
+
+    samples = {"write": [], "read": []}
+    for _ in writer_processes:
+        kind, items = queue.get()
+        samples[kind].extend(items)
+    elapsed = time.perf_counter() - started
+    writing.clear()
+    for _ in reader_processes:
+        kind, items = queue.get()
+        samples[kind].extend(items)
+    for process in writer_processes + reader_processes:
+        process.join()
+
+    connection.creation.destroy_test_db(database_name, verbosity=0)
+
+    write_seconds = [seconds for seconds, _ in samples["write"]]
+    read_seconds = [seconds for seconds, _ in samples["read"]]
+    return {
+        "mode": mode,
+        "rows": rows,
+        "writers": writers,
+        "readers": readers,
+        "seconds": elapsed,
+        "uploads_per_second": len(write_seconds) / elapsed,
+        "rows_per_second": len(write_seconds) * rows / elapsed,
+        "reads_per_second": len(read_seconds) / elapsed,
+        "write_p50": _percentile(write_seconds, 0.5),
+        "read_p50": _percentile(read_seconds, 0.5),
+        "read_p95": _percentile(read_seconds, 0.95),
+        "errors": sum(
+            1 for kind in samples for _, status_code in samples[kind] if status_code >= 300
+        ),
+    }
+
+
+def _format_ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.0f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=["sqlite-legacy", "sqlite-wal"])
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--uploads", type=int, default=5, help="uploads per writer")
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--read-interval", type=float, default=0.05,
+                        help="seconds each reader waits between requests, like a polling client")
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--worker", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--csv", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        result = run_mode(
+            args.worker, args.csv, args.rows, args.writers, args.uploads, args.readers, args.read_interval
+        )
+        print(json.dumps(result))
+        return
+
+    path = write_csv(Path(tempfile.mkdtemp()) / "equipment.csv", args.rows)
+
+    results = []
+    print(f"{'mode':<15}{'uploads/s':>10}{'rows/s':>12}{'reads/s':>10}"
+          f"{'write p50':>11}{'read p50':>10}{'read p95':>10}{'errors':>8}")
+    for mode in args.modes:
+        completed = subprocess.run(
+            [
+                sys.executable, "-m", "benchmarks.concurrency",
+                "--worker", mode,
+                "--csv", str(path),
+                "--rows", str(args.rows),
+                "--writers", str(args.writers),
+                "--uploads", str(args.uploads),
+                "--readers", str(args.readers),
+                "--read-interval", str(args.read_interval),
+            ],
+            cwd=BACKEND_DIR,
+            capture_output=True,
+            text=True,
+        )
+        if completed.returncode != 0:
+            print(f"{mode:<15}failed: {completed.stderr.strip().splitlines()[-1:]}")
+            continue
+
+        item = json.loads(completed.stdout.strip().splitlines()[-1])
+        results.append(item)
+        print(
+            f"{mode:<15}{item['uploads_per_second']:>10.2f}{item['rows_per_second']:>12,.0f}"
+            f"{item['reads_per_second']:>10.1f}{_format_ms(item['write_p50']):>9}ms"
+            f"{_format_ms(item['read_p50']):>8}ms{_format_ms(item['read_p95']):>8}ms{item['errors']:>8}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(results, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Synthetic equipment CSVs in the Samples/sample_equipment_data.csv schema.
+
+    cd backend
+    python -m benchmarks.data equipment.csv --rows 1000000 --types 50 --invalid-share 0.001
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_TYPES = ["Pump", "Compressor", "Valve", "HeatExchanger", "Reactor", "Condenser"]
+
+METRIC_RANGES = {
+    "Flowrate": (20, 400, 1),
+    "Pressure": (1, 40, 2),
+    "Temperature": (20, 250, 1),
+}
+
+INVALID_VALUES = np.array(["", "n/a", "unknown", "-"], dtype=object)
+
+# Rows generated per DataFrame when writing large files.
+WRITE_CHUNK_ROWS = 1_000_000
+
+
+def type_names(types=None):
+    """``types`` equipment type names; the defaults first, then Type-N."""
+    if types is None:
+        return list(DEFAULT_TYPES)
+    names = DEFAULT_TYPES[:types]
+    names += [f"Type-{index}" for index in range(len(names) + 1, types + 1)]
+    return names
+
+
+def generate_frame(rows, seed=0, types=None, invalid_share=0.0, start=1):
+    """
+    ``rows`` equipment rows. ``invalid_share`` of the rows get one metric
+    replaced by a non-numeric value; ``start`` numbers the equipment names.
+    """
+    rng = np.random.default_rng(seed)
+    names = np.array(type_names(types))
+    equipment_types = names[rng.integers(0, len(names), rows)]
+
+    frame = pd.DataFrame(
+        {
+            "Equipment Name": [f"{t}-{i}" for i, t in enumerate(equipment_types, start=start)],
+            "Type": equipment_types,
+        }
+    )
+    for column, (low, high, decimals) in METRIC_RANGES.items():
+        frame[column] = rng.uniform(low, high, rows).round(decimals)
+
+    if invalid_share:
+        invalid = np.flatnonzero(rng.random(rows) < invalid_share)
+        columns = rng.integers(0, len(METRIC_RANGES), len(invalid))
+        for index, column in enumerate(METRIC_RANGES):
+            targets = invalid[columns == index]
+            if len(targets):
+                frame[column] = frame[column].astype(object)
+                frame.loc[targets, column] = rng.choice(INVALID_VALUES, len(targets))
+
+    return frame
+
+
+def write_csv(path, rows, seed=0, types=None, invalid_share=0.0):
+    """Write ``rows`` rows to ``path`` in bounded-memory chunks."""
+    with open(path, "w", newline="") as output:
+        for start in range(0, max(rows, 1), WRITE_CHUNK_ROWS):
+            frame = generate_frame(
+                min(WRITE_CHUNK_ROWS, rows - start),
+                seed=seed + start,
+                types=types,
+                invalid_share=invalid_share,
+                start=start + 1,
+            )
+            frame.to_csv(output, index=False, header=start == 0)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path")
+    parser.add_argument("--rows", type=int, default=1_000)
+    parser.add_argument("--types", type=int, default=None,
+                        help="number of distinct equipment types (default: the 6 sample types)")
+    parser.add_argument("--invalid-share", type=float, default=0.0,
+                        help="fraction of rows with a non-numeric metric value")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    write_csv(args.path, args.rows, args.seed, args.types, args.invalid_share)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Compare CSV parse paths: the original default-inference parser against
+EQUIPMENT_CSV_ENGINE "c" and "pyarrow" (when installed).
+
+    cd backend
+    python -m benchmarks.parse --rows 1000000
+
+Each parser runs in a fresh process; "peak MB" is its peak RSS above the
+RSS after imports (Linux).
+"""
+
+import argparse
+import multiprocessing
+import resource
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+from . import BACKEND_DIR
+
+
+def legacy_summarize(path, chunk_size):
+    """The parser as it was before column pruning and declared dtypes."""
+    import pandas as pd
+
+    from equipment.ingest import METRIC_COLUMNS
+
+    count = 0
+    sums = dict.fromkeys(METRIC_COLUMNS, 0.0)
+    type_counts = Counter()
+
+    for chunk in pd.read_csv(path, chunksize=chunk_size):
+        for column in METRIC_COLUMNS:
+            chunk[column] = pd.to_numeric(chunk[column], errors="coerce")
+        if chunk[METRIC_COLUMNS].isnull().any().any():
+            raise ValueError("CSV contains invalid numeric values")
+        count += len(chunk)
+        for column in METRIC_COLUMNS:
+            sums[column] += float(chunk[column].sum())
+        type_counts.update(chunk["Type"].value_counts(sort=False).to_dict())
+
+    return {
+        "total_equipment": count,
+        "average_flowrate": sums["Flowrate"] / count,
+        "average_pressure": sums["Pressure"] / count,
+        "average_temperature": sums["Temperature"] / count,
+        "equipment_type_distribution": dict(type_counts.most_common()),
+    }
+
+
+def fast_summarize(path, chunk_size, engine):
+    """Parse and validate only, as the ingest path does before statistics."""
+    from equipment.ingest import METRIC_COLUMNS, clean_chunk, read_chunks
+
+    count = 0
+    sums = dict.fromkeys(METRIC_COLUMNS, 0.0)
+    type_counts = Counter()
+
+    with open(path, "rb") as handle:
+        for chunk in read_chunks(handle, chunk_size, engine):
+            chunk = clean_chunk(chunk)
+            count += len(chunk)
+            for column in METRIC_COLUMNS:
+                sums[column] += float(chunk[column].sum())
+            type_counts.update(chunk["Type"].value_counts(sort=False).to_dict())
+
+    return {
+        "total_equipment": count,
+        "average_flowrate": sums["Flowrate"] / count,
+        "average_pressure": sums["Pressure"] / count,
+        "average_temperature": sums["Temperature"] / count,
+        "equipment_type_distribution": dict(type_counts.most_common()),
+    }
+
+
+def _status_kb(field):
+    # VmHWM rather than ru_maxrss: the latter can carry over the parent's
+    # peak into a freshly spawned child.
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith(f"{field}:"):
+                return int(line.split()[1])
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _run(parser, path, chunk_size, results):
+    import os
+
+    sys.path.insert(0, str(BACKEND_DIR))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+    import django
+    django.setup()
+
+    baseline = _status_kb("VmRSS")
+    start = time.perf_counter()
+    if parser == "legacy":
+        summary = legacy_summarize(path, chunk_size)
+    else:
+        summary = fast_summarize(path, chunk_size, parser)
+    elapsed = time.perf_counter() - start
+    peak = _status_kb("VmHWM")
+
+    results.put((elapsed, (peak - baseline) / 1024, summary))
+
+
+def measure(parser, path, chunk_size):
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=_run, args=(parser, path, chunk_size, results))
+    process.start()
+    outcome = results.get()
+    process.join()
+    return outcome
+
+
+def matches(summary, reference):
+    if summary["total_equipment"] != reference["total_equipment"]:
+        return False
+    if list(summary["equipment_type_distribution"].items()) != list(reference["equipment_type_distribution"].items()):
+        return False
+    return all(
+        abs(summary[key] - reference[key]) <= 1e-9 * max(1.0, abs(reference[key]))
+        for key in ("average_flowrate", "average_pressure", "average_temperature")
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--csv", help="existing CSV to parse instead of generated data")
+    args = parser.parse_args()
+
+    from equipment.ingest import pa_csv
+
+    from .data import write_csv
+
+    if args.csv:
+        path = args.csv
+    else:
+        path = str(Path(tempfile.mkdtemp()) / "equipment.csv")
+        write_csv(path, args.rows)
+
+    parsers = ["legacy", "c"] + (["pyarrow"] if pa_csv is not None else [])
+    print(f"{'parser':<8} {'seconds':>8} {'peak MB':>8}  matches legacy")
+
+    reference = None
+    for name in parsers:
+        elapsed, peak_mb, summary = measure(name, path, args.chunk_size)
+        if reference is None:
+            reference = summary
+        print(f"{name:<8} {elapsed:>8.2f} {peak_mb:>8.1f}  {matches(summary, reference)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Compare EquipmentRecord insert paths.
+
+    cd backend
+    python -m benchmarks.records --rows 1000000
+"""
+
+import argparse
+import time
+
+from . import setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--orm-rows", type=int, default=5_000,
+                        help="rows used for the row-by-row save() baseline")
+    args = parser.parse_args()
+
+    connection = setup_django()
+
+    from django.db import transaction
+
+    from equipment.bulk import insert_records
+    from equipment.ingest import clean_chunk
+    from equipment.models import EquipmentRecord, EquipmentUpload
+
+    from .data import generate_frame
+
+    frame = clean_chunk(generate_frame(args.rows))
+
+    def new_upload():
+        return EquipmentUpload.objects.create(
+            total_equipment=0,
+            average_flowrate=0.0,
+            average_pressure=0.0,
+            average_temperature=0.0,
+            equipment_type_distribution={},
+        )
+
+    def raw_insert():
+        upload = new_upload()
+        for start in range(0, len(frame), args.chunk_size):
+            insert_records(upload.pk, frame.iloc[start:start + args.chunk_size])
+        return len(frame)
+
+    def bulk_create():
+        upload = new_upload()
+        for start in range(0, len(frame), args.chunk_size):
+            chunk = frame.iloc[start:start + args.chunk_size]
+            EquipmentRecord.objects.bulk_create(
+                [
+                    EquipmentRecord(
+                        upload=upload,
+                        equipment_name=name,
+                        type=type_,
+                        flowrate=flowrate,
+                        pressure=pressure,
+                        temperature=temperature,
+                    )
+                    for name, type_, flowrate, pressure, temperature in chunk.itertuples(index=False)
+                ],
+                batch_size=5_000,
+            )
+        return len(frame)
+
+    def orm_save():
+        upload = new_upload()
+        sample = frame.iloc[:args.orm_rows]
+        for name, type_, flowrate, pressure, temperature in sample.itertuples(index=False):
+            EquipmentRecord.objects.create(
+                upload=upload,
+                equipment_name=name,
+                type=type_,
+                flowrate=flowrate,
+                pressure=pressure,
+                temperature=temperature,
+            )
+        return len(sample)
+
+    print(f"{'method':<14}{'rows':>10}{'seconds':>10}{'rows/s':>14}")
+    for label, func in [("raw insert", raw_insert), ("bulk_create", bulk_create), ("orm save()", orm_save)]:
+        with transaction.atomic():
+            started = time.perf_counter()
+            rows = func()
+            elapsed = time.perf_counter() - started
+        print(f"{label:<14}{rows:>10}{elapsed:>10.2f}{rows / elapsed:>14,.0f}")
+
+    connection.creation.destroy_test_db(connection.settings_dict["NAME"], verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Time the upload, history and report endpoints through the Django test client.
+
+    cd backend
+    python -m benchmarks.run --rows 1000 100000 1000000 --output results.json
+    python -m benchmarks.run --rows 1000 100000 --compare results.json
+
+For each generated file this records wall time, peak RSS (Linux) and the
+number of SQL queries per request, and writes them as JSON together with
+the git commit and the parser settings, so runs from different commits can
+be compared with --compare. Reports render in worker processes, so their
+peak RSS covers only the request side.
+"""
+
+import argparse
+import json
+import logging
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from . import BACKEND_DIR, setup_django
+from .data import write_csv
+
+
+def _reset_peak_rss():
+    # Writing 5 to clear_refs resets VmHWM so each request gets its own peak.
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb():
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BACKEND_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def measure(request):
+    """Run ``request()`` and return (response, seconds, peak RSS MB, query count)."""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    _reset_peak_rss()
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        response = request()
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        elapsed = time.perf_counter() - start
+    return response, elapsed, _peak_rss_mb(), len(queries)
+
+
+def run_case(client, path, rows, repeat):
+    from django.conf import settings
+    from django.test import override_settings
+
+    from equipment.models import EquipmentUpload
+    from equipment.reports import discard_reports
+
+    cache_disabled = {**settings.EQUIPMENT_UPLOAD_CACHE, "ENABLED": False}
+
+    def upload():
+        with open(path, "rb") as handle:
+            return client.post("/api/equipment/upload/", {"file": handle}, format="multipart")
+
+    def history():
+        return client.get("/api/equipment/history/")
+
+    def report():
+        latest = EquipmentUpload.objects.order_by("-uploaded_at").first()
+        if latest is not None:
+            discard_reports(latest.pk)
+        return client.get("/api/equipment/report/")
+
+    def cached_report():
+        return client.get("/api/equipment/report/")
+
+    # (name, request, settings override, unmeasured warm-up call first)
+    operations = [
+        ("upload", upload, override_settings(EQUIPMENT_UPLOAD_CACHE=cache_disabled), False),
+        ("upload_cached", upload, None, True),
+        ("history", history, None, False),
+        ("report", report, None, True),
+        ("report_cached", cached_report, None, True),
+    ]
+
+    results = []
+    for name, request, override, warm_up in operations:
+        if warm_up:
+            measure(request)
+        samples = []
+        for _ in range(repeat):
+            if override is not None:
+                with override:
+                    samples.append(measure(request))
+            else:
+                samples.append(measure(request))
+
+        results.append(
+            {
+                "operation": name,
+                "rows": rows,
+                "status": samples[-1][0].status_code,
+                "seconds": statistics.median(sample[1] for sample in samples),
+                "seconds_min": min(sample[1] for sample in samples),
+                "peak_rss_mb": max(sample[2] for sample in samples),
+                "queries": samples[-1][3],
+                "repeat": repeat,
+            }
+        )
+    return results
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as handle:
+        baseline = json.load(handle)
+
+    previous = {(item["operation"], item["rows"]): item for item in baseline["results"]}
+    print(f"\nvs {baseline_path} ({baseline.get('commit')}):")
+    for item in results:
+        before = previous.get((item["operation"], item["rows"]))
+        if before is None:
+            continue
+        ratio = item["seconds"] / before["seconds"] if before["seconds"] else float("inf")
+        print(
+            f"{item['operation']:<14} {item['rows']:>10} "
+            f"{before['seconds']:>9.3f}s -> {item['seconds']:>9.3f}s ({ratio:.2f}x)  "
+            f"queries {before['queries']} -> {item['queries']}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--types", type=int, default=None)
+    parser.add_argument("--invalid-share", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--compare", help="earlier --output file to compare against")
+    args = parser.parse_args()
+
+    setup_django()
+    # 400/404 responses are expected with --invalid-share; don't log each one.
+    logging.getLogger("django.request").setLevel(logging.ERROR)
+
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from rest_framework.test import APIClient
+
+    work_dir = Path(tempfile.mkdtemp())
+    # Keep every upload so history has something to page through, and render
+    # reports synchronously so their time is measured rather than a 202.
+    settings.EQUIPMENT_RETENTION = {**settings.EQUIPMENT_RETENTION, "AUTO_PRUNE": False}
+    settings.EQUIPMENT_REPORT_DIR = work_dir / "reports"
+    settings.EQUIPMENT_REPORT_WAIT = None
+
+    user = User.objects.create_user("benchmark", password="benchmark")
+    client = APIClient()
+    client.force_authenticate(user)
+
+    results = []
+    for rows in args.rows:
+        path = write_csv(work_dir / f"equipment-{rows}.csv", rows, args.seed, args.types, args.invalid_share)
+        for item in run_case(client, path, rows, args.repeat):
+            results.append(item)
+            print(
+                f"{item['operation']:<14} {rows:>10} rows  {item['seconds']:>9.3f}s  "
+                f"{item['peak_rss_mb']:>8.1f} MB  {item['queries']:>4} queries  [{item['status']}]"
+            )
+
+    output = {
+        "commit": _git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "settings": {
+            "csv_engine": settings.EQUIPMENT_CSV_ENGINE,
+            "csv_chunk_size": settings.EQUIPMENT_CSV_CHUNK_SIZE,
+            "database": settings.DATABASES["default"]["ENGINE"],
+        },
+        "parameters": {
+            "types": args.types,
+            "invalid_share": args.invalid_share,
+            "seed": args.seed,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as handle:
+        json.dump(output, handle, indent=2)
+    print(f"\nWrote {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
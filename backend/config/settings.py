@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -49,7 +52,7 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "equipment.authentication.CachedTokenAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
@@ -57,6 +60,8 @@ REST_FRAMEWORK = {
 }
 
 MIDDLEWARE = [
+    'equipment.middleware.ServerTimingMiddleware',
+    'equipment.middleware.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -90,12 +95,58 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# EQUIPMENT_DB_ENGINE selects "sqlite" (default) or "postgresql" (needs
+# psycopg); the other EQUIPMENT_DB_* variables configure it. Connections are
+# kept open for EQUIPMENT_DB_CONN_MAX_AGE seconds instead of being reopened on
+# every request.
+
+DATABASE_ENGINE = os.environ.get("EQUIPMENT_DB_ENGINE", "sqlite").lower()
+
+DATABASE_CONN_MAX_AGE = int(os.environ.get("EQUIPMENT_DB_CONN_MAX_AGE", "600"))
+
+if DATABASE_ENGINE in ("postgres", "postgresql"):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get("EQUIPMENT_DB_NAME", "equipment"),
+            'USER': os.environ.get("EQUIPMENT_DB_USER", ""),
+            'PASSWORD': os.environ.get("EQUIPMENT_DB_PASSWORD", ""),
+            'HOST': os.environ.get("EQUIPMENT_DB_HOST", ""),
+            'PORT': os.environ.get("EQUIPMENT_DB_PORT", ""),
+            'CONN_MAX_AGE': DATABASE_CONN_MAX_AGE,
+            # Reused connections are pinged before the first query of a
+            # request so a server restart doesn't surface as an error.
+            'CONN_HEALTH_CHECKS': True,
+        }
     }
-}
+elif DATABASE_ENGINE == "sqlite":
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get("EQUIPMENT_DB_NAME", BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': DATABASE_CONN_MAX_AGE,
+            'OPTIONS': {
+                # Uploads and background pruning write concurrently; taking
+                # the write lock at BEGIN makes transactions wait for each
+                # other instead of failing with "database is locked" when
+                # upgrading a read lock.
+                'transaction_mode': 'IMMEDIATE',
+                # WAL lets readers run alongside the single writer, and with
+                # synchronous=NORMAL commits no longer fsync (a power loss can
+                # drop the last commits but not corrupt the file). Writers
+                # wait up to busy_timeout ms for the lock; mmap_size maps the
+                # first 256 MiB of the file for reads.
+                'init_command': (
+                    "PRAGMA journal_mode=WAL;"
+                    "PRAGMA synchronous=NORMAL;"
+                    "PRAGMA busy_timeout=30000;"
+                    "PRAGMA mmap_size=268435456;"
+                ),
+            },
+        }
+    }
+else:
+    raise ImproperlyConfigured(f"Unknown EQUIPMENT_DB_ENGINE: {DATABASE_ENGINE!r}")
 
 
 # Password validation
@@ -139,4 +190,207 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
-CORS_ALLOW_ALL_ORIGINS = True
\ No newline at end of file
+CORS_ALLOW_ALL_ORIGINS = True
+
+
+# Equipment CSV ingestion
+# Uploads are parsed in chunks of EQUIPMENT_CSV_CHUNK_SIZE rows, so memory use
+# does not grow with the size of the file.
+
+EQUIPMENT_UPLOAD_MAX_SIZE = 512 * 1024 * 1024
+
+# Uploads may be gzip or zstd compressed (.csv.gz, .csv.zst or a text/csv
+# body with Content-Encoding); MAX_SIZE applies to the bytes sent and this to
+# the CSV they decompress to.
+
+EQUIPMENT_UPLOAD_MAX_DECOMPRESSED_SIZE = 4 * 1024 * 1024 * 1024
+
+EQUIPMENT_CSV_CHUNK_SIZE = 50_000
+
+# CSV parser: "pyarrow" (multi-threaded, needs pyarrow), "c" (pandas' C
+# engine) or "auto" to use pyarrow when it is installed.
+
+EQUIPMENT_CSV_ENGINE = "auto"
+
+# Summaries of previously seen files, keyed by the SHA-256 of the uploaded
+# bytes. Uploading a cached file again skips the parse and copies the earlier
+# upload's rows instead. MAX_AGE is in seconds; None disables that limit.
+# Limits are enforced on every EVICT_EVERY-th store in each process, so the
+# table can briefly hold up to EVICT_EVERY - 1 entries over MAX_ENTRIES per
+# process; expired entries are never served in the meantime.
+
+EQUIPMENT_UPLOAD_CACHE = {
+    "ENABLED": True,
+    "MAX_ENTRIES": 1000,
+    "MAX_AGE": 7 * 24 * 60 * 60,
+    "EVICT_EVERY": 50,
+}
+
+# Per-upload distribution statistics: quantile sketches are accurate to within
+# EQUIPMENT_SKETCH_ACCURACY (relative), histograms use fixed-width bins so they
+# can be merged across uploads. Histograms start at these widths and double
+# them as needed to stay within 128 bins.
+
+EQUIPMENT_SKETCH_ACCURACY = 0.01
+
+EQUIPMENT_HISTOGRAM_BIN_WIDTHS = {
+    "flowrate": 25.0,
+    "pressure": 2.5,
+    "temperature": 10.0,
+}
+
+# Token -> user lookups cached in process by CachedTokenAuthentication.
+# Entries are dropped on logout and token deletion, or after TTL seconds.
+
+EQUIPMENT_TOKEN_CACHE = {
+    "ENABLED": True,
+    "MAX_ENTRIES": 1000,
+    "TTL": 300,
+}
+
+# Cached history pages, aggregates and upload statistics, keyed by a
+# per-user version that is replaced whenever one of the user's uploads is
+# saved or deleted. EQUIPMENT_RESPONSE_CACHE_BACKEND picks "file" (shared by
+# the server, its batch workers and management commands on one host) or
+# "locmem" (private to one process: only correct for a single server process
+# that no prune_uploads or process_upload_jobs command runs alongside).
+
+EQUIPMENT_RESPONSE_CACHE_BACKEND = os.environ.get("EQUIPMENT_RESPONSE_CACHE_BACKEND", "file").lower()
+
+if EQUIPMENT_RESPONSE_CACHE_BACKEND == "file":
+    RESPONSE_CACHE = {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": BASE_DIR / "var" / "cache",
+    }
+elif EQUIPMENT_RESPONSE_CACHE_BACKEND == "locmem":
+    RESPONSE_CACHE = {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "equipment-responses",
+    }
+else:
+    raise ImproperlyConfigured(
+        f"Unknown EQUIPMENT_RESPONSE_CACHE_BACKEND: {EQUIPMENT_RESPONSE_CACHE_BACKEND!r}"
+    )
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "responses": {
+        **RESPONSE_CACHE,
+        "TIMEOUT": 60 * 60,
+        "OPTIONS": {"MAX_ENTRIES": 5000},
+    },
+}
+
+EQUIPMENT_RESPONSE_CACHE = {
+    "ENABLED": True,
+    "ALIAS": "responses",
+    "TIMEOUT": 60 * 60,
+}
+
+# History pagination (history/?page_size=&cursor=&since=).
+
+EQUIPMENT_HISTORY_PAGE_SIZE = 5
+
+EQUIPMENT_HISTORY_MAX_PAGE_SIZE = 100
+
+# Upload retention. Keep the KEEP_LATEST most recent uploads and/or uploads
+# newer than MAX_AGE_DAYS; None disables a limit. Pruning runs in batches of
+# BATCH_SIZE on a background thread after uploads (AUTO_PRUNE) or via
+# `manage.py prune_uploads`.
+
+EQUIPMENT_RETENTION = {
+    "KEEP_LATEST": 5,
+    "MAX_AGE_DAYS": None,
+    "BATCH_SIZE": 500,
+    "AUTO_PRUNE": True,
+}
+
+# Asynchronous uploads (POST upload/?async=1). Files are spooled to
+# EQUIPMENT_JOB_DIR and processed by an in-process thread pool; jobs left
+# queued after a restart are picked up by `manage.py process_upload_jobs`
+# (run it at startup). Running jobs report progress at least once per chunk;
+# one silent for EQUIPMENT_JOB_STALE_AFTER seconds is assumed to belong to a
+# dead process and is re-queued by the same command.
+
+EQUIPMENT_JOB_DIR = BASE_DIR / "var" / "jobs"
+
+EQUIPMENT_JOB_WORKERS = 2
+
+EQUIPMENT_JOB_STALE_AFTER = 10 * 60
+
+# Resumable uploads (uploads/sessions/). Chunks are stored in
+# EQUIPMENT_UPLOAD_SESSION_DIR until the session is completed; sessions idle
+# for longer than EQUIPMENT_UPLOAD_SESSION_MAX_AGE seconds are discarded. A
+# single PUT may carry at most EQUIPMENT_UPLOAD_CHUNK_MAX_SIZE bytes.
+
+EQUIPMENT_UPLOAD_SESSION_DIR = BASE_DIR / "var" / "sessions"
+
+EQUIPMENT_UPLOAD_SESSION_MAX_AGE = 24 * 60 * 60
+
+EQUIPMENT_UPLOAD_CHUNK_MAX_SIZE = 64 * 1024 * 1024
+
+# Uploads, cache entries and jobs from before uploads had owners are given to
+# the user named here by migration 0010 (or `manage.py assign_legacy_uploads`);
+# unset, they go to the only user if there is exactly one. The migration reads
+# the environment variable itself rather than this setting.
+
+EQUIPMENT_LEGACY_UPLOAD_OWNER = os.environ.get("EQUIPMENT_LEGACY_UPLOAD_OWNER")
+
+# Rendered PDF reports are cached here, one file per upload and template
+# version; files are removed when their upload is deleted. Reports are
+# rendered on a process pool; report/ waits up to EQUIPMENT_REPORT_WAIT
+# seconds and then answers 202 with Retry-After.
+
+EQUIPMENT_REPORT_DIR = BASE_DIR / "var" / "reports"
+
+EQUIPMENT_REPORT_WORKERS = 2
+
+EQUIPMENT_REPORT_WAIT = 10
+
+EQUIPMENT_REPORT_RETRY_AFTER = 2
+
+# Upper bound on the uploads in one report/export/ ZIP.
+
+EQUIPMENT_REPORT_EXPORT_MAX_UPLOADS = 500
+
+# Request instrumentation: per-phase Server-Timing headers and Prometheus
+# metrics at /metrics. With ENABLED False the middleware is not installed and
+# the instrumentation calls in views do nothing. /metrics covers every user,
+# so it only answers clients in METRICS_ALLOWED_IPS or ones sending
+# "Authorization: Bearer <METRICS_TOKEN>".
+
+EQUIPMENT_INSTRUMENTATION = {
+    "ENABLED": True,
+    "SERVER_TIMING": True,
+    "METRICS": True,
+    "METRICS_ALLOWED_IPS": ("127.0.0.1", "::1"),
+    "METRICS_TOKEN": os.environ.get("EQUIPMENT_METRICS_TOKEN"),
+}
+
+# Response compression: JSON and text responses of at least MIN_SIZE bytes
+# are sent zstd (if the zstandard package is installed) or gzip encoded when
+# the client accepts it.
+
+EQUIPMENT_COMPRESSION = {
+    "ENABLED": True,
+    "MIN_SIZE": 1024,
+    "GZIP_LEVEL": 6,
+    "ZSTD_LEVEL": 3,
+}
+
+# Async views for upload/, history/ and report/ (see equipment/async_views.py
+# and the ASGI section of the README). Blocking work runs on a pool of
+# EQUIPMENT_ASYNC_WORKERS threads.
+
+EQUIPMENT_ASYNC_VIEWS = os.environ.get("EQUIPMENT_ASYNC_VIEWS", "").lower() in ("1", "true", "yes")
+
+EQUIPMENT_ASYNC_WORKERS = 8
+
+# Batch uploads (upload/batch/) are parsed on a process pool; None uses one
+# worker per CPU core.
+
+EQUIPMENT_BATCH_WORKERS = None
+
+EQUIPMENT_BATCH_MAX_FILES = 50
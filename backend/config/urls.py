@@ -2,8 +2,13 @@ from django.contrib import admin
 from django.urls import path, include
 from rest_framework.authtoken.views import obtain_auth_token
 
+from equipment.instrumentation import metrics_view
+from equipment.views import LogoutView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/equipment/', include('equipment.urls')),
     path("api/token/", obtain_auth_token),
+    path("api/token/logout/", LogoutView.as_view(), name="logout"),
+    path("metrics", metrics_view, name="metrics"),
 ]
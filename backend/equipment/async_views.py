@@ -0,0 +1,240 @@
+"""
+Async versions of the upload, history and report endpoints, used instead of
+the DRF views when EQUIPMENT_ASYNC_VIEWS is set and the project is served
+over ASGI (see README).
+
+Under ASGI Django reads the request body without holding a thread, so slow
+clients only cost a socket. Token and report lookups use the async ORM;
+history pages (built by the same code as the sync view), parsing multipart
+bodies, pandas ingestion and report files run on a bounded thread pool so
+they never block the event loop.
+"""
+
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import JsonResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework.authentication import get_authorization_header
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import APIException
+
+from . import authentication, instrumentation
+from .ingest import CSVIngestError
+from .instrumentation import phase
+from .jobs import enqueue_upload
+from .models import EquipmentUpload
+from .parsers import read_csv_body
+from .reports import ReportRenderError, report_etag, report_path, request_report, wait_for_report
+from .retention import schedule_prune
+from .serializers import CSVUploadSerializer
+from .services import ingest_upload
+from .views import (
+    _job_payload,
+    _report_response,
+    _set_history_headers,
+    _wants_async,
+    history_page,
+)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.EQUIPMENT_ASYNC_WORKERS,
+                thread_name_prefix="async-view",
+            )
+        return _executor
+
+
+def _call_and_release(func, *args):
+    try:
+        return func(*args)
+    finally:
+        close_old_connections()
+
+
+async def offload(func, *args):
+    """Run blocking ``func(*args)`` on the view thread pool, keeping the request's phase timings."""
+    context = contextvars.copy_context()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_executor(),
+        functools.partial(context.run, _call_and_release, func, *args),
+    )
+
+
+async def _authenticate(request):
+    """CachedTokenAuthentication with the same rules and messages, using the async ORM on a miss."""
+    header = get_authorization_header(request).split()
+    if not header or header[0].lower() != b"token":
+        return None, "Authentication credentials were not provided."
+    if len(header) != 2:
+        return None, "Invalid token header."
+
+    try:
+        key = header[1].decode()
+    except UnicodeError:
+        return None, "Invalid token."
+
+    token = authentication.get(key)
+    if token is not None:
+        return token.user, None
+
+    try:
+        token = await Token.objects.select_related("user").aget(key=key)
+    except Token.DoesNotExist:
+        return None, "Invalid token."
+
+    if not token.user.is_active:
+        return None, "User inactive or deleted."
+    authentication.put(token)
+    return token.user, None
+
+
+def token_required(view):
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user, error = await _authenticate(request)
+        if user is None:
+            response = JsonResponse({"detail": error}, status=401)
+            response["WWW-Authenticate"] = "Token"
+            return response
+        request.user = user
+        return await view(request, *args, **kwargs)
+
+    return wrapper
+
+
+def _read_upload_form(request):
+    if request.content_type == "text/csv":
+        return {}, {"file": read_csv_body(request, request.META)}
+    return request.POST, request.FILES
+
+
+@csrf_exempt
+@require_POST
+@token_required
+async def upload_csv(request):
+    try:
+        with phase("multipart"):
+            form, files = await offload(_read_upload_form, request)
+    except APIException as e:
+        return JsonResponse({"detail": e.detail}, status=e.status_code)
+
+    serializer = CSVUploadSerializer(data={"file": files.get("file")})
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=400)
+
+    csv_file = serializer.validated_data["file"]
+
+    if _wants_async(request.GET, form):
+        job = await offload(enqueue_upload, csv_file, request.user.pk)
+        response = JsonResponse(_job_payload(job), status=202)
+        response["Location"] = reverse("upload_job", args=[job.pk])
+        return response
+
+    try:
+        summary = await offload(ingest_upload, csv_file, request.user.pk)
+    except CSVIngestError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    schedule_prune(request.user.pk)
+
+    return JsonResponse(summary)
+
+
+@require_GET
+@token_required
+async def upload_history(request):
+    try:
+        page, not_modified = await offload(history_page, request, request.GET)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    if not_modified is not None:
+        return not_modified
+
+    result = JsonResponse(page["items"], safe=False)
+    _set_history_headers(
+        result,
+        request,
+        request.GET,
+        page["etag"],
+        page["last_modified"],
+        page["next_cursor"],
+    )
+    return result
+
+
+def _open_cached_report(upload_id):
+    try:
+        return open(report_path(upload_id), "rb")
+    except FileNotFoundError:
+        return None
+
+
+async def _open_report(upload, timeout):
+    report = await offload(_open_cached_report, upload.pk)
+    if report is not None:
+        instrumentation.increment(instrumentation.REPORT_RENDERS_TOTAL, result="hit")
+        return report
+
+    instrumentation.increment(instrumentation.REPORT_RENDERS_TOTAL, result="miss")
+    future = await offload(request_report, upload)
+    # Wait on the render without tying up a thread; shield() keeps a timeout
+    # from cancelling the shared render other requests may be waiting on.
+    try:
+        await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout)
+    except asyncio.TimeoutError:
+        return None
+    except Exception:
+        pass
+    return wait_for_report(future)
+
+
+@require_GET
+@token_required
+async def pdf_report(request, upload_id=None):
+    uploads = EquipmentUpload.objects.filter(owner=request.user)
+
+    with phase("query"):
+        if upload_id is None:
+            latest = await uploads.order_by("-uploaded_at").afirst()
+        else:
+            latest = await uploads.filter(pk=upload_id).afirst()
+
+    if not latest:
+        return JsonResponse({"error": "No uploads found"}, status=404)
+
+    etag = report_etag(latest.pk)
+
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        not_modified["ETag"] = etag
+        return not_modified
+
+    try:
+        with phase("render"):
+            report = await _open_report(latest, settings.EQUIPMENT_REPORT_WAIT)
+    except ReportRenderError as e:
+        return JsonResponse({"error": str(e)}, status=500)
+
+    if report is None:
+        response = JsonResponse({"status": "rendering"}, status=202)
+        response["Retry-After"] = str(settings.EQUIPMENT_REPORT_RETRY_AFTER)
+        return response
+
+    return _report_response(report, latest, upload_id, etag)
@@ -0,0 +1,115 @@
+"""
+Token authentication with an in-process cache of token -> user lookups.
+
+DRF's TokenAuthentication queries the token table (joined to the user) on
+every request. CachedTokenAuthentication keeps the most recently used
+tokens in a bounded LRU for EQUIPMENT_TOKEN_CACHE["TTL"] seconds. Entries
+are dropped when a token is deleted (logout, admin), when its user is
+saved or deleted, and when they expire. The cache is per process, so with
+several server processes a revoked token can stay valid in the others for
+at most TTL seconds.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.authentication import TokenAuthentication
+
+from . import instrumentation
+
+_lock = threading.Lock()
+# key -> (token, expires_at), least recently used first. Tokens keep their
+# user loaded, so a hit needs no query at all.
+_entries = OrderedDict()
+_counters = {"hits": 0, "misses": 0}
+
+
+def _config():
+    return settings.EQUIPMENT_TOKEN_CACHE
+
+
+def enabled():
+    return _config().get("ENABLED", True)
+
+
+def _count(name):
+    with _lock:
+        _counters[name] += 1
+    instrumentation.increment(
+        instrumentation.TOKEN_CACHE_TOTAL, result="hit" if name == "hits" else "miss"
+    )
+
+
+def get(key):
+    """The cached Token for ``key``, or None on a miss."""
+    if not enabled():
+        return None
+
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and entry[1] <= now:
+            del _entries[key]
+            entry = None
+        if entry is not None:
+            _entries.move_to_end(key)
+
+    _count("misses" if entry is None else "hits")
+    return None if entry is None else entry[0]
+
+
+def put(token):
+    if not enabled():
+        return
+
+    max_entries = _config().get("MAX_ENTRIES", 1000)
+    expires_at = time.monotonic() + _config().get("TTL", 300)
+    with _lock:
+        _entries[token.key] = (token, expires_at)
+        _entries.move_to_end(token.key)
+        while len(_entries) > max_entries:
+            _entries.popitem(last=False)
+
+
+def invalidate(key):
+    with _lock:
+        _entries.pop(key, None)
+
+
+def invalidate_user(user_id):
+    with _lock:
+        for key in [key for key, (token, _) in _entries.items() if token.user_id == user_id]:
+            del _entries[key]
+
+
+def clear():
+    with _lock:
+        _entries.clear()
+
+
+def stats():
+    with _lock:
+        hits, misses = _counters["hits"], _counters["misses"]
+        entries = len(_entries)
+    lookups = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / lookups if lookups else 0.0,
+        "entries": entries,
+    }
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication that serves warm tokens from the token cache."""
+
+    def authenticate_credentials(self, key):
+        token = get(key)
+        if token is not None:
+            return token.user, token
+
+        user, token = super().authenticate_credentials(key)
+        put(token)
+        return user, token
@@ -0,0 +1,89 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.db import connection
+
+from . import response_cache
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _init_worker(database_name):
+    import django
+
+    django.setup()
+
+    # Write to the same database as the parent process, which is not the
+    # configured NAME when running under the test runner or benchmarks.
+    settings.DATABASES["default"]["NAME"] = database_name
+
+
+def _ingest_source(owner_id, name, path=None, content=None):
+    from django.core.files import File
+    from django.core.files.base import ContentFile
+    from django.db import close_old_connections
+
+    from .ingest import CSVIngestError
+    from .services import ingest_upload
+
+    close_old_connections()
+    try:
+        if path is not None:
+            with open(path, "rb") as handle:
+                return {"summary": ingest_upload(File(handle, name=name), owner_id)}
+        return {"summary": ingest_upload(ContentFile(content, name=name), owner_id)}
+    except CSVIngestError as e:
+        return {"error": str(e)}
+    except Exception as e:
+        return {"error": f"Processing failed: {str(e)}"}
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.EQUIPMENT_BATCH_WORKERS or os.cpu_count(),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(str(connection.settings_dict["NAME"]),),
+            )
+        return _executor
+
+
+def _reset_executor():
+    global _executor
+    with _executor_lock:
+        _executor = None
+
+
+def ingest_files(csv_files, owner_id):
+    executor = get_executor()
+    futures = []
+
+    for csv_file in csv_files:
+        if hasattr(csv_file, "temporary_file_path"):
+            future = executor.submit(
+                _ingest_source, owner_id, csv_file.name, path=csv_file.temporary_file_path()
+            )
+        else:
+            future = executor.submit(_ingest_source, owner_id, csv_file.name, content=csv_file.read())
+        futures.append(future)
+
+    results = []
+    for future in futures:
+        try:
+            results.append(future.result())
+        except BrokenProcessPool:
+            _reset_executor()
+            results.append({"error": "Processing failed: worker process terminated"})
+
+    # The workers' own bumps only reach this process through a shared cache.
+    if any("summary" in result for result in results):
+        response_cache.bump(owner_id)
+    return results
@@ -0,0 +1,58 @@
+from itertools import repeat
+
+from django.db import connection
+
+from .models import EquipmentRecord
+
+RECORD_COLUMNS = ["upload_id", "equipment_name", "type", "flowrate", "pressure", "temperature"]
+NAME_MAX_LENGTH = EquipmentRecord._meta.get_field("equipment_name").max_length
+TYPE_MAX_LENGTH = EquipmentRecord._meta.get_field("type").max_length
+
+
+def _text_column(chunk, column, max_length):
+    if column not in chunk.columns:
+        return repeat("", len(chunk))
+    return chunk[column].fillna("").astype(str).str.slice(0, max_length).tolist()
+
+
+def record_rows(upload_id, chunk):
+    return list(
+        zip(
+            repeat(upload_id, len(chunk)),
+            _text_column(chunk, "Equipment Name", NAME_MAX_LENGTH),
+            _text_column(chunk, "Type", TYPE_MAX_LENGTH),
+            chunk["Flowrate"].tolist(),
+            chunk["Pressure"].tolist(),
+            chunk["Temperature"].tolist(),
+        )
+    )
+
+
+def insert_records(upload_id, chunk):
+    # One executemany per chunk instead of building model instances keeps the
+    # insert cost close to the database's own bulk-load speed.
+    table = connection.ops.quote_name(EquipmentRecord._meta.db_table)
+    columns = ", ".join(connection.ops.quote_name(c) for c in RECORD_COLUMNS)
+    placeholders = ", ".join(["%s"] * len(RECORD_COLUMNS))
+    sql = f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
+
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, record_rows(upload_id, chunk))
+
+
+def copy_records(source_upload_id, upload_id):
+    """Copy every record of one upload to another in the database; returns the row count."""
+    table = connection.ops.quote_name(EquipmentRecord._meta.db_table)
+    columns = ", ".join(connection.ops.quote_name(c) for c in RECORD_COLUMNS)
+    copied = ", ".join(connection.ops.quote_name(c) for c in RECORD_COLUMNS[1:])
+    upload_column = connection.ops.quote_name("upload_id")
+    # Ordered so the copies keep the file's row order, as reports list them.
+    sql = (
+        f"INSERT INTO {table} ({columns}) "
+        f"SELECT %s, {copied} FROM {table} WHERE {upload_column} = %s "
+        f"ORDER BY {connection.ops.quote_name('id')}"
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [upload_id, source_upload_id])
+        return cursor.rowcount
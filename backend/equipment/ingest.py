@@ -0,0 +1,353 @@
+import csv
+import gzip
+import io
+from collections import Counter
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = pa_csv = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from .instrumentation import phase, timed
+from .stats import UploadStatistics
+
+REQUIRED_COLUMNS = {"Type", "Flowrate", "Pressure", "Temperature"}
+METRIC_COLUMNS = ["Flowrate", "Pressure", "Temperature"]
+
+# Only these columns are parsed; anything else in the file is skipped. Types
+# are labels: they are grouped as written, whatever each chunk holds.
+PARSED_COLUMNS = {"Equipment Name", "Type", *METRIC_COLUMNS}
+TEXT_DTYPES = {"Equipment Name": "str", "Type": "str"}
+
+# pyarrow reads in byte-sized blocks; this turns the row chunk size into a
+# block size for typical equipment rows.
+ARROW_BYTES_PER_ROW = 64
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# Read size for decompressed streams handed to the parsers.
+DECOMPRESS_BUFFER_SIZE = 1024 * 1024
+
+NOT_UTF8_MESSAGE = "CSV must be UTF-8 encoded"
+
+
+class CSVIngestError(Exception):
+    pass
+
+
+class _RaggedRow(Exception):
+    """pyarrow met a row whose field count differs from the header's."""
+
+
+class SummaryAccumulator:
+    def __init__(self):
+        self.count = 0
+        self.sums = {column: 0.0 for column in METRIC_COLUMNS}
+        self.type_counts = Counter()
+        self.statistics = UploadStatistics(
+            accuracy=settings.EQUIPMENT_SKETCH_ACCURACY,
+            bin_widths=settings.EQUIPMENT_HISTOGRAM_BIN_WIDTHS,
+        )
+
+    def update(self, chunk):
+        self.count += len(chunk)
+        for column in METRIC_COLUMNS:
+            self.sums[column] += float(chunk[column].sum())
+        self.type_counts.update(chunk["Type"].value_counts(sort=False).to_dict())
+        self.statistics.update(chunk)
+
+    def summary(self):
+        return {
+            "total_equipment": self.count,
+            "average_flowrate": self.sums["Flowrate"] / self.count,
+            "average_pressure": self.sums["Pressure"] / self.count,
+            "average_temperature": self.sums["Temperature"] / self.count,
+            "equipment_type_distribution": dict(self.type_counts.most_common()),
+        }
+
+
+class _CappedReader(io.RawIOBase):
+    """Raw reader over a decompressing stream that stops at ``limit`` bytes of output."""
+
+    def __init__(self, stream, limit):
+        self.stream = stream
+        self.limit = limit
+        self.total = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.stream.read(len(buffer))
+        self.total += len(data)
+        if self.limit is not None and self.total > self.limit:
+            raise CSVIngestError(
+                f"Decompressed CSV cannot exceed {self.limit // (1024 * 1024)}MB"
+            )
+        buffer[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        self.stream.close()
+        super().close()
+
+
+def compression_of(csv_file):
+    """"gzip", "zstd" or None, from the file's leading magic bytes."""
+    csv_file.seek(0)
+    magic = csv_file.read(len(ZSTD_MAGIC))
+    csv_file.seek(0)
+    if isinstance(magic, str):
+        return None
+    if magic.startswith(GZIP_MAGIC):
+        return "gzip"
+    if magic.startswith(ZSTD_MAGIC):
+        return "zstd"
+    return None
+
+
+def open_csv_stream(csv_file):
+    """
+    ``csv_file`` rewound to the start, or a stream that decompresses it on
+    the fly when it is gzip or zstd compressed.
+    """
+    compression = compression_of(csv_file)
+    if compression is None:
+        return csv_file
+
+    if compression == "gzip":
+        stream = gzip.GzipFile(fileobj=csv_file, mode="rb")
+    elif zstandard is None:
+        raise CSVIngestError("zstd-compressed uploads are not supported on this server")
+    else:
+        stream = zstandard.ZstdDecompressor().stream_reader(csv_file, closefd=False)
+
+    return io.BufferedReader(
+        _CappedReader(stream, settings.EQUIPMENT_UPLOAD_MAX_DECOMPRESSED_SIZE),
+        buffer_size=DECOMPRESS_BUFFER_SIZE,
+    )
+
+
+def _parsed_column(name):
+    return name in PARSED_COLUMNS
+
+
+def _resolve_engine(engine=None):
+    engine = engine or settings.EQUIPMENT_CSV_ENGINE
+    if engine == "auto":
+        return "pyarrow" if pa_csv is not None else "c"
+    if engine == "pyarrow" and pa_csv is None:
+        raise ImproperlyConfigured("EQUIPMENT_CSV_ENGINE is 'pyarrow' but pyarrow is not installed")
+    return engine
+
+
+def _read_header(stream):
+    line = stream.readline()
+    if isinstance(line, bytes):
+        line = line.decode("utf-8-sig")
+    return next(csv.reader([line]), [])
+
+
+def _read_pandas_chunks(csv_file, chunk_size, prune=True, skip_rows=0):
+    # Undecodable bytes are replaced rather than failing the whole read, so
+    # that, as with pyarrow, only the parsed text columns must be UTF-8.
+    reader = pd.read_csv(
+        csv_file,
+        chunksize=chunk_size,
+        usecols=_parsed_column if prune else None,
+        dtype=TEXT_DTYPES if prune else None,
+        encoding_errors="replace",
+        engine="c",
+    )
+    for chunk in reader:
+        if skip_rows >= len(chunk):
+            skip_rows -= len(chunk)
+            continue
+        if skip_rows:
+            chunk = chunk.iloc[skip_rows:]
+            skip_rows = 0
+        # Unpruned reads are of files missing required columns, which
+        # clean_chunk rejects anyway; their text columns may not be strings.
+        for column in TEXT_DTYPES if prune else ():
+            if column in chunk and chunk[column].str.contains("\ufffd", regex=False).any():
+                raise CSVIngestError(NOT_UTF8_MESSAGE)
+        yield chunk
+
+
+def _read_arrow_chunks(csv_file, chunk_size, columns):
+    """
+    Yield chunks parsed by pyarrow. Raises _RaggedRow at the first row
+    whose field count differs from the header's, which the C engine pads or
+    treats as an index instead of rejecting.
+    """
+    column_types = {name: pa.string() for name in TEXT_DTYPES}
+    column_types.update({name: pa.float64() for name in METRIC_COLUMNS})
+    ragged = []
+
+    def on_invalid_row(row):
+        ragged.append(row.number)
+        return "error"
+
+    try:
+        reader = pa_csv.open_csv(
+            csv_file,
+            read_options=pa_csv.ReadOptions(block_size=chunk_size * ARROW_BYTES_PER_ROW),
+            parse_options=pa_csv.ParseOptions(
+                newlines_in_values=True, invalid_row_handler=on_invalid_row
+            ),
+            convert_options=pa_csv.ConvertOptions(
+                include_columns=columns,
+                column_types=column_types,
+                strings_can_be_null=True,
+            ),
+        )
+        for batch in reader:
+            yield batch.to_pandas()
+    except pa.ArrowInvalid as e:
+        if ragged:
+            raise _RaggedRow()
+        # Metrics are declared float64, so a non-numeric value fails the
+        # conversion here rather than being coerced to NaN later.
+        if "conversion error to double" in str(e):
+            raise CSVIngestError("CSV contains invalid numeric values")
+        if "invalid UTF8" in str(e):
+            raise CSVIngestError(NOT_UTF8_MESSAGE)
+        raise
+
+
+def _read_arrow_then_pandas(csv_file, chunk_size, columns):
+    """
+    Read with pyarrow, handing the rest of the file to the C engine at the
+    first ragged row so such files are read the same whichever engine is
+    configured. Rows pyarrow already yielded are skipped on the second pass.
+    """
+    yielded = 0
+    try:
+        for chunk in _read_arrow_chunks(open_csv_stream(csv_file), chunk_size, columns):
+            yielded += len(chunk)
+            yield chunk
+    except _RaggedRow:
+        yield from _read_pandas_chunks(open_csv_stream(csv_file), chunk_size, skip_rows=yielded)
+
+
+def read_chunks(csv_file, chunk_size=None, engine=None):
+    """
+    Yield DataFrames of the columns ingestion uses, skipping any others.
+    gzip and zstd files are decompressed as they are read. ``engine``
+    overrides EQUIPMENT_CSV_ENGINE; both engines accept and reject the same
+    files with the same messages.
+    """
+    chunk_size = chunk_size or settings.EQUIPMENT_CSV_CHUNK_SIZE
+    engine = _resolve_engine(engine)
+
+    if engine not in ("pyarrow", "c"):
+        raise ImproperlyConfigured(f"Unknown EQUIPMENT_CSV_ENGINE: {engine!r}")
+
+    try:
+        header = _read_header(open_csv_stream(csv_file))
+        columns = [name for name in header if name in PARSED_COLUMNS]
+        if not REQUIRED_COLUMNS.issubset(columns):
+            # Without the required columns pruning would hide the row count;
+            # read everything so errors are reported exactly as before.
+            chunks = _read_pandas_chunks(open_csv_stream(csv_file), chunk_size, prune=False)
+        elif engine == "pyarrow" and len(set(header)) == len(header):
+            chunks = _read_arrow_then_pandas(csv_file, chunk_size, columns)
+        else:
+            # pyarrow returns every copy of a repeated column name, where
+            # the C engine renames the later ones ("Type.1") and skips them.
+            chunks = _read_pandas_chunks(open_csv_stream(csv_file), chunk_size)
+
+        yield from chunks
+    except CSVIngestError:
+        raise
+    except UnicodeDecodeError:
+        raise CSVIngestError(NOT_UTF8_MESSAGE)
+    except Exception as e:
+        raise CSVIngestError(f"Failed to read CSV: {str(e)}")
+
+
+def clean_chunk(chunk):
+    if not REQUIRED_COLUMNS.issubset(chunk.columns):
+        raise CSVIngestError(
+            "CSV must contain columns: Type, Flowrate, Pressure, Temperature"
+        )
+
+    # The C engine reads a column of only True/False as booleans, which
+    # pyarrow rejects as numbers; reject them here too.
+    if any(is_bool_dtype(chunk[column]) for column in METRIC_COLUMNS):
+        raise CSVIngestError("CSV contains invalid numeric values")
+
+    try:
+        for column in METRIC_COLUMNS:
+            # Columns the parser already read as numbers need no coercion.
+            if not is_numeric_dtype(chunk[column]):
+                chunk[column] = pd.to_numeric(chunk[column], errors='coerce')
+    except Exception as e:
+        raise CSVIngestError(f"Data validation error: {str(e)}")
+
+    if chunk[METRIC_COLUMNS].isnull().any().any():
+        raise CSVIngestError("CSV contains invalid numeric values")
+
+    return chunk
+
+
+def summarize_csv(csv_file, chunk_size=None, on_chunk=None, engine=None):
+    return accumulate_csv(csv_file, chunk_size, on_chunk, engine).summary()
+
+
+def accumulate_csv(csv_file, chunk_size=None, on_chunk=None, engine=None):
+    accumulator = SummaryAccumulator()
+
+    for chunk in timed(read_chunks(csv_file, chunk_size, engine), "read_csv"):
+        if chunk.empty:
+            continue
+        try:
+            with phase("validate"):
+                chunk = clean_chunk(chunk)
+            with phase("aggregate"):
+                accumulator.update(chunk)
+        except CSVIngestError:
+            raise
+        except Exception as e:
+            raise CSVIngestError(f"Data validation error: {str(e)}")
+        if on_chunk is not None:
+            on_chunk(chunk)
+
+    if accumulator.count == 0:
+        raise CSVIngestError("CSV file is empty")
+
+    return accumulator
+
+
+def combine_summaries(summaries):
+    total = sum(summary["total_equipment"] for summary in summaries)
+    if total == 0:
+        return None
+
+    type_counts = Counter()
+    for summary in summaries:
+        type_counts.update(summary["equipment_type_distribution"])
+
+    def weighted_mean(key):
+        return sum(summary[key] * summary["total_equipment"] for summary in summaries) / total
+
+    return {
+        "total_equipment": total,
+        "average_flowrate": weighted_mean("average_flowrate"),
+        "average_pressure": weighted_mean("average_pressure"),
+        "average_temperature": weighted_mean("average_temperature"),
+        "equipment_type_distribution": dict(type_counts.most_common()),
+    }
@@ -0,0 +1,221 @@
+"""
+Per-request phase timings and process-wide Prometheus metrics.
+
+Code marks phases with ``phase("name")`` (or ``timed(iterable, "name")`` for
+generators). Inside a request handled by ServerTimingMiddleware the
+durations are summed per phase, sent back in the Server-Timing header and
+observed into the ``equipment_phase_seconds`` histogram. Outside such a
+request, or with instrumentation disabled, phase() is a no-op.
+"""
+
+import bisect
+import hmac
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_NOOP = nullcontext()
+
+# Phase name -> seconds for the request being handled, or None.
+_phases = ContextVar("equipment_phases", default=None)
+
+
+def enabled():
+    return settings.EQUIPMENT_INSTRUMENTATION.get("ENABLED", False)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for key, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        # label key -> [per-bucket counts (+Inf last), sum]
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.values.get(key)
+            if series is None:
+                series = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for key, (counts, total) in sorted(self.values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{self.name}_bucket{_format_labels(key, [('le', le)])} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+
+REQUEST_SECONDS = Histogram(
+    "equipment_request_seconds",
+    "Request latency by view, method and status.",
+)
+PHASE_SECONDS = Histogram(
+    "equipment_phase_seconds",
+    "Time spent per request in each instrumented phase.",
+)
+REQUESTS_TOTAL = Counter(
+    "equipment_requests_total",
+    "Requests by view, method and status.",
+)
+UPLOAD_CACHE_TOTAL = Counter(
+    "equipment_upload_cache_total",
+    "Upload cache lookups by result.",
+)
+REPORT_RENDERS_TOTAL = Counter(
+    "equipment_report_renders_total",
+    "PDF report requests by cache result.",
+)
+TOKEN_CACHE_TOTAL = Counter(
+    "equipment_token_cache_total",
+    "Token authentication cache lookups by result.",
+)
+RESPONSE_CACHE_TOTAL = Counter(
+    "equipment_response_cache_total",
+    "Response cache lookups by payload kind and result.",
+)
+
+METRICS = [
+    REQUEST_SECONDS,
+    PHASE_SECONDS,
+    REQUESTS_TOTAL,
+    UPLOAD_CACHE_TOTAL,
+    REPORT_RENDERS_TOTAL,
+    TOKEN_CACHE_TOTAL,
+    RESPONSE_CACHE_TOTAL,
+]
+
+
+def increment(counter, amount=1, **labels):
+    if enabled():
+        counter.inc(amount, **labels)
+
+
+@contextmanager
+def _timed_phase(phases, name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases[name] = phases.get(name, 0.0) + time.perf_counter() - start
+
+
+def phase(name):
+    phases = _phases.get()
+    if phases is None:
+        return _NOOP
+    return _timed_phase(phases, name)
+
+
+def timed(iterable, name):
+    """Iterate ``iterable``, counting the time spent producing items as ``name``."""
+    phases = _phases.get()
+    if phases is None:
+        yield from iterable
+        return
+
+    iterator = iter(iterable)
+    while True:
+        with _timed_phase(phases, name):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def start_request():
+    return _phases.set({})
+
+
+def finish_request(token):
+    phases = _phases.get()
+    _phases.reset(token)
+    for name, seconds in phases.items():
+        PHASE_SECONDS.observe(seconds, phase=name)
+    return phases
+
+
+def server_timing(phases, total):
+    entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in phases.items()]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+def render_metrics():
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.expose())
+    return "\n".join(lines) + "\n"
+
+
+def _metrics_allowed(request):
+    config = settings.EQUIPMENT_INSTRUMENTATION
+    if request.META.get("REMOTE_ADDR") in config.get("METRICS_ALLOWED_IPS", ()):
+        return True
+    token = config.get("METRICS_TOKEN")
+    scheme, _, credentials = request.headers.get("Authorization", "").partition(" ")
+    return bool(token) and scheme.lower() == "bearer" and hmac.compare_digest(
+        credentials.strip().encode(), token.encode()
+    )
+
+
+def metrics_view(request):
+    config = settings.EQUIPMENT_INSTRUMENTATION
+    if not enabled() or not config.get("METRICS", True):
+        raise Http404()
+    if not _metrics_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8")
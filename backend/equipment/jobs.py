@@ -0,0 +1,147 @@
+import logging
+import os
+import shutil
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .ingest import CSVIngestError
+from .models import UploadJob
+from .retention import schedule_prune
+from .services import ingest_upload
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.EQUIPMENT_JOB_WORKERS,
+                thread_name_prefix="upload-job",
+            )
+        return _executor
+
+
+def _job_path():
+    job_dir = Path(settings.EQUIPMENT_JOB_DIR)
+    job_dir.mkdir(parents=True, exist_ok=True)
+    return job_dir / f"{uuid.uuid4().hex}.csv"
+
+
+def _queue_job(path, file_name, file_size, owner_id):
+    job = UploadJob.objects.create(
+        owner_id=owner_id,
+        file_name=file_name,
+        file_path=str(path),
+        file_size=file_size,
+    )
+
+    transaction.on_commit(lambda: get_executor().submit(run_job, job.pk))
+    return job
+
+
+def enqueue_upload(csv_file, owner_id):
+    path = _job_path()
+
+    with open(path, "wb") as destination:
+        for block in csv_file.chunks():
+            destination.write(block)
+
+    return _queue_job(path, csv_file.name, csv_file.size, owner_id)
+
+
+def enqueue_file(source_path, file_name, owner_id):
+    """Queue a file that is already on disk, moving it into EQUIPMENT_JOB_DIR."""
+    path = _job_path()
+    file_size = os.path.getsize(source_path)
+    shutil.move(source_path, path)
+    return _queue_job(path, file_name, file_size, owner_id)
+
+
+def run_job(job_id):
+    close_old_connections()
+    try:
+        claimed = UploadJob.objects.filter(
+            pk=job_id, state=UploadJob.STATE_QUEUED
+        ).update(state=UploadJob.STATE_RUNNING, updated_at=timezone.now())
+        if not claimed:
+            return
+
+        job = UploadJob.objects.get(pk=job_id)
+        _process(job)
+    finally:
+        close_old_connections()
+
+
+def _process(job):
+    try:
+        with open(job.file_path, "rb") as handle:
+            def on_progress(rows):
+                # Runs outside any transaction, so pollers see it at once;
+                # updated_at doubles as the heartbeat requeue_stale_jobs checks.
+                position = handle.tell()
+                UploadJob.objects.filter(pk=job.pk).update(
+                    rows_processed=rows,
+                    progress=min(position / job.file_size, 1.0) if job.file_size else 0.0,
+                    updated_at=timezone.now(),
+                )
+
+            summary = ingest_upload(File(handle, name=job.file_name), job.owner_id, on_progress)
+
+        schedule_prune(job.owner_id)
+    except CSVIngestError as e:
+        job.state = UploadJob.STATE_FAILED
+        job.error = str(e)
+    except Exception as e:
+        logger.exception("Upload job %s failed", job.pk)
+        job.state = UploadJob.STATE_FAILED
+        job.error = f"Processing failed: {str(e)}"
+    else:
+        job.state = UploadJob.STATE_SUCCEEDED
+        job.summary = summary
+        job.progress = 1.0
+        job.rows_processed = summary["total_equipment"]
+    finally:
+        try:
+            os.remove(job.file_path)
+        except OSError:
+            pass
+
+    job.save(update_fields=["state", "error", "summary", "progress", "rows_processed", "updated_at"])
+
+
+def requeue_stale_jobs():
+    """
+    Put running jobs whose worker has gone quiet for EQUIPMENT_JOB_STALE_AFTER
+    seconds back in the queue; they were left behind by a process that died.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.EQUIPMENT_JOB_STALE_AFTER)
+    return UploadJob.objects.filter(
+        state=UploadJob.STATE_RUNNING, updated_at__lt=cutoff
+    ).update(
+        state=UploadJob.STATE_QUEUED,
+        progress=0.0,
+        rows_processed=0,
+        updated_at=timezone.now(),
+    )
+
+
+def run_pending_jobs():
+    requeue_stale_jobs()
+    processed = 0
+    for job_id in UploadJob.objects.filter(state=UploadJob.STATE_QUEUED).order_by("created_at").values_list("id", flat=True):
+        run_job(job_id)
+        processed += 1
+    return processed
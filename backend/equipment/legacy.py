@@ -0,0 +1,31 @@
+"""
+Uploads from before uploads had owners (migration 0007 added owner as a
+nullable column). Nothing scoped to a user shows them, so they are handed to
+one: by migration 0010 when the owner can be told, or later with
+`manage.py assign_legacy_uploads`, which uses these functions. Migration
+0010 keeps its own copy of the same rules.
+"""
+
+from django.conf import settings
+
+
+def legacy_owner(user_model, username=None):
+    """
+    The user ``username`` (default EQUIPMENT_LEGACY_UPLOAD_OWNER), or the
+    only user when neither is set; None if there is no such user.
+    """
+    username = username or settings.EQUIPMENT_LEGACY_UPLOAD_OWNER
+    if username:
+        return user_model.objects.filter(username=username).first()
+
+    users = list(user_model.objects.all()[:2])
+    return users[0] if len(users) == 1 else None
+
+
+def assign_legacy_uploads(owner, upload_model, job_model, cache_entry_model):
+    """Give unowned uploads and jobs to ``owner``; returns the number of uploads."""
+    # Unowned cache entries are only a shortcut, and assigning them could
+    # collide with the owner's own entry for the same file.
+    cache_entry_model.objects.filter(owner__isnull=True).delete()
+    job_model.objects.filter(owner__isnull=True).update(owner=owner)
+    return upload_model.objects.filter(owner__isnull=True).update(owner=owner)
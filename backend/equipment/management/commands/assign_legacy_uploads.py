@@ -0,0 +1,32 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from equipment import response_cache
+from equipment.legacy import assign_legacy_uploads, legacy_owner
+from equipment.models import EquipmentUpload, UploadCacheEntry, UploadJob
+
+
+class Command(BaseCommand):
+    help = "Give uploads and jobs created before uploads had owners to a user."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--owner",
+            default=None,
+            help="Username to assign them to (defaults to EQUIPMENT_LEGACY_UPLOAD_OWNER, "
+            "or the only user).",
+        )
+
+    def handle(self, *args, **options):
+        owner = legacy_owner(get_user_model(), options["owner"])
+        if owner is None and options["owner"]:
+            raise CommandError(f"No user named {options['owner']!r}.")
+        if owner is None:
+            raise CommandError(
+                "No owner: pass --owner or set EQUIPMENT_LEGACY_UPLOAD_OWNER to an existing username."
+            )
+
+        assigned = assign_legacy_uploads(owner, EquipmentUpload, UploadJob, UploadCacheEntry)
+        # update() sends no signals, so the owner's cached history is replaced here.
+        response_cache.bump(owner.pk)
+        self.stdout.write(f"Assigned {assigned} upload(s) to {owner.username}.")
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from equipment import response_cache
+from equipment.jobs import run_pending_jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Process upload jobs left queued, or stuck running in a process that died, "
+        "e.g. after a server restart."
+    )
+
+    def handle(self, *args, **options):
+        processed = run_pending_jobs()
+        self.stdout.write(f"Processed {processed} queued upload job(s).")
+        if processed and not response_cache.reaches_other_processes():
+            self.stderr.write(response_cache.UNSHARED_WARNING)
+
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from equipment import response_cache
+from equipment.retention import prune_uploads
+
+
+class Command(BaseCommand):
+    help = "Delete uploads outside the EQUIPMENT_RETENTION policy, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Uploads deleted per transaction (defaults to EQUIPMENT_RETENTION['BATCH_SIZE']).",
+        )
+
+    def handle(self, *args, **options):
+        deleted = prune_uploads(options["batch_size"])
+        self.stdout.write(f"Deleted {deleted} upload(s).")
+        if deleted and not response_cache.reaches_other_processes():
+            self.stderr.write(response_cache.UNSHARED_WARNING)
+
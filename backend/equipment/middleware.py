@@ -0,0 +1,149 @@
+import gzip
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from . import instrumentation
+from .instrumentation import phase
+
+COMPRESSIBLE_TYPES = {"application/json", "text/plain", "text/csv"}
+
+
+class ServerTimingMiddleware:
+    """
+    Time each request, report its phases in a Server-Timing header and
+    record request metrics. Removed from the stack entirely when
+    EQUIPMENT_INSTRUMENTATION is disabled.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not instrumentation.enabled():
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        token = instrumentation.start_request()
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            phases = instrumentation.finish_request(token)
+        return self._finish(request, response, phases, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        token = instrumentation.start_request()
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            phases = instrumentation.finish_request(token)
+        return self._finish(request, response, phases, time.perf_counter() - start)
+
+    def _finish(self, request, response, phases, total):
+        match = request.resolver_match
+        labels = {
+            "view": match.view_name if match else "unmatched",
+            "method": request.method,
+            "status": response.status_code,
+        }
+        instrumentation.REQUEST_SECONDS.observe(total, **labels)
+        instrumentation.REQUESTS_TOTAL.inc(**labels)
+
+        if settings.EQUIPMENT_INSTRUMENTATION.get("SERVER_TIMING", True):
+            response["Server-Timing"] = instrumentation.server_timing(phases, total)
+        return response
+
+
+def _accepted_encodings(header):
+    """Accept-Encoding as {coding: q}."""
+    accepted = {}
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        name, _, value = params.strip().partition("=")
+        if name.strip() == "q":
+            try:
+                q = float(value)
+            except ValueError:
+                q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def negotiate_encoding(header):
+    """The coding to compress with for this Accept-Encoding, or None."""
+    accepted = _accepted_encodings(header)
+    offered = ["zstd", "gzip"] if zstandard is not None else ["gzip"]
+    for coding in offered:
+        if accepted.get(coding, accepted.get("*", 0.0)) > 0:
+            return coding
+    return None
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Compress JSON and text responses with zstd (when the zstandard package
+    is installed and the client accepts it) or gzip. PDFs and ZIPs are left
+    alone, as are streamed and very small responses.
+    """
+
+    def __init__(self, get_response):
+        if not settings.EQUIPMENT_COMPRESSION.get("ENABLED", True):
+            raise MiddlewareNotUsed()
+        super().__init__(get_response)
+
+    def process_response(self, request, response):
+        if response.streaming or response.has_header("Content-Encoding"):
+            return response
+        content_type = response.get("Content-Type", "").split(";")[0].strip()
+        if content_type not in COMPRESSIBLE_TYPES:
+            return response
+
+        config = settings.EQUIPMENT_COMPRESSION
+        if len(response.content) < config.get("MIN_SIZE", 1024):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = negotiate_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding is None:
+            return response
+
+        with phase("compress"):
+            if encoding == "zstd":
+                compressor = zstandard.ZstdCompressor(level=config.get("ZSTD_LEVEL", 3))
+                compressed = compressor.compress(response.content)
+            else:
+                compressed = gzip.compress(
+                    response.content, compresslevel=config.get("GZIP_LEVEL", 6), mtime=0
+                )
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response["Content-Length"] = str(len(compressed))
+        response["Content-Encoding"] = encoding
+        # The bytes differ per encoding, so a strong ETag no longer holds.
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        return response
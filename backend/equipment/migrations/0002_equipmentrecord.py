@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EquipmentRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('equipment_name', models.CharField(blank=True, max_length=255)),
+                ('type', models.CharField(max_length=255)),
+                ('flowrate', models.FloatField()),
+                ('pressure', models.FloatField()),
+                ('temperature', models.FloatField()),
+                ('upload', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='records', to='equipment.equipmentupload')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['upload', 'type'], name='equipment_e_upload__40c753_idx'), models.Index(fields=['equipment_name'], name='equipment_e_equipme_2ea6c2_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0006_equipmentupload_uploaded_at_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipmentupload',
+            name='owner',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='equipment_uploads', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='uploadcacheentry',
+            name='owner',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='uploadjob',
+            name='owner',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='upload_jobs', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='uploadcacheentry',
+            name='content_hash',
+            field=models.CharField(max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='equipmentupload',
+            index=models.Index(fields=['owner', 'uploaded_at'], name='equipment_e_owner_i_a52607_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='uploadcacheentry',
+            constraint=models.UniqueConstraint(fields=('owner', 'content_hash'), name='unique_owner_content_hash'),
+        ),
+    ]
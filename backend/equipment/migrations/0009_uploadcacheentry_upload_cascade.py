@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def delete_orphaned_entries(apps, schema_editor):
+    # Entries whose upload was deleted have nothing left to copy on a hit.
+    UploadCacheEntry = apps.get_model("equipment", "UploadCacheEntry")
+    UploadCacheEntry.objects.filter(upload__isnull=True).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0008_uploadsession'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_orphaned_entries, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='uploadcacheentry',
+            name='upload',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='equipment.equipmentupload'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+import logging
+import os
+
+from django.conf import settings
+from django.db import migrations
+
+logger = logging.getLogger(__name__)
+
+
+# Self-contained, so later changes to equipment.legacy (which the
+# assign_legacy_uploads command uses) cannot change what this migration did.
+def assign_owner(apps, schema_editor):
+    EquipmentUpload = apps.get_model("equipment", "EquipmentUpload")
+    if not EquipmentUpload.objects.filter(owner__isnull=True).exists():
+        return
+
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    username = os.environ.get("EQUIPMENT_LEGACY_UPLOAD_OWNER")
+    if username:
+        owner = User.objects.filter(username=username).first()
+    else:
+        users = list(User.objects.all()[:2])
+        owner = users[0] if len(users) == 1 else None
+
+    if owner is None:
+        # Left for `manage.py assign_legacy_uploads --owner <username>`.
+        logger.warning(
+            "Uploads without an owner were left unassigned: set "
+            "EQUIPMENT_LEGACY_UPLOAD_OWNER or run `manage.py assign_legacy_uploads`."
+        )
+        return
+
+    # Unowned cache entries are only a shortcut, and assigning them could
+    # collide with the owner's own entry for the same file.
+    apps.get_model("equipment", "UploadCacheEntry").objects.filter(owner__isnull=True).delete()
+    apps.get_model("equipment", "UploadJob").objects.filter(owner__isnull=True).update(owner=owner)
+    EquipmentUpload.objects.filter(owner__isnull=True).update(owner=owner)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0009_uploadcacheentry_upload_cascade'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(assign_owner, migrations.RunPython.noop),
+    ]
@@ -1,12 +1,135 @@
+import uuid
+
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 class EquipmentUpload(models.Model):
-    uploaded_at = models.DateTimeField(auto_now_add=True)
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name="equipment_uploads",
+        db_index=False,
+    )
+    uploaded_at = models.DateTimeField(auto_now_add=True, db_index=True)
     total_equipment = models.IntegerField()
     average_flowrate = models.FloatField()
     average_pressure = models.FloatField()
     average_temperature = models.FloatField()
     equipment_type_distribution = models.JSONField()
+    statistics = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["owner", "uploaded_at"]),
+        ]
+
+    def __str__(self):
+        return f"Upload {self.id} at {self.uploaded_at}"
+
+
+class EquipmentRecord(models.Model):
+    upload = models.ForeignKey(
+        EquipmentUpload,
+        on_delete=models.CASCADE,
+        related_name="records",
+        db_index=False,
+    )
+    equipment_name = models.CharField(max_length=255, blank=True)
+    type = models.CharField(max_length=255)
+    flowrate = models.FloatField()
+    pressure = models.FloatField()
+    temperature = models.FloatField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["upload", "type"]),
+            models.Index(fields=["equipment_name"]),
+        ]
+
+    def __str__(self):
+        return f"{self.equipment_name} ({self.type})"
+
+
+class UploadCacheEntry(models.Model):
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name="+",
+        db_index=False,
+    )
+    content_hash = models.CharField(max_length=64)
+    # The upload a hit copies; the entry goes when that upload is deleted.
+    upload = models.ForeignKey(
+        EquipmentUpload,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    summary = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+    hit_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["owner", "content_hash"], name="unique_owner_content_hash"),
+        ]
+
+    def __str__(self):
+        return f"Cached summary {self.content_hash[:12]}"
+
+
+class UploadJob(models.Model):
+    STATE_QUEUED = "queued"
+    STATE_RUNNING = "running"
+    STATE_SUCCEEDED = "succeeded"
+    STATE_FAILED = "failed"
+    STATE_CHOICES = [
+        (STATE_QUEUED, "Queued"),
+        (STATE_RUNNING, "Running"),
+        (STATE_SUCCEEDED, "Succeeded"),
+        (STATE_FAILED, "Failed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name="upload_jobs",
+    )
+    state = models.CharField(max_length=16, choices=STATE_CHOICES, default=STATE_QUEUED, db_index=True)
+    file_name = models.CharField(max_length=255)
+    file_path = models.CharField(max_length=500)
+    file_size = models.BigIntegerField()
+    progress = models.FloatField(default=0.0)
+    rows_processed = models.BigIntegerField(default=0)
+    summary = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Job {self.id} ({self.state})"
+
+
+class UploadSession(models.Model):
+    """A resumable upload: chunks are appended at ``offset`` until ``size`` bytes have arrived."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="upload_sessions",
+    )
+    file_name = models.CharField(max_length=255)
+    file_path = models.CharField(max_length=500)
+    size = models.BigIntegerField()
+    offset = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
-        return f"Upload {self.id} at {self.uploaded_at}"
\ No newline at end of file
+        return f"Upload session {self.id} ({self.offset}/{self.size})"
@@ -0,0 +1,60 @@
+import base64
+import hashlib
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+def encode_cursor(uploaded_at, upload_id):
+    raw = f"{uploaded_at.isoformat()}|{upload_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        uploaded_at, upload_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        parsed = parse_datetime(uploaded_at)
+        if parsed is None:
+            raise ValueError(uploaded_at)
+        return parsed, int(upload_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def keyset_page(queryset, cursor, page_size):
+    """
+    Return ([(id, uploaded_at), ...], next_cursor) for one page of uploads,
+    newest first. Only the indexed key columns are read, so the cost of a
+    page does not depend on how many rows come before it.
+    """
+    queryset = queryset.order_by("-uploaded_at", "-id")
+
+    if cursor:
+        uploaded_at, upload_id = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(uploaded_at__lt=uploaded_at) | Q(uploaded_at=uploaded_at, id__lt=upload_id)
+        )
+
+    keys = list(queryset.values_list("id", "uploaded_at")[:page_size + 1])
+
+    next_cursor = None
+    if len(keys) > page_size:
+        keys = keys[:page_size]
+        upload_id, uploaded_at = keys[-1]
+        next_cursor = encode_cursor(uploaded_at, upload_id)
+
+    return keys, next_cursor
+
+
+# Changed whenever history items change shape, so that neither clients nor
+# the response cache reuse a page in the old format.
+PAGE_FORMAT = 2
+
+
+def page_etag(keys, next_cursor):
+    digest = hashlib.sha1(f"v{PAGE_FORMAT};".encode())
+    for upload_id, uploaded_at in keys:
+        digest.update(f"{upload_id}:{uploaded_at.isoformat()};".encode())
+    digest.update((next_cursor or "").encode())
+    return f'"{digest.hexdigest()}"'
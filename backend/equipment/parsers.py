@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from rest_framework.exceptions import ParseError, UnsupportedMediaType
+from rest_framework.parsers import BaseParser, DataAndFiles
+
+# Content-Encoding -> file name suffix; ingestion detects the compression
+# from the file contents, the suffix just keeps names meaningful.
+ENCODING_SUFFIXES = {
+    "": ".csv",
+    "identity": ".csv",
+    "gzip": ".csv.gz",
+    "x-gzip": ".csv.gz",
+    "zstd": ".csv.zst",
+}
+
+READ_BLOCK_SIZE = 64 * 1024
+
+
+def read_csv_body(stream, meta):
+    """
+    Spool a raw CSV request body to a temporary uploaded file, still
+    compressed if the request declared a Content-Encoding.
+    """
+    encoding = meta.get("HTTP_CONTENT_ENCODING", "").strip().lower()
+    suffix = ENCODING_SUFFIXES.get(encoding)
+    if suffix is None:
+        raise UnsupportedMediaType(
+            encoding, detail=f"Unsupported Content-Encoding: {encoding}"
+        )
+
+    max_size = settings.EQUIPMENT_UPLOAD_MAX_SIZE
+    upload = TemporaryUploadedFile(f"upload{suffix}", "text/csv", 0, None)
+    size = 0
+    while True:
+        block = stream.read(READ_BLOCK_SIZE)
+        if not block:
+            break
+        size += len(block)
+        if size > max_size:
+            upload.close()
+            raise ParseError(f"File size cannot exceed {max_size // (1024 * 1024)}MB")
+        upload.write(block)
+
+    upload.size = size
+    upload.seek(0)
+    return upload
+
+
+class CSVBodyParser(BaseParser):
+    """
+    A raw CSV request body (Content-Type: text/csv, optionally with
+    Content-Encoding: gzip or zstd), presented as the "file" of a
+    multipart upload.
+    """
+
+    media_type = "text/csv"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        request = parser_context["request"]
+        return DataAndFiles({}, {"file": read_csv_body(stream, request.META)})
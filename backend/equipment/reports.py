@@ -0,0 +1,370 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from reportlab.graphics.charts.barcharts import HorizontalBarChart, VerticalBarChart
+from reportlab.graphics.shapes import Drawing
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import (
+    KeepTogether,
+    PageBreak,
+    Paragraph,
+    SimpleDocTemplate,
+    Spacer,
+    Table,
+    TableStyle,
+)
+
+from . import instrumentation
+from .stats import METRIC_KEYS, MetricStatistics, Moments
+
+# Bump whenever the report layout changes so cached PDFs are re-rendered.
+REPORT_TEMPLATE_VERSION = 2
+
+# Per-type rows are split into tables of this many rows so that ReportLab
+# lays out (and keeps in memory) one bounded table at a time.
+TABLE_CHUNK_ROWS = 200
+
+CHART_TOP_TYPES = 25
+
+HISTOGRAM_MAX_BARS = 40
+
+TABLE_STYLE = TableStyle(
+    [
+        ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+        ("GRID", (0, 0), (-1, -1), 1, colors.black),
+        ("FONT", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("ALIGN", (1, 1), (-1, -1), "CENTER"),
+    ]
+)
+
+_executor = None
+_executor_lock = threading.Lock()
+_rendering = {}
+_rendering_lock = threading.Lock()
+
+
+class ReportRenderError(Exception):
+    pass
+
+
+def report_path(upload_id):
+    return Path(settings.EQUIPMENT_REPORT_DIR) / f"upload-{upload_id}-v{REPORT_TEMPLATE_VERSION}.pdf"
+
+
+def report_etag(upload_id):
+    return f'"report-{upload_id}-v{REPORT_TEMPLATE_VERSION}"'
+
+
+def report_payload(upload):
+    """Everything the renderer needs, as plain data that can be sent to a worker process."""
+    statistics = upload.statistics or {}
+    type_statistics = statistics.get("types", {})
+
+    types = []
+    for type_name, count in upload.equipment_type_distribution.items():
+        metrics = type_statistics.get(type_name, {})
+        means = [
+            Moments.from_dict(metrics[key]).mean if key in metrics else None
+            for key in METRIC_KEYS.values()
+        ]
+        types.append([type_name, count, *means])
+
+    return {
+        "uploaded_at": upload.uploaded_at.strftime("%d %b %Y, %I:%M %p UTC"),
+        "total_equipment": upload.total_equipment,
+        "average_flowrate": upload.average_flowrate,
+        "average_pressure": upload.average_pressure,
+        "average_temperature": upload.average_temperature,
+        "types": types,
+        "metrics": {
+            key: MetricStatistics.from_dict(metric).describe()
+            for key, metric in statistics.get("metrics", {}).items()
+        },
+    }
+
+
+def _format(value):
+    return "-" if value is None else f"{value:.2f}"
+
+
+def _distribution_chart(types):
+    top = types[:CHART_TOP_TYPES]
+    # Largest bar at the top of the chart.
+    names = [row[0] for row in reversed(top)]
+    counts = [row[1] for row in reversed(top)]
+
+    bar_height = 14
+    drawing = Drawing(6.5 * inch, bar_height * len(top) + 40)
+    chart = HorizontalBarChart()
+    chart.x = 1.8 * inch
+    chart.y = 20
+    chart.width = 4.4 * inch
+    chart.height = bar_height * len(top)
+    chart.data = [counts]
+    chart.categoryAxis.categoryNames = [name[:28] for name in names]
+    chart.categoryAxis.labels.fontSize = 7
+    chart.valueAxis.valueMin = 0
+    chart.valueAxis.labels.fontSize = 7
+    chart.bars[0].fillColor = colors.HexColor("#4e79a7")
+    drawing.add(chart)
+    return drawing
+
+
+def _histogram_chart(histogram):
+    bins = histogram["bins"]
+    # Merge neighbouring bins so wide ranges still fit on the page.
+    group = max(1, -(-len(bins) // HISTOGRAM_MAX_BARS))
+    labels, counts = [], []
+    for start in range(0, len(bins), group):
+        members = bins[start:start + group]
+        labels.append(f"{members[0]['start']:g}")
+        counts.append(sum(member["count"] for member in members))
+
+    drawing = Drawing(6.5 * inch, 2.2 * inch)
+    chart = VerticalBarChart()
+    chart.x = 0.6 * inch
+    chart.y = 0.4 * inch
+    chart.width = 5.6 * inch
+    chart.height = 1.6 * inch
+    chart.data = [counts]
+    chart.categoryAxis.categoryNames = labels
+    chart.categoryAxis.labels.fontSize = 6
+    chart.categoryAxis.labels.angle = 45
+    chart.categoryAxis.labels.boxAnchor = "ne"
+    chart.valueAxis.valueMin = 0
+    chart.valueAxis.labels.fontSize = 7
+    chart.barSpacing = 0
+    chart.bars[0].fillColor = colors.HexColor("#59a14f")
+    drawing.add(chart)
+    return drawing
+
+
+def _build_story(payload):
+    styles = getSampleStyleSheet()
+    story = [
+        Paragraph("Chemical Equipment Report", styles["Title"]),
+        Paragraph(f"Uploaded At: {payload['uploaded_at']}", styles["Normal"]),
+        Paragraph(f"Total Equipment: {payload['total_equipment']}", styles["Normal"]),
+        Paragraph(f"Average Flowrate: {payload['average_flowrate']:.2f}", styles["Normal"]),
+        Paragraph(f"Average Pressure: {payload['average_pressure']:.2f}", styles["Normal"]),
+        Paragraph(f"Average Temperature: {payload['average_temperature']:.2f}", styles["Normal"]),
+        Spacer(1, 0.3 * inch),
+    ]
+
+    types = payload["types"]
+    story.append(Paragraph("Equipment Type Distribution", styles["Heading2"]))
+    if len(types) > CHART_TOP_TYPES:
+        story.append(
+            Paragraph(
+                f"Showing the {CHART_TOP_TYPES} most common of {len(types)} equipment types.",
+                styles["Italic"],
+            )
+        )
+    if types:
+        story.append(_distribution_chart(types))
+    else:
+        # Every row had a blank Type.
+        story.append(Paragraph("No equipment types recorded.", styles["Normal"]))
+
+    metrics = payload["metrics"]
+    if metrics:
+        story.append(Paragraph("Metric Statistics", styles["Heading2"]))
+        table_data = [["Metric", "Mean", "Std Dev", "Min", "P50", "P90", "P99", "Max"]]
+        for column, key in METRIC_KEYS.items():
+            if key not in metrics:
+                continue
+            metric = metrics[key]
+            table_data.append(
+                [column]
+                + [_format(metric[field]) for field in ("mean", "stddev", "min", "p50", "p90", "p99", "max")]
+            )
+        table = Table(table_data)
+        table.setStyle(TABLE_STYLE)
+        story.append(table)
+
+        for column, key in METRIC_KEYS.items():
+            histogram = metrics.get(key, {}).get("histogram")
+            if histogram and histogram["bins"]:
+                story.append(
+                    KeepTogether(
+                        [Paragraph(f"{column} Histogram", styles["Heading3"]), _histogram_chart(histogram)]
+                    )
+                )
+
+    if not types:
+        return story
+
+    story.append(PageBreak())
+    story.append(Paragraph("Equipment Types", styles["Heading2"]))
+    header = ["Equipment Type", "Count", "Avg Flowrate", "Avg Pressure", "Avg Temperature"]
+    for start in range(0, len(types), TABLE_CHUNK_ROWS):
+        table_data = [header]
+        for type_name, count, *means in types[start:start + TABLE_CHUNK_ROWS]:
+            table_data.append([Paragraph(escape(type_name), styles["BodyText"]), str(count), *map(_format, means)])
+        table = Table(
+            table_data,
+            colWidths=[2.3 * inch, 0.8 * inch, 1.1 * inch, 1.1 * inch, 1.2 * inch],
+            repeatRows=1,
+        )
+        table.setStyle(TABLE_STYLE)
+        story.append(table)
+
+    return story
+
+
+def render_report(payload, output):
+    doc = SimpleDocTemplate(output, pagesize=A4, title="Chemical Equipment Report")
+    doc.build(_build_story(payload))
+
+
+def _write_report(payload, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".pdf.tmp")
+    try:
+        with os.fdopen(fd, "wb") as output:
+            render_report(payload, output)
+        # Concurrent renders of the same report each write their own temp
+        # file; the rename makes whichever finishes last visible atomically.
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return str(path)
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.EQUIPMENT_REPORT_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def _reset_executor():
+    global _executor
+    with _executor_lock:
+        _executor = None
+
+
+def _submit(upload, path):
+    key = str(path)
+    with _rendering_lock:
+        future = _rendering.get(key)
+        if future is None:
+            future = get_executor().submit(_write_report, report_payload(upload), key)
+            _rendering[key] = future
+            future.add_done_callback(lambda _: _rendering.pop(key, None))
+        return future
+
+
+def request_report(upload):
+    """Future resolving to the path of the cached PDF, rendering it if missing."""
+    path = report_path(upload.pk)
+    if path.exists():
+        future = Future()
+        future.set_result(str(path))
+        return future
+    return _submit(upload, path)
+
+
+def wait_for_report(future, timeout=None):
+    """
+    Open the PDF produced by ``future`` (see request_report). Returns None if
+    the render is still running after ``timeout`` seconds; it keeps going and
+    a later request will find the file.
+    """
+    try:
+        path = future.result(timeout=timeout)
+    except TimeoutError:
+        return None
+    except BrokenProcessPool:
+        _reset_executor()
+        raise ReportRenderError("Report worker process terminated")
+    except Exception as e:
+        raise ReportRenderError(f"Failed to render report: {str(e)}")
+    return open(path, "rb")
+
+
+def open_report(upload, timeout=None):
+    try:
+        report = open(report_path(upload.pk), "rb")
+    except FileNotFoundError:
+        instrumentation.increment(instrumentation.REPORT_RENDERS_TOTAL, result="miss")
+        return wait_for_report(request_report(upload), timeout)
+    instrumentation.increment(instrumentation.REPORT_RENDERS_TOTAL, result="hit")
+    return report
+
+
+def report_filename(upload):
+    return f"equipment_report_{upload.pk}_{upload.uploaded_at:%Y%m%d_%H%M%S}.pdf"
+
+
+class _StreamBuffer:
+    """Write-only, unseekable sink; ZipFile falls back to data descriptors."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def stream_report_archive(reports, block_size=64 * 1024):
+    """
+    Yield a ZIP archive of ``reports`` ((filename, future) pairs from
+    request_report) in order, as each render completes. Only one block of
+    one PDF is held in memory at a time.
+    """
+    buffer = _StreamBuffer()
+    errors = []
+
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_STORED) as archive:
+        for filename, future in reports:
+            try:
+                report = wait_for_report(future)
+            except ReportRenderError as e:
+                errors.append(f"{filename}: {e}")
+                continue
+
+            with report, archive.open(filename, "w", force_zip64=True) as entry:
+                while True:
+                    block = report.read(block_size)
+                    if not block:
+                        break
+                    entry.write(block)
+                    yield buffer.drain()
+            yield buffer.drain()
+
+        if errors:
+            archive.writestr("errors.txt", "\n".join(errors) + "\n")
+
+    yield buffer.drain()
+
+
+def discard_reports(upload_id):
+    for path in Path(settings.EQUIPMENT_REPORT_DIR).glob(f"upload-{upload_id}-v*.pdf"):
+        path.unlink(missing_ok=True)
@@ -0,0 +1,111 @@
+"""
+Versioned cache of per-user response payloads (history pages, aggregates,
+upload statistics).
+
+Every key embeds the owner's current cache version, and the version is
+replaced after any upload of theirs is saved or deleted (see signals.py),
+so entries written before a change are never read again and simply age
+out. A warm read costs two cache lookups and no database query.
+
+Versions live in the same cache as the payloads. Each bump stores a new
+random version instead of incrementing the old one: incr() is a
+read-modify-write on the file backend, so two concurrent increments could
+both store the same value and one invalidation would be lost, whereas
+whichever of two concurrent sets lands last still leaves a version no
+earlier entry was stored under. A version
+evicted from the cache likewise comes back as a fresh value.
+
+Invalidation reaches only processes that share the cache. Batch uploads
+are written by worker processes, so batch.ingest_files bumps again in the
+requesting process. With the local-memory backend a separate process such
+as manage.py prune_uploads cannot reach the server's cache at all, and
+those commands warn about it.
+"""
+
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+from . import instrumentation
+
+
+def _config():
+    return settings.EQUIPMENT_RESPONSE_CACHE
+
+
+def enabled():
+    return _config().get("ENABLED", True)
+
+
+def _cache():
+    return caches[_config().get("ALIAS", "default")]
+
+
+UNSHARED_WARNING = (
+    "The response cache is process-local (EQUIPMENT_RESPONSE_CACHE_BACKEND=locmem), so "
+    "running servers keep serving their cached history and aggregates until they restart "
+    "or the entries expire."
+)
+
+
+def reaches_other_processes():
+    """Whether a bump here is seen by the server processes (always, when caching is off)."""
+    return not enabled() or not isinstance(_cache(), LocMemCache)
+
+
+def _new_version():
+    return uuid.uuid4().hex
+
+
+def _version_key(owner_id):
+    return f"equipment:version:{owner_id}"
+
+
+def _entry_key(kind, owner_id, version, parts):
+    digest = hashlib.sha256(repr(parts).encode()).hexdigest()[:32]
+    return f"equipment:{kind}:{owner_id}:{version}:{digest}"
+
+
+def _count(kind, hit):
+    instrumentation.increment(
+        instrumentation.RESPONSE_CACHE_TOTAL, kind=kind, result="hit" if hit else "miss"
+    )
+
+
+def version(owner_id):
+    cache = _cache()
+    key = _version_key(owner_id)
+    current = cache.get(key)
+    if current is None:
+        cache.add(key, _new_version(), timeout=None)
+        current = cache.get(key)
+    return current
+
+
+def bump(owner_id):
+    """Invalidate every cached payload of ``owner_id``."""
+    if not enabled():
+        return
+    _cache().set(_version_key(owner_id), _new_version(), timeout=None)
+
+
+def lookup(kind, owner_id, *parts):
+    """
+    Return ``(key, payload)`` for the ``kind`` payload identified by
+    ``parts``; payload is None on a miss, and key is None when caching is
+    disabled. Pass the key to store() after computing the payload.
+    """
+    if not enabled():
+        return None, None
+    key = _entry_key(kind, owner_id, version(owner_id), parts)
+    payload = _cache().get(key)
+    _count(kind, payload is not None)
+    return key, payload
+
+
+def store(key, payload):
+    if key is not None:
+        _cache().set(key, payload, timeout=_config().get("TIMEOUT"))
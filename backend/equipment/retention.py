@@ -0,0 +1,102 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import EquipmentUpload
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="upload-retention")
+_lock = threading.Lock()
+_pending_owners = set()
+
+
+def _config():
+    return settings.EQUIPMENT_RETENTION
+
+
+def _delete_in_batches(uploads, batch_size):
+    deleted = 0
+    while True:
+        ids = list(uploads.values_list("id", flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        # QuerySet.delete() collects related rows first and then writes in
+        # its own transaction; wrapping it in another would hold a read lock
+        # that SQLite cannot upgrade while an upload is being written.
+        EquipmentUpload.objects.filter(id__in=ids).delete()
+        deleted += len(ids)
+
+
+def expired_uploads():
+    max_age_days = _config().get("MAX_AGE_DAYS")
+    if max_age_days is None:
+        return EquipmentUpload.objects.none()
+    cutoff = timezone.now() - timedelta(days=max_age_days)
+    return EquipmentUpload.objects.filter(uploaded_at__lt=cutoff)
+
+
+def surplus_uploads(owner_id):
+    keep_latest = _config().get("KEEP_LATEST")
+    if keep_latest is None:
+        return EquipmentUpload.objects.none()
+
+    owned = EquipmentUpload.objects.filter(owner_id=owner_id)
+    boundary = (
+        owned.order_by("-uploaded_at", "-id")
+        .values_list("uploaded_at", "id")[keep_latest:keep_latest + 1]
+        .first()
+    )
+    if boundary is None:
+        return EquipmentUpload.objects.none()
+
+    uploaded_at, upload_id = boundary
+    return owned.filter(
+        Q(uploaded_at__lt=uploaded_at) | Q(uploaded_at=uploaded_at, id__lte=upload_id)
+    )
+
+
+def prune_uploads(batch_size=None, owner_ids=None):
+    """
+    Apply the retention policy. KEEP_LATEST applies per owner; with no
+    ``owner_ids`` every owner is checked.
+    """
+    batch_size = batch_size or _config().get("BATCH_SIZE", 500)
+    if owner_ids is None:
+        owner_ids = EquipmentUpload.objects.values_list("owner_id", flat=True).distinct()
+
+    deleted = _delete_in_batches(expired_uploads(), batch_size)
+    for owner_id in list(owner_ids):
+        deleted += _delete_in_batches(surplus_uploads(owner_id), batch_size)
+    return deleted
+
+
+def _run_scheduled_prune():
+    with _lock:
+        owner_ids = set(_pending_owners)
+        _pending_owners.clear()
+
+    try:
+        prune_uploads(owner_ids=owner_ids)
+    except Exception:
+        logger.exception("Background upload pruning failed")
+    finally:
+        close_old_connections()
+
+
+def schedule_prune(owner_id):
+    """Queue a background prune for ``owner_id``; pending requests are merged."""
+    if not _config().get("AUTO_PRUNE", True):
+        return
+
+    with _lock:
+        already_scheduled = bool(_pending_owners)
+        _pending_owners.add(owner_id)
+    if not already_scheduled:
+        _executor.submit(_run_scheduled_prune)
@@ -1,19 +1,146 @@
+import math
+
+from django.conf import settings
 from rest_framework import serializers
 
+from .stats import METRIC_KEYS, UploadStatistics
+
+# Compressed files are decompressed while they are parsed.
+CSV_EXTENSIONS = (".csv", ".csv.gz", ".csv.zst")
+
 class CSVUploadSerializer(serializers.Serializer):
     file = serializers.FileField()
     
     def validate_file(self, value):
-        max_size = 10 * 1024 * 1024
+        max_size = settings.EQUIPMENT_UPLOAD_MAX_SIZE
         
         if value.size > max_size:
             raise serializers.ValidationError(
-                "File size cannot exceed 10MB"
+                f"File size cannot exceed {max_size // (1024 * 1024)}MB"
             )
         
-        if not value.name.endswith('.csv'):
+        if not value.name.endswith(CSV_EXTENSIONS):
             raise serializers.ValidationError(
-                "Only CSV files are allowed"
+                "Only CSV files (.csv, .csv.gz, .csv.zst) are allowed"
             )
         
         return value
+
+
+
+class UploadSessionSerializer(serializers.Serializer):
+    file_name = serializers.CharField(max_length=255)
+    size = serializers.IntegerField(min_value=1)
+
+    def validate_file_name(self, value):
+        if not value.endswith(CSV_EXTENSIONS):
+            raise serializers.ValidationError(
+                "Only CSV files (.csv, .csv.gz, .csv.zst) are allowed"
+            )
+        return value
+
+    def validate_size(self, value):
+        max_size = settings.EQUIPMENT_UPLOAD_MAX_SIZE
+        if value > max_size:
+            raise serializers.ValidationError(
+                f"File size cannot exceed {max_size // (1024 * 1024)}MB"
+            )
+        return value
+
+
+class SummaryUploadSerializer(serializers.Serializer):
+    """
+    A summary computed by the client from its own CSV file, with optional
+    per-metric and per-type moments in the UploadStatistics format. The
+    parts must agree with each other; they are not checked against rows.
+    Sketches and histograms depend on server configuration, so they must
+    be null.
+    """
+
+    total_equipment = serializers.IntegerField(min_value=1)
+    average_flowrate = serializers.FloatField()
+    average_pressure = serializers.FloatField()
+    average_temperature = serializers.FloatField()
+    equipment_type_distribution = serializers.DictField(
+        child=serializers.IntegerField(min_value=1), allow_empty=True
+    )
+    statistics = serializers.JSONField(required=False)
+
+    def validate_equipment_type_distribution(self, value):
+        if any(len(type_name) > 255 for type_name in value):
+            raise serializers.ValidationError("Equipment types cannot exceed 255 characters")
+        return value
+
+    def validate_statistics(self, value):
+        try:
+            metrics = [
+                *value.get("metrics", {}).values(),
+                *(metric for type_metrics in value.get("types", {}).values()
+                  for metric in type_metrics.values()),
+            ]
+            if any(
+                metric.get("sketch") is not None or metric.get("histogram") is not None
+                for metric in metrics
+            ):
+                raise serializers.ValidationError("Invalid statistics")
+            statistics = UploadStatistics.from_dict(value)
+        except (AttributeError, KeyError, TypeError, ValueError):
+            raise serializers.ValidationError("Invalid statistics")
+
+        if set(statistics.metrics) != set(METRIC_KEYS.values()):
+            raise serializers.ValidationError("Invalid statistics")
+        for metrics in [statistics.metrics, *statistics.types.values()]:
+            if set(metrics) != set(METRIC_KEYS.values()):
+                raise serializers.ValidationError("Invalid statistics")
+            for metric in metrics.values():
+                moments = metric.moments
+                if not (
+                    isinstance(moments.count, int)
+                    and moments.count > 0
+                    and all(
+                        isinstance(number, (int, float)) and math.isfinite(number)
+                        for number in (moments.total, moments.m2, moments.minimum, moments.maximum)
+                    )
+                    and moments.m2 >= 0
+                    and moments.minimum <= moments.maximum
+                ):
+                    raise serializers.ValidationError("Invalid statistics")
+        return statistics
+
+    def validate(self, data):
+        total = data["total_equipment"]
+        distribution = data["equipment_type_distribution"]
+        # As with /upload/, rows with a blank Type count towards the total
+        # but not towards any type.
+        if sum(distribution.values()) > total:
+            raise serializers.ValidationError(
+                "equipment_type_distribution cannot exceed total_equipment"
+            )
+
+        statistics = data.get("statistics")
+        if statistics is None:
+            return data
+
+        for key, metric in statistics.metrics.items():
+            moments = metric.moments
+            if moments.count != total or not math.isclose(
+                moments.mean, data[f"average_{key}"], rel_tol=1e-9, abs_tol=1e-9
+            ):
+                raise serializers.ValidationError("statistics do not match the summary")
+
+        if set(statistics.types) != set(distribution) or any(
+            metrics[key].moments.count != distribution[type_name]
+            for type_name, metrics in statistics.types.items()
+            for key in metrics
+        ):
+            raise serializers.ValidationError("statistics do not match equipment_type_distribution")
+
+        return data
+
+
+class BatchUploadSerializer(serializers.Serializer):
+    files = serializers.ListField(
+        child=serializers.FileField(),
+        allow_empty=False,
+        max_length=settings.EQUIPMENT_BATCH_MAX_FILES,
+    )
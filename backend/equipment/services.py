@@ -0,0 +1,139 @@
+import pickle
+import tempfile
+from collections import Counter
+
+from django.db import transaction
+
+from . import upload_cache
+from .instrumentation import phase
+from .bulk import copy_records, insert_records
+from .ingest import PARSED_COLUMNS, accumulate_csv
+from .models import EquipmentUpload
+from .stats import UploadStatistics
+
+
+def _spooled_chunks(spool):
+    spool.seek(0)
+    while True:
+        try:
+            yield pickle.load(spool)
+        except EOFError:
+            return
+
+
+def create_upload(csv_file, owner_id, on_progress=None):
+    # The file is parsed, validated and aggregated before the transaction
+    # opens: an invalid file writes nothing, on_progress reports are visible
+    # to other connections, and SQLite's write lock is held only while the
+    # validated rows are inserted.
+    rows_done = 0
+
+    with tempfile.TemporaryFile() as spool:
+        def on_chunk(chunk):
+            nonlocal rows_done
+            with phase("spool"):
+                columns = [column for column in chunk.columns if column in PARSED_COLUMNS]
+                pickle.dump(chunk[columns], spool, protocol=pickle.HIGHEST_PROTOCOL)
+            rows_done += len(chunk)
+            if on_progress is not None:
+                on_progress(rows_done)
+
+        accumulator = accumulate_csv(csv_file, on_chunk=on_chunk)
+        summary = accumulator.summary()
+
+        with transaction.atomic():
+            with phase("write"):
+                upload = EquipmentUpload.objects.create(
+                    owner_id=owner_id,
+                    statistics=accumulator.statistics.to_dict(),
+                    **summary,
+                )
+                for chunk in _spooled_chunks(spool):
+                    insert_records(upload.pk, chunk)
+
+    return upload, summary
+
+
+class _SourceDeleted(Exception):
+    pass
+
+
+def copy_upload(source, summary, owner_id):
+    """
+    A new upload with the summary, statistics and records of ``source``,
+    or None if ``source`` was deleted before its records were copied.
+    """
+    try:
+        with transaction.atomic(), phase("copy"):
+            upload = EquipmentUpload.objects.create(
+                owner_id=owner_id,
+                statistics=source.statistics,
+                **summary,
+            )
+            if copy_records(source.pk, upload.pk) != summary["total_equipment"]:
+                raise _SourceDeleted()
+    except _SourceDeleted:
+        return None
+    return upload
+
+
+def ingest_upload(csv_file, owner_id, on_progress=None):
+    if not upload_cache.enabled():
+        return create_upload(csv_file, owner_id, on_progress)[1]
+
+    with phase("hash"):
+        content_hash = upload_cache.hash_file(csv_file)
+    with phase("cache_lookup"):
+        entry = upload_cache.lookup(owner_id, content_hash)
+    if entry is not None:
+        # Only the parse is skipped: the upload is recorded again, so it
+        # appears in history, reports and aggregates like any other.
+        upload = copy_upload(entry.upload, entry.summary, owner_id)
+        if upload is not None:
+            upload_cache.attach(entry, upload)
+            return entry.summary
+
+    upload, summary = create_upload(csv_file, owner_id, on_progress)
+    upload_cache.store(owner_id, content_hash, upload, summary)
+    return summary
+
+
+def create_summary_upload(summary, statistics, owner_id):
+    """Record an upload from a client-computed summary; it has no equipment records."""
+    summary = {
+        **summary,
+        "equipment_type_distribution": dict(
+            Counter(summary["equipment_type_distribution"]).most_common()
+        ),
+    }
+    with phase("write"):
+        EquipmentUpload.objects.create(
+            owner_id=owner_id,
+            statistics=statistics.to_dict() if statistics is not None else {},
+            **summary,
+        )
+    return summary
+
+
+def aggregate_uploads(uploads):
+    combined = UploadStatistics()
+    included = []
+    skipped = []
+
+    for upload_id, statistics in uploads.order_by("id").values_list("id", "statistics"):
+        if not statistics:
+            # Uploads created before statistics were recorded.
+            skipped.append(upload_id)
+            continue
+        combined.merge(UploadStatistics.from_dict(statistics))
+        included.append(upload_id)
+
+    if not included:
+        return None
+
+    return {
+        "uploads": included,
+        "skipped_uploads": skipped,
+        "total_equipment": combined.metrics["flowrate"].moments.count,
+        **combined.describe(),
+    }
@@ -0,0 +1,45 @@
+import os
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from . import authentication, response_cache
+from .models import EquipmentUpload, UploadSession
+from .reports import discard_reports
+
+
+@receiver(post_delete, sender=EquipmentUpload)
+def remove_cached_reports(sender, instance, **kwargs):
+    discard_reports(instance.pk)
+
+
+@receiver(post_save, sender=EquipmentUpload)
+@receiver(post_delete, sender=EquipmentUpload)
+def invalidate_cached_responses(sender, instance, **kwargs):
+    # After commit, so a concurrent read can't cache the old rows under the
+    # new version.
+    owner_id = instance.owner_id
+    transaction.on_commit(lambda: response_cache.bump(owner_id))
+
+
+@receiver(post_delete, sender=UploadSession)
+def remove_session_file(sender, instance, **kwargs):
+    try:
+        os.remove(instance.file_path)
+    except OSError:
+        pass
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    authentication.invalidate(instance.key)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_user_tokens(sender, instance, **kwargs):
+    # Covers deactivation and password changes as well as deletion.
+    authentication.invalidate_user(instance.pk)
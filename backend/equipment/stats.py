@@ -0,0 +1,470 @@
+import copy
+import math
+
+import numpy as np
+import pandas as pd
+
+METRIC_KEYS = {
+    "Flowrate": "flowrate",
+    "Pressure": "pressure",
+    "Temperature": "temperature",
+}
+
+DEFAULT_SKETCH_ACCURACY = 0.01
+DEFAULT_SKETCH_MAX_BINS = 512
+DEFAULT_HISTOGRAM_MAX_BINS = 128
+DEFAULT_BIN_WIDTHS = {
+    "flowrate": 25.0,
+    "pressure": 2.5,
+    "temperature": 10.0,
+}
+REPORTED_QUANTILES = {"p50": 0.5, "p90": 0.9, "p99": 0.99}
+
+
+class Moments:
+    """
+    Count, sum, M2 (sum of squared deviations from the mean), min and max.
+
+    Two Moments can be merged exactly (Chan et al.), so statistics for any set
+    of chunks or uploads can be combined without the underlying rows.
+    """
+
+    __slots__ = ("count", "total", "m2", "minimum", "maximum")
+
+    def __init__(self, count=0, total=0.0, m2=0.0, minimum=None, maximum=None):
+        self.count = count
+        self.total = total
+        self.m2 = m2
+        self.minimum = minimum
+        self.maximum = maximum
+
+    @classmethod
+    def from_values(cls, values):
+        count = len(values)
+        if count == 0:
+            return cls()
+        total = float(values.sum())
+        mean = total / count
+        return cls(
+            count=count,
+            total=total,
+            m2=float(((values - mean) ** 2).sum()),
+            minimum=float(values.min()),
+            maximum=float(values.max()),
+        )
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["count"], data["sum"], data["m2"], data["min"], data["max"])
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "m2": self.m2,
+            "min": self.minimum,
+            "max": self.maximum,
+        }
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.total, self.m2 = other.count, other.total, other.m2
+            self.minimum, self.maximum = other.minimum, other.maximum
+            return self
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.total += other.total
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        return self
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    @property
+    def variance(self):
+        # Sample variance, matching pandas' default ddof=1.
+        return self.m2 / (self.count - 1) if self.count > 1 else None
+
+    def describe(self):
+        variance = self.variance
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "variance": variance,
+            "stddev": math.sqrt(variance) if variance is not None else None,
+            "min": self.minimum,
+            "max": self.maximum,
+        }
+
+
+class QuantileSketch:
+    """
+    Log-bucketed quantile sketch with a relative accuracy guarantee (DDSketch).
+
+    Values are counted in buckets whose bounds grow geometrically by gamma, so
+    any quantile is returned within ``accuracy`` of the true value. Sketches
+    with the same accuracy merge by adding bucket counts.
+    """
+
+    def __init__(self, accuracy=DEFAULT_SKETCH_ACCURACY, max_bins=DEFAULT_SKETCH_MAX_BINS):
+        self.accuracy = accuracy
+        self.max_bins = max_bins
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.positive = {}
+        self.negative = {}
+        self.zero = 0
+
+    def bucket_keys(self, values):
+        """Return (sign, key) arrays for ``values``; zeros get sign 0."""
+        magnitudes = np.abs(values)
+        keys = np.zeros(len(values), dtype=np.int64)
+        nonzero = magnitudes > 0
+        keys[nonzero] = np.ceil(np.log(magnitudes[nonzero]) / math.log(self.gamma))
+        return np.sign(values).astype(np.int8), keys
+
+    def add_bucket(self, sign, key, count):
+        if sign > 0:
+            self.positive[key] = self.positive.get(key, 0) + count
+        elif sign < 0:
+            self.negative[key] = self.negative.get(key, 0) + count
+        else:
+            self.zero += count
+
+    def add(self, values):
+        signs, keys = self.bucket_keys(values)
+        pairs, counts = np.unique(np.stack([signs, keys]), axis=1, return_counts=True)
+        for (sign, key), count in zip(pairs.T.tolist(), counts.tolist()):
+            self.add_bucket(sign, key, count)
+        self._collapse()
+
+    def merge(self, other):
+        if other.accuracy != self.accuracy:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        for key, count in other.positive.items():
+            self.positive[key] = self.positive.get(key, 0) + count
+        for key, count in other.negative.items():
+            self.negative[key] = self.negative.get(key, 0) + count
+        self.zero += other.zero
+        self._collapse()
+        return self
+
+    def _collapse(self):
+        # Fold the lowest values together so the sketch stays bounded; the
+        # upper quantiles we report keep their accuracy. Keys are magnitudes,
+        # so the lowest values are the smallest positive keys but the largest
+        # negative ones.
+        for store, lowest_first in ((self.positive, False), (self.negative, True)):
+            if len(store) > self.max_bins:
+                keys = sorted(store, reverse=lowest_first)
+                excess = len(keys) - self.max_bins
+                store[keys[excess]] += sum(store.pop(key) for key in keys[:excess])
+
+    @property
+    def count(self):
+        return sum(self.positive.values()) + sum(self.negative.values()) + self.zero
+
+    def _bucket_value(self, key):
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def quantile(self, q):
+        total = self.count
+        if total == 0:
+            return None
+
+        rank = q * (total - 1)
+        seen = 0
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._bucket_value(key)
+        seen += self.zero
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._bucket_value(key)
+        return self._bucket_value(max(self.positive))
+
+    @classmethod
+    def from_dict(cls, data, max_bins=DEFAULT_SKETCH_MAX_BINS):
+        sketch = cls(data["accuracy"], max_bins)
+        sketch.positive = {int(key): count for key, count in data["positive"].items()}
+        sketch.negative = {int(key): count for key, count in data["negative"].items()}
+        sketch.zero = data["zero"]
+        return sketch
+
+    def to_dict(self):
+        return {
+            "accuracy": self.accuracy,
+            "positive": {str(key): count for key, count in self.positive.items()},
+            "negative": {str(key): count for key, count in self.negative.items()},
+            "zero": self.zero,
+        }
+
+
+def _power_of_two_ratio(coarse, fine):
+    """``coarse / fine`` as an int, if it is a power of two; otherwise ValueError."""
+    factor = round(coarse / fine)
+    if factor < 1 or factor & (factor - 1) or not math.isclose(fine * factor, coarse):
+        raise ValueError("Cannot merge histograms with different bin widths")
+    return factor
+
+
+class Histogram:
+    """
+    Sparse fixed-width histogram; bin ``i`` covers [i * width, (i + 1) * width).
+
+    When it holds more than ``max_bins`` bins the width doubles and pairs of
+    neighbouring bins are folded together, so its size does not grow with
+    the range of the data. Widths are therefore the configured width times
+    a power of two, and histograms of one metric still merge exactly at the
+    coarser of their two widths.
+    """
+
+    def __init__(self, width, max_bins=DEFAULT_HISTOGRAM_MAX_BINS):
+        self.width = width
+        self.max_bins = max_bins
+        self.counts = {}
+
+    def bin_indexes(self, values, width=None):
+        return np.floor(values / (width or self.width)).astype(np.int64)
+
+    def add_bin(self, index, count, width=None):
+        """Count ``index``, a bin of ``width`` (default: this histogram's, or a finer one)."""
+        if width is not None and width != self.width:
+            index //= round(self.width / width)
+        self.counts[index] = self.counts.get(index, 0) + count
+
+    def add(self, values):
+        indexes, counts = np.unique(self.bin_indexes(values), return_counts=True)
+        for index, count in zip(indexes.tolist(), counts.tolist()):
+            self.add_bin(index, count)
+        self._fold()
+
+    def _coarsen(self, width):
+        factor = _power_of_two_ratio(width, self.width)
+        if factor == 1:
+            return
+        folded = {}
+        for index, count in self.counts.items():
+            folded[index // factor] = folded.get(index // factor, 0) + count
+        self.counts = folded
+        self.width = width
+
+    def _fold(self):
+        while len(self.counts) > self.max_bins:
+            self._coarsen(self.width * 2)
+
+    def merge(self, other):
+        width = max(self.width, other.width)
+        _power_of_two_ratio(width, min(self.width, other.width))
+        self._coarsen(width)
+        for index, count in other.counts.items():
+            self.add_bin(index, count, other.width)
+        self._fold()
+        return self
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls(data["width"])
+        histogram.counts = {int(index): count for index, count in data["counts"].items()}
+        return histogram
+
+    def to_dict(self):
+        return {
+            "width": self.width,
+            "counts": {str(index): count for index, count in self.counts.items()},
+        }
+
+    def describe(self):
+        return {
+            "width": self.width,
+            "bins": [
+                {"start": index * self.width, "end": (index + 1) * self.width, "count": self.counts[index]}
+                for index in sorted(self.counts)
+            ],
+        }
+
+
+class MetricStatistics:
+    """Moments, quantile sketch and histogram for one metric."""
+
+    def __init__(self, moments, sketch, histogram):
+        self.moments = moments
+        self.sketch = sketch
+        self.histogram = histogram
+
+    @classmethod
+    def empty(cls, accuracy, bin_width):
+        return cls(Moments(), QuantileSketch(accuracy), Histogram(bin_width))
+
+    def merge(self, other):
+        if self.moments.count == 0:
+            self.moments.merge(other.moments)
+            self.sketch = copy.deepcopy(other.sketch)
+            self.histogram = copy.deepcopy(other.histogram)
+            return self
+
+        self.moments.merge(other.moments)
+        # Statistics recorded without (or with differently configured)
+        # sketches cannot be combined; drop them rather than report wrong data.
+        try:
+            self.sketch = self.sketch.merge(other.sketch) if self.sketch and other.sketch else None
+        except ValueError:
+            self.sketch = None
+        try:
+            self.histogram = self.histogram.merge(other.histogram) if self.histogram and other.histogram else None
+        except ValueError:
+            self.histogram = None
+        return self
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            Moments.from_dict(data),
+            QuantileSketch.from_dict(data["sketch"]) if data.get("sketch") else None,
+            Histogram.from_dict(data["histogram"]) if data.get("histogram") else None,
+        )
+
+    def to_dict(self):
+        return {
+            **self.moments.to_dict(),
+            "sketch": self.sketch.to_dict() if self.sketch else None,
+            "histogram": self.histogram.to_dict() if self.histogram else None,
+        }
+
+    def describe(self):
+        description = self.moments.describe()
+        for label, q in REPORTED_QUANTILES.items():
+            description[label] = self.sketch.quantile(q) if self.sketch else None
+        description["histogram"] = self.histogram.describe() if self.histogram else None
+        return description
+
+
+class UploadStatistics:
+    """Per-metric and per-type statistics for one or more uploads."""
+
+    def __init__(self, accuracy=DEFAULT_SKETCH_ACCURACY, bin_widths=None):
+        self.accuracy = accuracy
+        self.bin_widths = {**DEFAULT_BIN_WIDTHS, **(bin_widths or {})}
+        self.metrics = self._new_metrics()
+        self.types = {}
+
+    def _new_metrics(self):
+        return {
+            key: MetricStatistics.empty(self.accuracy, self.bin_widths[key])
+            for key in METRIC_KEYS.values()
+        }
+
+    def _type_metrics(self, type_name):
+        metrics = self.types.get(type_name)
+        if metrics is None:
+            metrics = self.types[type_name] = self._new_metrics()
+        return metrics
+
+    def update(self, chunk):
+        columns = list(METRIC_KEYS)
+        # Rows without a type have a code of their own: they count towards
+        # the overall statistics but no type's, as in the type distribution.
+        codes, type_names = pd.factorize(chunk["Type"], use_na_sentinel=False)
+        type_metrics = [
+            None if pd.isna(type_name) else self._type_metrics(str(type_name))
+            for type_name in type_names
+        ]
+
+        # One pass for every type's moments; the overall moments are their
+        # exact merge.
+        aggregated = chunk[columns].groupby(codes, sort=False).agg(["count", "sum", "min", "max", "var"])
+        for code, row in zip(aggregated.index.tolist(), aggregated.to_numpy().tolist()):
+            for index, key in enumerate(METRIC_KEYS.values()):
+                count, total, minimum, maximum, variance = row[index * 5:index * 5 + 5]
+                moments = Moments(
+                    count=int(count),
+                    total=float(total),
+                    m2=float(variance) * (count - 1) if count > 1 else 0.0,
+                    minimum=float(minimum),
+                    maximum=float(maximum),
+                )
+                if type_metrics[code] is not None:
+                    type_metrics[code][key].moments.merge(moments)
+                self.metrics[key].moments.merge(moments)
+
+        for column, key in METRIC_KEYS.items():
+            values = chunk[column].to_numpy(dtype=float)
+            overall = self.metrics[key]
+            signs, bucket_keys = overall.sketch.bucket_keys(values)
+            # Type histograms hold fewer values than the overall one, so they
+            # may not have been folded as far; count bins at the finest width.
+            bin_width = min(
+                metrics[key].histogram.width
+                for metrics in [self.metrics, *filter(None, type_metrics)]
+            )
+            buckets = pd.DataFrame(
+                {
+                    "type": codes,
+                    "sign": signs,
+                    "key": bucket_keys,
+                    "bin": overall.histogram.bin_indexes(values, bin_width),
+                }
+            )
+
+            # Sketch buckets and histogram bins both only depend on the value,
+            # so one count per (type, bucket, bin) feeds all of them.
+            counts = buckets.groupby(["type", "sign", "key", "bin"], sort=False).size()
+            for (code, sign, bucket_key, index), count in zip(counts.index.tolist(), counts.tolist()):
+                overall.sketch.add_bucket(sign, bucket_key, count)
+                overall.histogram.add_bin(index, count, bin_width)
+                if type_metrics[code] is not None:
+                    type_metrics[code][key].sketch.add_bucket(sign, bucket_key, count)
+                    type_metrics[code][key].histogram.add_bin(index, count, bin_width)
+
+        for metrics in [self.metrics, *self.types.values()]:
+            for metric in metrics.values():
+                metric.sketch._collapse()
+                metric.histogram._fold()
+
+    def merge(self, other):
+        for key, metric in other.metrics.items():
+            self.metrics[key].merge(metric)
+        for type_name, metrics in other.types.items():
+            target = self._type_metrics(type_name)
+            for key, metric in metrics.items():
+                target[key].merge(metric)
+        return self
+
+    @classmethod
+    def from_dict(cls, data):
+        statistics = cls()
+        for key, metric in data.get("metrics", {}).items():
+            statistics.metrics[key] = MetricStatistics.from_dict(metric)
+        for type_name, metrics in data.get("types", {}).items():
+            statistics.types[type_name] = {
+                key: MetricStatistics.from_dict(metric) for key, metric in metrics.items()
+            }
+        return statistics
+
+    def to_dict(self):
+        return {
+            "metrics": {key: metric.to_dict() for key, metric in self.metrics.items()},
+            "types": {
+                type_name: {key: metric.to_dict() for key, metric in metrics.items()}
+                for type_name, metrics in self.types.items()
+            },
+        }
+
+    def describe(self):
+        return {
+            "metrics": {key: metric.describe() for key, metric in self.metrics.items()},
+            "types": {
+                type_name: {key: metric.describe() for key, metric in metrics.items()}
+                for type_name, metrics in self.types.items()
+            },
+        }
@@ -1,3 +1,1633 @@
-from django.test import TestCase
+import gzip
+import hashlib
+import importlib.util
+import json
+import tempfile
+import time
+import unittest
+import zipfile
+from concurrent.futures import Future
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import (
+    AsyncRequestFactory,
+    RequestFactory,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from benchmarks.data import generate_frame
+
+from . import async_views, authentication, batch, jobs, middleware, reports, response_cache, upload_cache
+from .ingest import CSVIngestError, combine_summaries, pa_csv, summarize_csv, zstandard
+from .jobs import requeue_stale_jobs, run_job
+from .models import (
+    EquipmentRecord,
+    EquipmentUpload,
+    UploadCacheEntry,
+    UploadJob,
+    UploadSession,
+)
+from .retention import prune_uploads
+from .services import create_upload, ingest_upload
+from .stats import QuantileSketch, UploadStatistics
+
+CSV_HEADER = "Equipment Name,Type,Flowrate,Pressure,Temperature\n"
+
+
+def make_csv(rows=10, types=("Pump", "Valve", "Reactor")):
+    lines = [
+        f"E{i},{types[i % len(types)]},{10 + i * 1.5},{2 + i * 0.25},{100 + i}\n"
+        for i in range(rows)
+    ]
+    return CSV_HEADER + "".join(lines)
+
+
+def csv_file(text, name="equipment.csv"):
+    data = text.encode() if isinstance(text, str) else text
+    return ContentFile(data, name=name)
+
+
+# The configured response cache is a directory shared with the development
+# server; tests get a private one so earlier runs cannot leak into them.
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "responses": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "equipment-tests",
+    },
+}
+
+
+# Background pruning would run outside the test's transaction.
+NO_AUTO_PRUNE = {**settings.EQUIPMENT_RETENTION, "AUTO_PRUNE": False}
+
+
+def completed(result):
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+# pyarrow chunks by bytes, not rows, so the C engine makes the progress steps exact.
+@override_settings(EQUIPMENT_CSV_CHUNK_SIZE=4, EQUIPMENT_CSV_ENGINE="c")
+class CreateUploadTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="pw")
+
+    def test_progress_is_reported_outside_a_transaction(self):
+        reports = []
+
+        def on_progress(rows):
+            reports.append((rows, connection.in_atomic_block, EquipmentUpload.objects.count()))
+
+        upload, summary = create_upload(csv_file(make_csv(10)), self.user.pk, on_progress)
+
+        self.assertEqual([rows for rows, _, _ in reports], [4, 8, 10])
+        self.assertTrue(all(not in_atomic for _, in_atomic, _ in reports))
+        self.assertTrue(all(count == 0 for _, _, count in reports))
+        self.assertEqual(summary["total_equipment"], 10)
+        self.assertEqual(EquipmentRecord.objects.filter(upload=upload).count(), 10)
+
+    def test_invalid_file_writes_nothing(self):
+        text = make_csv(6) + "E9,Pump,not-a-number,1,1\n"
+        with self.assertRaises(CSVIngestError):
+            create_upload(csv_file(text), self.user.pk)
+        self.assertEqual(EquipmentUpload.objects.count(), 0)
+        self.assertEqual(EquipmentRecord.objects.count(), 0)
+
+
+@override_settings(
+    EQUIPMENT_CSV_CHUNK_SIZE=4,
+    EQUIPMENT_CSV_ENGINE="c",
+    EQUIPMENT_RETENTION=NO_AUTO_PRUNE,
+    CACHES=LOCMEM_CACHES,
+)
+class UploadJobTests(TransactionTestCase):
+    def setUp(self):
+        job_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(job_dir.cleanup)
+        settings_override = override_settings(EQUIPMENT_JOB_DIR=job_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        # Jobs are run by the test instead of the worker threads.
+        self.submitted = []
+        executor = mock.patch.object(
+            jobs, "get_executor",
+            return_value=mock.Mock(submit=lambda *args: self.submitted.append(args)),
+        )
+        executor.start()
+        self.addCleanup(executor.stop)
+
+        self.user = User.objects.create_user("owner", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_job_reports_progress_and_the_summary(self):
+        text = make_csv(10)
+        response = self.client.post(
+            "/api/equipment/upload/?async=1", {"file": csv_file(text)}
+        )
+        self.assertEqual(response.status_code, 202)
+        location = response["Location"]
+        job_id = response.json()["job_id"]
+        self.assertEqual(location, f"/api/equipment/jobs/{job_id}/")
+        self.assertEqual(self.submitted, [(run_job, UploadJob.objects.get().pk)])
+
+        queued = self.client.get(location).json()
+        self.assertEqual((queued["state"], queued["progress"], queued["summary"]), ("queued", 0.0, None))
+
+        seen = []
+        real_ingest = jobs.ingest_upload
+
+        def ingest(csv_file, owner_id, on_progress):
+            def report(rows):
+                on_progress(rows)
+                seen.append(self.client.get(location).json())
+            return real_ingest(csv_file, owner_id, report)
+
+        with mock.patch.object(jobs, "ingest_upload", side_effect=ingest):
+            run_job(UploadJob.objects.get().pk)
+
+        self.assertEqual([status["state"] for status in seen], ["running"] * 3)
+        self.assertEqual([status["rows_processed"] for status in seen], [4, 8, 10])
+        self.assertTrue(all(0 < status["progress"] <= 1 for status in seen))
+
+        finished = self.client.get(location).json()
+        self.assertEqual(finished["state"], "succeeded")
+        self.assertEqual(finished["progress"], 1.0)
+        self.assertEqual(finished["summary"], summarize_csv(csv_file(text)))
+        self.assertEqual(EquipmentRecord.objects.count(), 10)
+
+    def test_invalid_file_fails_the_job(self):
+        response = self.client.post(
+            "/api/equipment/upload/", {"file": csv_file(CSV_HEADER + "A,Pump,x,2,3\n"), "async": "true"}
+        )
+        run_job(response.json()["job_id"])
+
+        failed = self.client.get(response["Location"]).json()
+        self.assertEqual(failed["state"], "failed")
+        self.assertEqual(failed["error"], "CSV contains invalid numeric values")
+        self.assertFalse(EquipmentUpload.objects.exists())
+
+    def test_jobs_are_private(self):
+        response = self.client.post("/api/equipment/upload/?async=1", {"file": csv_file(make_csv(3))})
+        other = User.objects.create_user("other", password="pw")
+        self.client.force_authenticate(other)
+
+        response = self.client.get(response["Location"])
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {"error": "Job not found"})
+
+
+def run_inline(function, *args, **kwargs):
+    return completed(function(*args, **kwargs))
+
+
+# The worker processes could not reach the test database, so files are
+# ingested in this process; TransactionTestCase because _ingest_source
+# closes stale connections as a worker does.
+@override_settings(EQUIPMENT_RETENTION=NO_AUTO_PRUNE, CACHES=LOCMEM_CACHES)
+class BatchUploadTests(TransactionTestCase):
+    def setUp(self):
+        executor = mock.patch.object(
+            batch, "get_executor", return_value=mock.Mock(submit=run_inline)
+        )
+        executor.start()
+        self.addCleanup(executor.stop)
+
+        self.user = User.objects.create_user("owner", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post(self, files):
+        return self.client.post("/api/equipment/upload/batch/", {"files": files})
+
+    def test_bad_files_do_not_stop_the_others(self):
+        texts = [make_csv(4), make_csv(7, types=("Pump", "Mixer"))]
+        response = self.post([
+            csv_file(texts[0], "first.csv"),
+            csv_file(CSV_HEADER + "A,Pump,x,2,3\n", "invalid.csv"),
+            csv_file("not a csv", "notes.txt"),
+            csv_file(texts[1], "second.csv"),
+        ])
+        self.assertEqual(response.status_code, 200)
+        files = response.json()["files"]
+
+        summaries = [summarize_csv(csv_file(text)) for text in texts]
+        self.assertEqual(files, [
+            {"name": "first.csv", "summary": summaries[0]},
+            {"name": "invalid.csv", "error": "CSV contains invalid numeric values"},
+            {"name": "notes.txt", "error": "Only CSV files (.csv, .csv.gz, .csv.zst) are allowed"},
+            {"name": "second.csv", "summary": summaries[1]},
+        ])
+        self.assertEqual(
+            sorted(EquipmentUpload.objects.values_list("total_equipment", flat=True)), [4, 7]
+        )
+
+        combined = response.json()["combined"]
+        expected = combine_summaries(summaries)
+        self.assertEqual(combined.keys(), expected.keys())
+        for key, value in expected.items():
+            if isinstance(value, float):
+                self.assertAlmostEqual(combined[key], value)
+            else:
+                self.assertEqual(combined[key], value)
+
+    def test_no_valid_files(self):
+        response = self.post([csv_file(CSV_HEADER, "empty.csv")])
+        self.assertEqual(response.json(), {
+            "files": [{"name": "empty.csv", "error": "CSV file is empty"}],
+            "combined": None,
+        })
+
+
+class UploadJobRecoveryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="pw")
+
+    def make_job(self, state, age):
+        job = UploadJob.objects.create(
+            owner=self.user, file_name="a.csv", file_path="/nonexistent", file_size=1
+        )
+        UploadJob.objects.filter(pk=job.pk).update(
+            state=state, progress=0.5, updated_at=timezone.now() - age
+        )
+        return job
+
+    @override_settings(EQUIPMENT_JOB_STALE_AFTER=600)
+    def test_stale_running_jobs_are_requeued(self):
+        stale = self.make_job(UploadJob.STATE_RUNNING, timedelta(hours=1))
+        active = self.make_job(UploadJob.STATE_RUNNING, timedelta(seconds=5))
+        finished = self.make_job(UploadJob.STATE_SUCCEEDED, timedelta(hours=1))
+
+        self.assertEqual(requeue_stale_jobs(), 1)
+
+        stale.refresh_from_db()
+        self.assertEqual((stale.state, stale.progress), (UploadJob.STATE_QUEUED, 0.0))
+        active.refresh_from_db()
+        self.assertEqual(active.state, UploadJob.STATE_RUNNING)
+        finished.refresh_from_db()
+        self.assertEqual(finished.state, UploadJob.STATE_SUCCEEDED)
+
+
+def equipment_frame(rows=1000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "Type": pd.Series(rng.choice(["Pump", "Valve", "Reactor"], rows), dtype="str"),
+            "Flowrate": rng.normal(100, 30, rows),
+            "Pressure": rng.lognormal(1, 1, rows),
+            "Temperature": rng.normal(0, 50, rows),
+        }
+    )
+
+
+PARITY_ROWS = "".join(f"E{i},T{i % 3},{i},{i * 2},{i * 3},note\n" for i in range(300))
+PARITY_HEADER = "Equipment Name,Type,Flowrate,Pressure,Temperature,Notes\n"
+
+# Files both engines, and the desktop app's local summary, must treat alike.
+PARITY_CASES = {
+    "plain": PARITY_HEADER + PARITY_ROWS,
+    "duplicate type column": "Equipment Name,Type,Flowrate,Pressure,Temperature,Type\n"
+    "A,Pump,1,2,3,X\nB,Valve,2,3,4,Y\n",
+    "duplicate metric column": "Equipment Name,Type,Flowrate,Pressure,Temperature,Flowrate\n"
+    "A,Pump,1,2,3,9\n",
+    "rows longer than the header": CSV_HEADER + "A,Pump,1,2,3,x\nB,Valve,2,3,4,y\n",
+    "header shorter than the rows": "Type,Flowrate,Pressure,Temperature\nA,Pump,1,2,3,4\n",
+    "short row": CSV_HEADER + "A,Pump,1,2\n",
+    "short row after many": PARITY_HEADER + PARITY_ROWS + "X,Pump,1,2,3\n" + PARITY_ROWS,
+    "long row after many": PARITY_HEADER + PARITY_ROWS + "X,Pump,1,2,3,n,extra\n" + PARITY_ROWS,
+    "latin-1 in a parsed column": (CSV_HEADER + "Pompe é,Pump,1,2,3\n").encode("latin-1"),
+    "latin-1 in a skipped column": (PARITY_HEADER + PARITY_ROWS + "X,Pump,1,2,3,é\n").encode("latin-1"),
+    "latin-1 header": (PARITY_HEADER.replace("Notes", "Nötes") + PARITY_ROWS).encode("latin-1"),
+    "invalid number": CSV_HEADER + "A,Pump,x,2,3\n",
+    "boolean metric": CSV_HEADER + "A,Pump,True,2,3\nB,Valve,False,3,4\n",
+    "boolean metric after many": PARITY_HEADER + PARITY_ROWS + "X,Pump,1,true,3,n\n",
+    "empty type": CSV_HEADER + "A,,1,2,3\nB,Pump,2,3,4\n",
+    "missing columns": "Type,Flowrate,Pressure\nPump,1,2\n",
+    "header only": CSV_HEADER,
+    "quoted newline": CSV_HEADER + '"A\nB",Pump,1,2,3\n',
+    "gzip, short row after many": gzip.compress((PARITY_HEADER + PARITY_ROWS + "X,Pump,1,2,3\n" + PARITY_ROWS).encode()),
+}
+
+
+def summarize_or_error(data, engine, chunk_size=None):
+    try:
+        return summarize_csv(csv_file(data), chunk_size, engine=engine)
+    except CSVIngestError as e:
+        return str(e)
+
+
+class StatisticsTests(TestCase):
+    def assertDescriptionsEqual(self, first, second):
+        for key, value in first.items():
+            if isinstance(value, dict):
+                self.assertDescriptionsEqual(value, second[key])
+            elif isinstance(value, float):
+                self.assertAlmostEqual(value, second[key], delta=1e-9 * max(1, abs(value)))
+            else:
+                self.assertEqual(value, second[key], key)
+
+    def test_moments_match_pandas(self):
+        frame = equipment_frame()
+        statistics = UploadStatistics()
+        statistics.update(frame)
+        described = statistics.describe()
+
+        for column, key in (("Flowrate", "flowrate"), ("Temperature", "temperature")):
+            metric = described["metrics"][key]
+            self.assertEqual(metric["count"], len(frame))
+            self.assertAlmostEqual(metric["mean"], frame[column].mean())
+            self.assertAlmostEqual(metric["variance"], frame[column].var())
+            self.assertEqual(metric["min"], frame[column].min())
+            pump = frame.loc[frame["Type"] == "Pump", column]
+            self.assertAlmostEqual(described["types"]["Pump"][key]["variance"], pump.var())
+
+    def test_chunks_and_merges_give_the_same_statistics(self):
+        frame = equipment_frame()
+        whole = UploadStatistics()
+        whole.update(frame)
+
+        chunked = UploadStatistics()
+        for start in range(0, len(frame), 128):
+            chunked.update(frame.iloc[start:start + 128])
+
+        merged = UploadStatistics()
+        for half in (frame.iloc[:300], frame.iloc[300:]):
+            part = UploadStatistics()
+            part.update(half)
+            merged.merge(UploadStatistics.from_dict(part.to_dict()))
+
+        self.assertDescriptionsEqual(chunked.describe(), whole.describe())
+        self.assertDescriptionsEqual(merged.describe(), whole.describe())
+
+    def test_rows_without_a_type_count_only_overall(self):
+        frame = equipment_frame(10)
+        frame.loc[0, "Type"] = None
+        statistics = UploadStatistics()
+        statistics.update(frame)
+
+        self.assertEqual(statistics.metrics["flowrate"].moments.count, 10)
+        self.assertEqual(
+            sum(metrics["flowrate"].moments.count for metrics in statistics.types.values()), 9
+        )
+
+    def test_histograms_stay_bounded_and_mergeable(self):
+        frame = equipment_frame(20_000)
+        # Pressures in Pa span far more 2.5-wide bins than the cap.
+        frame["Pressure"] = np.random.default_rng(1).uniform(1e5, 4e6, len(frame))
+        whole = UploadStatistics()
+        whole.update(frame)
+
+        merged = UploadStatistics()
+        for part in (frame.iloc[:100], frame.iloc[100:]):
+            statistics = UploadStatistics()
+            statistics.update(part)
+            merged.merge(UploadStatistics.from_dict(statistics.to_dict()))
+
+        for statistics in (whole, merged):
+            histograms = [statistics.metrics["pressure"].histogram] + [
+                metrics["pressure"].histogram for metrics in statistics.types.values()
+            ]
+            for histogram in histograms:
+                self.assertLessEqual(len(histogram.counts), histogram.max_bins)
+            overall = histograms[0]
+            self.assertEqual(sum(overall.counts.values()), len(frame))
+            self.assertEqual(overall.width % 2.5, 0)
+            for index, count in overall.counts.items():
+                in_bin = frame["Pressure"].between(
+                    index * overall.width, (index + 1) * overall.width, inclusive="left"
+                )
+                self.assertEqual(count, in_bin.sum())
+        self.assertEqual(merged.metrics["pressure"].histogram.counts, whole.metrics["pressure"].histogram.counts)
+
+    def test_collapsing_keeps_upper_quantiles_of_negative_values(self):
+        values = -np.geomspace(1e-3, 1e6, 100_000)
+        for values in (values, -values):
+            sketch = QuantileSketch(accuracy=0.01, max_bins=64)
+            sketch.add(values)
+            self.assertLessEqual(len(sketch.positive) + len(sketch.negative), 64)
+            expected = np.quantile(values, 0.99)
+            self.assertAlmostEqual(sketch.quantile(0.99) / expected, 1, delta=0.011)
+
+
+class IngestTests(TestCase):
+    def test_reads_gzip_uploads(self):
+        text = make_csv(7)
+        self.assertEqual(
+            summarize_csv(csv_file(gzip.compress(text.encode()))),
+            summarize_csv(csv_file(text)),
+        )
+
+    def test_numeric_types_are_grouped_as_written(self):
+        text = make_csv(6, types=("1", "01", "2.0"))
+        for engine in ("c", "pyarrow") if pa_csv else ("c",):
+            with self.subTest(engine):
+                summary = summarize_csv(csv_file(text), engine=engine)
+                self.assertEqual(
+                    summary["equipment_type_distribution"], {"1": 2, "01": 2, "2.0": 2}
+                )
+
+    def test_errors(self):
+        cases = {
+            CSV_HEADER: "CSV file is empty",
+            "Type,Flowrate\nPump,1\n": "CSV must contain columns: Type, Flowrate, Pressure, Temperature",
+            CSV_HEADER + "A,Pump,x,2,3\n": "CSV contains invalid numeric values",
+            (CSV_HEADER + "A,Pompé,1,2,3\n").encode("latin-1"): "CSV must be UTF-8 encoded",
+        }
+        for data, message in cases.items():
+            with self.subTest(message=message):
+                self.assertEqual(summarize_or_error(data, "c"), message)
+
+
+@unittest.skipIf(pa_csv is None, "pyarrow is not installed")
+class EngineParityTests(TestCase):
+    """The pyarrow and C engines accept and reject the same files."""
+
+    def test_engines_agree(self):
+        for name, data in PARITY_CASES.items():
+            with self.subTest(name):
+                # A small chunk size makes pyarrow yield some chunks before
+                # it reaches a ragged row.
+                self.assertEqual(
+                    summarize_or_error(data, "pyarrow", chunk_size=64),
+                    summarize_or_error(data, "c", chunk_size=64),
+                )
+
+    def test_ragged_rows_are_read_once(self):
+        data = PARITY_HEADER + PARITY_ROWS + "X,Pump,1,2,3\n" + PARITY_ROWS
+        summary = summarize_csv(csv_file(data), 64, engine="pyarrow")
+        self.assertEqual(summary["total_equipment"], 601)
+
+
+def load_desktop_summarize():
+    path = settings.BASE_DIR.parent / "desktop_app" / "summarize.py"
+    spec = importlib.util.spec_from_file_location("desktop_summarize", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@override_settings(EQUIPMENT_RETENTION=NO_AUTO_PRUNE)
+class DesktopSummaryParityTests(TestCase):
+    """
+    The desktop app's local summary (desktop_app/summarize.py) accepts and
+    rejects files as /upload/ does, with the same summary and moments.
+    """
+
+    def setUp(self):
+        self.summarize = load_desktop_summarize()
+        self.user = User.objects.create_user("owner", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload(self, data, name):
+        response = self.client.post("/api/equipment/upload/", {"file": csv_file(data, name)})
+        body = response.json()
+        if response.status_code == 200:
+            return body, EquipmentUpload.objects.latest("id").statistics
+        # Serializer errors are keyed by field.
+        return body.get("error") or body["file"][0], None
+
+    def summarize_locally(self, data, name):
+        with tempfile.TemporaryDirectory() as directory:
+            path = f"{directory}/{name}"
+            with open(path, "wb") as handle:
+                handle.write(data.encode() if isinstance(data, str) else data)
+            try:
+                return self.summarize.summarize_file(path, chunk_size=64)
+            except self.summarize.SummaryError as e:
+                return str(e), None
+
+    def assertMomentsEqual(self, local, server):
+        for key in ("count", "min", "max"):
+            self.assertEqual(local[key], server[key], key)
+        for key in ("sum", "m2"):
+            self.assertAlmostEqual(local[key], server[key], delta=1e-9 * max(1, abs(server[key])))
+
+    def test_same_results_as_upload(self):
+        cases = {**PARITY_CASES, "empty file": b""}
+        for name, data in cases.items():
+            file_name = "equipment.csv.gz" if name.startswith("gzip") else "equipment.csv"
+            with self.subTest(name):
+                summary, statistics = self.upload(data, file_name)
+                local_summary, local_statistics = self.summarize_locally(data, file_name)
+
+                if isinstance(summary, str):
+                    self.assertEqual(local_summary, summary)
+                    continue
+                self.assertEqual(local_summary.keys(), summary.keys())
+                for key, value in summary.items():
+                    if isinstance(value, float):
+                        self.assertAlmostEqual(local_summary[key], value)
+                    else:
+                        self.assertEqual(local_summary[key], value)
+                for key, metric in statistics["metrics"].items():
+                    self.assertMomentsEqual(local_statistics["metrics"][key], metric)
+                self.assertEqual(local_statistics["types"].keys(), statistics["types"].keys())
+                for type_name, metrics in statistics["types"].items():
+                    for key, metric in metrics.items():
+                        self.assertMomentsEqual(local_statistics["types"][type_name][key], metric)
+
+
+@override_settings(EQUIPMENT_RETENTION=NO_AUTO_PRUNE)
+class CompressedUploadTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.text = make_csv(12)
+        self.expected = summarize_csv(csv_file(self.text))
+
+    def post_body(self, data, encoding=""):
+        return self.client.post(
+            "/api/equipment/upload/", data, content_type="text/csv",
+            HTTP_CONTENT_ENCODING=encoding,
+        )
+
+    def test_gzip_file(self):
+        response = self.client.post(
+            "/api/equipment/upload/",
+            {"file": csv_file(gzip.compress(self.text.encode()), "equipment.csv.gz")},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), self.expected)
+        self.assertEqual(EquipmentRecord.objects.count(), 12)
+
+    def test_raw_bodies(self):
+        bodies = {"": self.text.encode(), "gzip": gzip.compress(self.text.encode())}
+        for encoding, body in bodies.items():
+            with self.subTest(encoding=encoding):
+                response = self.post_body(body, encoding)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json(), self.expected)
+
+    @unittest.skipIf(zstandard is None, "zstandard is not installed")
+    def test_zstd_body(self):
+        body = zstandard.ZstdCompressor().compress(self.text.encode())
+        response = self.post_body(body, "zstd")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), self.expected)
+
+    def test_unsupported_encoding(self):
+        response = self.post_body(self.text.encode(), "br")
+        self.assertEqual(response.status_code, 415)
+        self.assertFalse(EquipmentUpload.objects.exists())
+
+    @override_settings(EQUIPMENT_UPLOAD_MAX_DECOMPRESSED_SIZE=1024 * 1024)
+    def test_decompressed_size_is_capped(self):
+        # Highly repetitive, so it compresses to a few kilobytes.
+        body = gzip.compress((CSV_HEADER + "E,Pump,1,2,3\n" * 200_000).encode())
+        self.assertLess(len(body), 1024 * 1024)
+
+        response = self.post_body(body, "gzip")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["error"], "Decompressed CSV cannot exceed 1MB")
+        self.assertFalse(EquipmentRecord.objects.exists())
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    EQUIPMENT_COMPRESSION={"ENABLED": True, "MIN_SIZE": 256, "GZIP_LEVEL": 6, "ZSTD_LEVEL": 3},
+)
+class CompressionTests(TestCase):
+    def setUp(self):
+        caches["responses"].clear()
+        self.user = User.objects.create_user("owner", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        for rows in range(1, 6):
+            create_upload(csv_file(make_csv(rows)), self.user.pk)
+        self.expected = self.client.get("/api/equipment/history/").json()
+
+    def history(self, accept_encoding, **headers):
+        return self.client.get(
+            "/api/equipment/history/", HTTP_ACCEPT_ENCODING=accept_encoding, **headers
+        )
+
+    def test_negotiation(self):
+        cases = {
+            "gzip": "gzip",
+            "gzip;q=0, *": "zstd" if zstandard else "gzip",
+            "zstd, gzip": "zstd" if zstandard else "gzip",
+            "zstd;q=0, gzip;q=0.5": "gzip",
+            "br": None,
+            "gzip;q=0": None,
+        }
+        for header, encoding in cases.items():
+            with self.subTest(header):
+                self.assertEqual(middleware.negotiate_encoding(header), encoding)
+        with mock.patch.object(middleware, "zstandard", None):
+            self.assertEqual(middleware.negotiate_encoding("zstd, gzip"), "gzip")
+
+    def test_gzip_response(self):
+        response = self.history("gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(json.loads(gzip.decompress(response.content)), self.expected)
+
+    @unittest.skipIf(zstandard is None, "zstandard is not installed")
+    def test_zstd_response(self):
+        response = self.history("zstd, gzip")
+        self.assertEqual(response["Content-Encoding"], "zstd")
+        data = zstandard.ZstdDecompressor().decompressobj().decompress(response.content)
+        self.assertEqual(json.loads(data), self.expected)
+
+    def test_uncompressed_for_clients_without_support(self):
+        response = self.history("")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(response.json(), self.expected)
+
+    def test_weak_etag_still_matches(self):
+        etag = self.history("gzip")["ETag"]
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertEqual(self.history("gzip", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_small_and_streamed_responses_are_left_alone(self):
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING="gzip")
+        body = json.dumps(self.expected).encode()
+        responses = {
+            "small": HttpResponse(b"{}", content_type="application/json"),
+            "streamed": StreamingHttpResponse([body], content_type="application/json"),
+            "file": FileResponse(BytesIO(body), content_type="application/json"),
+            "pdf": HttpResponse(body, content_type="application/pdf"),
+        }
+        for name, response in responses.items():
+            with self.subTest(name):
+                compressed = middleware.CompressionMiddleware(lambda request: response)(request)
+                self.assertFalse(compressed.has_header("Content-Encoding"))
+                self.assertFalse(compressed.has_header("Vary"))
+
+
+@override_settings(EQUIPMENT_RETENTION=NO_AUTO_PRUNE)
+class UploadSessionTests(TestCase):
+    def setUp(self):
+        session_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(session_dir.cleanup)
+        settings_override = override_settings(EQUIPMENT_UPLOAD_SESSION_DIR=session_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user("owner", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.data = make_csv(20).encode()
+
+    def start(self):
+        response = self.client.post(
+            "/api/equipment/uploads/sessions/",
+            {"file_name": "equipment.csv", "size": len(self.data)},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        return response["Location"]
+
+    def put(self, url, start, end):
+        return self.client.put(
+            url, self.data[start:end], content_type="application/octet-stream",
+            HTTP_CONTENT_RANGE=f"bytes {start}-{end - 1}/{len(self.data)}",
+        )
+
+    def complete(self, url, sha256=None):
+        return self.client.post(
+            url + "complete/",
+            {"sha256": sha256 or hashlib.sha256(self.data).hexdigest()},
+            format="json",
+        )
+
+    def test_resumes_from_the_reported_offset(self):
+        url = self.start()
+        middle = len(self.data) // 2
+
+        self.assertEqual(self.put(url, 0, middle).json()["offset"], middle)
+        # A retried chunk is accepted without being written twice.
+        self.assertEqual(self.put(url, 0, middle).json()["offset"], middle)
+        # A chunk past the offset is refused with the offset to resume from.
+        response = self.put(url, middle + 10, len(self.data))
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["offset"], middle)
+
+        offset = self.client.get(url).json()["offset"]
+        self.put(url, offset, len(self.data))
+        response = self.complete(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), summarize_csv(csv_file(self.data)))
+        self.assertEqual(EquipmentRecord.objects.count(), 20)
+        self.assertFalse(UploadSession.objects.exists())
+
+    def test_incomplete_upload_can_still_be_finished(self):
+        url = self.start()
+        self.put(url, 0, 10)
+
+        response = self.complete(url)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json()["error"], f"Upload incomplete: 10 of {len(self.data)} bytes received"
+        )
+        self.assertTrue(UploadSession.objects.exists())
+
+    def test_checksum_mismatch_discards_the_session(self):
+        url = self.start()
+        self.put(url, 0, len(self.data))
+
+        response = self.complete(url, sha256="0" * 64)
+        self.assertEqual(response.json()["error"], "Checksum does not match the uploaded data")
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertFalse(EquipmentUpload.objects.exists())
+
+    def test_content_range_must_match_the_session(self):
+        url = self.start()
+        response = self.client.put(
+            url, self.data, content_type="application/octet-stream",
+            HTTP_CONTENT_RANGE=f"bytes 0-{len(self.data)}/{len(self.data) + 1}",
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_sessions_are_private(self):
+        url = self.start()
+        other = User.objects.create_user("other", password="pw")
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.put(url, 0, len(self.data)).status_code, 404)
+
+
+@override_settings(EQUIPMENT_RETENTION=NO_AUTO_PRUNE)
+class SummaryUploadTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post(self, payload):
+        return self.client.post("/api/equipment/upload/summary/", payload, format="json")
+
+    def local_summary(self, text):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv") as handle:
+            handle.write(text)
+            handle.flush()
+            return load_desktop_summarize().summarize_file(handle.name)
+
+    def test_records_the_summary_without_rows(self):
+        summary, statistics = self.local_summary(make_csv(9))
+
+        response = self.post({**summary, "statistics": statistics})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), summary)
+        upload = EquipmentUpload.objects.get()
+        self.assertEqual(upload.total_equipment, 9)
+        self.assertFalse(upload.records.exists())
+        self.assertEqual(
+            UploadStatistics.from_dict(upload.statistics).metrics["flowrate"].moments.count, 9
+        )
+
+    def test_statistics_are_optional(self):
+        summary, _ = self.local_summary(make_csv(3))
+        self.assertEqual(self.post(summary).status_code, 200)
+        self.assertEqual(EquipmentUpload.objects.get().statistics, {})
+
+    def test_inconsistent_summaries_are_rejected(self):
+        summary, statistics = self.local_summary(make_csv(9))
+        cases = {
+            "distribution": {**summary, "total_equipment": 8},
+            "statistics": {**summary, "average_flowrate": 0, "statistics": statistics},
+            "types": {
+                **summary,
+                "equipment_type_distribution": {"Pump": 9},
+                "statistics": statistics,
+            },
+        }
+        for name, payload in cases.items():
+            with self.subTest(name):
+                self.assertEqual(self.post(payload).status_code, 400)
+        self.assertFalse(EquipmentUpload.objects.exists())
+
+    def test_blank_types_match_upload(self):
+        cases = {
+            "some blank": CSV_HEADER + "A,Pump,1,2,3\nB,,4,5,6\n",
+            "all blank": CSV_HEADER + "A,,1,2,3\nB,,4,5,6\n",
+        }
+        for name, text in cases.items():
+            with self.subTest(name):
+                expected = self.client.post(
+                    "/api/equipment/upload/", {"file": csv_file(text)}
+                ).json()
+                summary, statistics = self.local_summary(text)
+                self.assertEqual(summary, expected)
+
+                response = self.post({**summary, "statistics": statistics})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json(), expected)
+
+    def test_sketches_and_histograms_are_rejected(self):
+        summary, statistics = self.local_summary(make_csv(9))
+        cases = {
+            "sketch accuracy of 1": {
+                "sketch": {"accuracy": 1, "positive": {}, "negative": {}, "zero": 0}
+            },
+            "string sketch counts": {
+                "sketch": {"accuracy": 0.01, "positive": {"1": "x"}, "negative": {}, "zero": 0}
+            },
+            "string histogram counts": {"histogram": {"width": 1, "counts": {"1": "x"}}},
+        }
+        for name, fields in cases.items():
+            for location in ("metrics", "types"):
+                with self.subTest(name, location=location):
+                    payload = json.loads(json.dumps(statistics))
+                    metrics = payload["metrics"] if location == "metrics" else payload["types"]["Pump"]
+                    metrics["flowrate"].update(fields)
+
+                    response = self.post({**summary, "statistics": payload})
+                    self.assertEqual(response.status_code, 400)
+                    self.assertEqual(response.json(), {"statistics": ["Invalid statistics"]})
+        self.assertFalse(EquipmentUpload.objects.exists())
+
+
+@override_settings(EQUIPMENT_UPLOAD_CACHE={"ENABLED": True, "MAX_ENTRIES": None, "MAX_AGE": None})
+class UploadCacheTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="pw")
+        self.text = make_csv(9)
+
+    def test_hit_records_a_new_upload(self):
+        first = ingest_upload(csv_file(self.text), self.user.pk)
+        with mock.patch("equipment.services.accumulate_csv") as parse:
+            second = ingest_upload(csv_file(self.text), self.user.pk)
+        parse.assert_not_called()
+
+        self.assertEqual(first, second)
+        uploads = list(EquipmentUpload.objects.order_by("id"))
+        self.assertEqual(len(uploads), 2)
+        self.assertEqual(uploads[1].statistics, uploads[0].statistics)
+        self.assertEqual(
+            list(uploads[1].records.order_by("id").values_list("equipment_name", "type", "flowrate")),
+            list(uploads[0].records.order_by("id").values_list("equipment_name", "type", "flowrate")),
+        )
+        # The entry follows the newest copy, which retention keeps longest.
+        self.assertEqual(UploadCacheEntry.objects.get().upload, uploads[1])
+
+    @override_settings(EQUIPMENT_RETENTION={"KEEP_LATEST": None, "MAX_AGE_DAYS": None, "BATCH_SIZE": 10})
+    def test_entry_is_deleted_with_its_upload(self):
+        ingest_upload(csv_file(self.text), self.user.pk)
+        EquipmentUpload.objects.all().delete()
+        self.assertFalse(UploadCacheEntry.objects.exists())
+
+        ingest_upload(csv_file(self.text), self.user.pk)
+        self.assertEqual(EquipmentRecord.objects.count(), 9)
+
+    def test_hit_on_a_deleted_source_parses_again(self):
+        ingest_upload(csv_file(self.text), self.user.pk)
+        source = EquipmentUpload.objects.get()
+        entry = UploadCacheEntry.objects.get()
+
+        # Deleted between the lookup and the copy.
+        EquipmentRecord.objects.filter(upload=source).delete()
+        with mock.patch.object(upload_cache, "lookup", return_value=entry):
+            ingest_upload(csv_file(self.text), self.user.pk)
+
+        latest = EquipmentUpload.objects.latest("id")
+        self.assertEqual(latest.records.count(), 9)
+
+    @override_settings(
+        EQUIPMENT_UPLOAD_CACHE={"ENABLED": True, "MAX_ENTRIES": 1, "MAX_AGE": None, "EVICT_EVERY": 3}
+    )
+    def test_eviction_runs_every_few_stores(self):
+        with mock.patch.object(upload_cache, "_stores_since_evict", 0), \
+                mock.patch.object(upload_cache, "evict", wraps=upload_cache.evict) as evict:
+            for rows in (1, 2):
+                ingest_upload(csv_file(make_csv(rows)), self.user.pk)
+            evict.assert_not_called()
+            self.assertEqual(UploadCacheEntry.objects.count(), 2)
+
+            ingest_upload(csv_file(make_csv(3)), self.user.pk)
+            evict.assert_called_once()
+            self.assertEqual(UploadCacheEntry.objects.get().upload.total_equipment, 3)
+
+    def test_stats_are_per_owner(self):
+        other = User.objects.create_user("other", password="pw")
+        ingest_upload(csv_file(self.text), self.user.pk)
+        ingest_upload(csv_file(self.text), self.user.pk)
+        before = upload_cache.stats(other.pk)
+
+        client = APIClient()
+        client.force_authenticate(other)
+        stats = client.get("/api/equipment/cache/").json()
+        self.assertEqual(stats, before)
+        self.assertEqual(stats["entries"], 0)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class HistoryTests(TestCase):
+    def setUp(self):
+        caches["responses"].clear()
+        self.user = User.objects.create_user("owner", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_items_carry_an_iso_timestamp(self):
+        upload, _ = create_upload(csv_file(make_csv(3)), self.user.pk)
+        (item,) = self.client.get("/api/equipment/history/").json()
+        self.assertEqual(datetime.fromisoformat(item["uploaded_at_iso"]), upload.uploaded_at)
+
+    def test_pages_follow_the_link_header(self):
+        for rows in range(1, 8):
+            create_upload(csv_file(make_csv(rows)), self.user.pk)
+
+        totals = []
+        url = "/api/equipment/history/?page_size=3"
+        while url:
+            response = self.client.get(url)
+            totals += [item["total_equipment"] for item in response.json()]
+            link = response.headers.get("Link")
+            url = link[1:link.index(">")] if link else None
+
+        self.assertEqual(totals, [7, 6, 5, 4, 3, 2, 1])
+
+    def test_unchanged_pages_are_not_modified(self):
+        create_upload(csv_file(make_csv(2)), self.user.pk)
+        etag = self.client.get("/api/equipment/history/").headers["ETag"]
+
+        response = self.client.get("/api/equipment/history/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_upload(csv_file(make_csv(3)), self.user.pk)
+        response = self.client.get("/api/equipment/history/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+    def test_invalid_parameters(self):
+        for query, message in (
+            ("page_size=0", "page_size must be a positive integer"),
+            ("since=yesterday", "since must be an ISO 8601 datetime"),
+            ("since=2024-13-45T00:00:00", "since must be an ISO 8601 datetime"),
+            ("cursor=bm90LWEtY3Vyc29y", "Invalid cursor: bm90LWEtY3Vyc29y"),
+        ):
+            with self.subTest(query):
+                response = self.client.get(f"/api/equipment/history/?{query}")
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {"error": message})
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class AsyncHistoryTests(TransactionTestCase):
+    """The async history view serves what the sync one does."""
+
+    def setUp(self):
+        caches["responses"].clear()
+        self.user = User.objects.create_user("owner", password="pw")
+        self.token = Token.objects.create(user=self.user)
+        for rows in range(1, 5):
+            create_upload(csv_file(make_csv(rows)), self.user.pk)
+
+    def test_matches_the_sync_view(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        for query in ("page_size=3", "page_size=0"):
+            with self.subTest(query):
+                expected = client.get(f"/api/equipment/history/?{query}")
+                request = AsyncRequestFactory().get(
+                    f"/api/equipment/history/?{query}",
+                    headers={"Authorization": f"Token {self.token.key}"},
+                )
+                response = async_to_sync(async_views.upload_history)(request)
+
+                self.assertEqual(response.status_code, expected.status_code)
+                self.assertEqual(json.loads(response.content), expected.json())
+                self.assertEqual(response.headers.get("ETag"), expected.headers.get("ETag"))
+
+
+@override_settings(CACHES=LOCMEM_CACHES, EQUIPMENT_RETENTION=NO_AUTO_PRUNE)
+class AsyncUploadTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="pw")
+        self.token = Token.objects.create(user=self.user)
+        self.text = make_csv(6)
+
+    def post(self, path, data, headers=None, **extra):
+        return AsyncRequestFactory().post(
+            path, data, headers={"Authorization": f"Token {self.token.key}", **(headers or {})}, **extra
+        )
+
+    def upload(self, request):
+        return async_to_sync(async_views.upload_csv)(request)
+
+    def test_multipart_and_csv_bodies(self):
+        requests = {
+            "multipart": self.post("/api/equipment/upload/", {"file": csv_file(self.text)}),
+            "text/csv": self.post(
+                "/api/equipment/upload/", self.text.encode(), content_type="text/csv"
+            ),
+            "gzip text/csv": self.post(
+                "/api/equipment/upload/", gzip.compress(self.text.encode()),
+                content_type="text/csv", headers={"Content-Encoding": "gzip"},
+            ),
+        }
+        expected = summarize_csv(csv_file(self.text))
+        for name, request in requests.items():
+            with self.subTest(name):
+                response = self.upload(request)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(json.loads(response.content), expected)
+        self.assertEqual(EquipmentUpload.objects.count(), 3)
+
+    def test_invalid_file(self):
+        request = self.post(
+            "/api/equipment/upload/", (CSV_HEADER + "A,Pump,x,2,3\n").encode(), content_type="text/csv"
+        )
+        response = self.upload(request)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(json.loads(response.content), {"error": "CSV contains invalid numeric values"})
+
+    def test_async_flag_queues_a_job(self):
+        requests = {
+            "query": self.post(
+                "/api/equipment/upload/?async=1", self.text.encode(), content_type="text/csv"
+            ),
+            "form": self.post(
+                "/api/equipment/upload/", {"file": csv_file(self.text), "async": "true"}
+            ),
+        }
+        with mock.patch.object(jobs, "get_executor") as executor:
+            for name, request in requests.items():
+                with self.subTest(name):
+                    response = self.upload(request)
+                    self.assertEqual(response.status_code, 202)
+                    job_id = json.loads(response.content)["job_id"]
+                    self.assertEqual(response["Location"], f"/api/equipment/jobs/{job_id}/")
+        self.assertEqual(executor.return_value.submit.call_count, 2)
+        self.assertEqual(UploadJob.objects.filter(state=UploadJob.STATE_QUEUED).count(), 2)
+        self.assertFalse(EquipmentUpload.objects.exists())
+
+
+@override_settings(EQUIPMENT_RETENTION=NO_AUTO_PRUNE, EQUIPMENT_REPORT_WAIT=0.05)
+class AsyncReportTests(TransactionTestCase):
+    def setUp(self):
+        report_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(report_dir.cleanup)
+        settings_override = override_settings(EQUIPMENT_REPORT_DIR=report_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user("owner", password="pw")
+        self.token = Token.objects.create(user=self.user)
+        self.upload, _ = create_upload(csv_file(make_csv(4)), self.user.pk)
+
+    def report(self, **headers):
+        request = AsyncRequestFactory().get(
+            f"/api/equipment/report/{self.upload.pk}/",
+            headers={"Authorization": f"Token {self.token.key}", **headers},
+        )
+        return async_to_sync(async_views.pdf_report)(request, upload_id=self.upload.pk)
+
+    def test_accepted_while_rendering(self):
+        with mock.patch.object(async_views, "request_report", return_value=Future()):
+            response = self.report()
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(json.loads(response.content), {"status": "rendering"})
+        self.assertEqual(response["Retry-After"], str(settings.EQUIPMENT_REPORT_RETRY_AFTER))
+
+    def test_rendered_report_and_matching_etag(self):
+        with mock.patch.object(reports, "get_executor", return_value=mock.Mock(submit=run_inline)):
+            response = self.report()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b"".join(response.streaming_content).startswith(b"%PDF"))
+        response.close()
+
+        response = self.report(**{"If-None-Match": response["ETag"]})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], reports.report_etag(self.upload.pk))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        caches["responses"].clear()
+        self.user = User.objects.create_user("owner", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def history_total(self):
+        return len(self.client.get("/api/equipment/history/").json())
+
+    def test_bump_always_replaces_the_version(self):
+        versions = {response_cache.version(self.user.pk)}
+        for _ in range(3):
+            response_cache.bump(self.user.pk)
+            versions.add(response_cache.version(self.user.pk))
+        self.assertEqual(len(versions), 4)
+
+    def test_saving_an_upload_invalidates_history(self):
+        self.assertEqual(self.history_total(), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            create_upload(csv_file(make_csv(3)), self.user.pk)
+        self.assertEqual(self.history_total(), 1)
+
+    def test_batch_upload_invalidates_history_in_the_requesting_process(self):
+        self.assertEqual(self.history_total(), 0)
+
+        # Stands in for a worker process: it writes the upload, but its
+        # signal's on_commit bump never runs here (TestCase never commits),
+        # as a worker's bump never reaches this process's cache.
+        def submit(function, owner_id, name, **source):
+            EquipmentUpload.objects.create(
+                owner_id=owner_id, total_equipment=1,
+                average_flowrate=1, average_pressure=1, average_temperature=1,
+                equipment_type_distribution={"Pump": 1},
+            )
+            return completed({"summary": {"total_equipment": 1}})
+
+        executor = mock.Mock(submit=submit)
+        with mock.patch.object(batch, "get_executor", return_value=executor), \
+                mock.patch.object(response_cache, "bump", wraps=response_cache.bump) as bump:
+            batch.ingest_files([csv_file(make_csv(1))], self.user.pk)
+        bump.assert_called_once_with(self.user.pk)
+        self.assertEqual(self.history_total(), 1)
+
+    def test_commands_warn_when_the_cache_is_process_local(self):
+        self.assertFalse(response_cache.reaches_other_processes())
+        stderr = StringIO()
+        with mock.patch(
+            "equipment.management.commands.prune_uploads.prune_uploads", return_value=2
+        ):
+            call_command("prune_uploads", stdout=StringIO(), stderr=stderr)
+        self.assertIn("process-local", stderr.getvalue())
+
+    def test_file_cache_is_shared(self):
+        with tempfile.TemporaryDirectory() as location:
+            file_caches = {
+                **LOCMEM_CACHES,
+                "responses": {
+                    "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                    "LOCATION": location,
+                },
+            }
+            with override_settings(CACHES=file_caches):
+                self.assertTrue(response_cache.reaches_other_processes())
+                before = response_cache.version(self.user.pk)
+                response_cache.bump(self.user.pk)
+                self.assertNotEqual(response_cache.version(self.user.pk), before)
+
+
+@override_settings(EQUIPMENT_RETENTION=NO_AUTO_PRUNE)
+class ReportTests(TestCase):
+    def setUp(self):
+        report_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(report_dir.cleanup)
+        settings_override = override_settings(EQUIPMENT_REPORT_DIR=report_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        executor = mock.patch.object(
+            reports, "get_executor", return_value=mock.Mock(submit=run_inline)
+        )
+        executor.start()
+        self.addCleanup(executor.stop)
+
+        self.user = User.objects.create_user("owner", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.uploads = []
+        for day in (1, 2, 3):
+            upload, _ = create_upload(csv_file(make_csv(day)), self.user.pk)
+            uploaded_at = datetime(2024, 5, day, 12, tzinfo=dt_timezone.utc)
+            EquipmentUpload.objects.filter(pk=upload.pk).update(uploaded_at=uploaded_at)
+            upload.refresh_from_db()
+            self.uploads.append(upload)
+
+    def export(self, query=""):
+        return self.client.get(f"/api/equipment/report/export/?{query}")
+
+    def archive_names(self, response):
+        data = b"".join(response.streaming_content)
+        with zipfile.ZipFile(BytesIO(data)) as archive:
+            return archive.namelist()
+
+    def test_report_for_an_upload(self):
+        upload = self.uploads[0]
+        response = self.client.get(f"/api/equipment/report/{upload.pk}/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertIn(reports.report_filename(upload), response["Content-Disposition"])
+        self.assertTrue(b"".join(response.streaming_content).startswith(b"%PDF"))
+
+        response = self.client.get(
+            f"/api/equipment/report/{upload.pk}/", HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_report_without_types(self):
+        upload, summary = create_upload(csv_file(CSV_HEADER + "A,,1,2,3\nB,,4,5,6\n"), self.user.pk)
+        self.assertEqual(summary["equipment_type_distribution"], {})
+
+        response = self.client.get(f"/api/equipment/report/{upload.pk}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b"".join(response.streaming_content).startswith(b"%PDF"))
+
+    def test_reports_are_private(self):
+        other = User.objects.create_user("other", password="pw")
+        self.client.force_authenticate(other)
+        response = self.client.get(f"/api/equipment/report/{self.uploads[0].pk}/")
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.export().status_code, 404)
+
+    def test_export_filters_by_time(self):
+        cases = {
+            "": self.uploads,
+            "since=2024-05-02T00:00:00": self.uploads[1:],
+            "until=2024-05-02T12:00:00Z": self.uploads[:1],
+            "since=2024-05-02T00:00:00%2B00:00&until=2024-05-03T00:00:00": self.uploads[1:2],
+        }
+        for query, expected in cases.items():
+            with self.subTest(query):
+                response = self.export(query)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    self.archive_names(response),
+                    [reports.report_filename(upload) for upload in expected],
+                )
+
+        self.assertEqual(self.export("since=2024-06-01T00:00:00").status_code, 404)
+
+    def test_export_rejects_invalid_times(self):
+        for param in ("since", "until"):
+            for value in ("yesterday", "2024-13-45T00:00:00"):
+                with self.subTest(param=param, value=value):
+                    response = self.export(f"{param}={value}")
+                    self.assertEqual(response.status_code, 400)
+                    self.assertEqual(
+                        response.json(), {"error": f"{param} must be an ISO 8601 datetime"}
+                    )
+
+
+def metrics_settings(**overrides):
+    return override_settings(
+        EQUIPMENT_INSTRUMENTATION={**settings.EQUIPMENT_INSTRUMENTATION, **overrides}
+    )
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class InstrumentationTests(TestCase):
+    def setUp(self):
+        caches["responses"].clear()
+        self.user = User.objects.create_user("owner", password="pw")
+
+    def test_server_timing_lists_phases(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get("/api/equipment/history/")
+
+        entries = dict(
+            entry.split(";dur=") for entry in response["Server-Timing"].split(", ")
+        )
+        self.assertIn("query", entries)
+        self.assertIn("total", entries)
+        self.assertGreaterEqual(float(entries["total"]), float(entries["query"]))
+
+    @metrics_settings(METRICS_TOKEN="secret")
+    def test_metrics_need_a_local_client_or_the_token(self):
+        cases = {
+            "local": ({}, 200),
+            "remote": ({"REMOTE_ADDR": "203.0.113.5"}, 403),
+            "remote with token": (
+                {"REMOTE_ADDR": "203.0.113.5", "HTTP_AUTHORIZATION": "Bearer secret"}, 200
+            ),
+            "remote with wrong token": (
+                {"REMOTE_ADDR": "203.0.113.5", "HTTP_AUTHORIZATION": "Bearer other"}, 403
+            ),
+        }
+        for name, (extra, status_code) in cases.items():
+            with self.subTest(name):
+                self.assertEqual(self.client.get("/metrics", **extra).status_code, status_code)
+
+    @metrics_settings(METRICS_ALLOWED_IPS=(), METRICS_TOKEN=None)
+    def test_metrics_without_a_token_are_refused(self):
+        response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer ")
+        self.assertEqual(response.status_code, 403)
+
+    @metrics_settings(METRICS=False)
+    def test_disabled_metrics_are_not_found(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 404)
+
+    def test_metrics_count_requests(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        client.get("/api/equipment/history/")
+
+        response = self.client.get("/metrics")
+        self.assertEqual(response["Content-Type"], "text/plain; version=0.0.4; charset=utf-8")
+        body = response.content.decode()
+        self.assertIn("# TYPE equipment_requests_total counter", body)
+        self.assertRegex(
+            body, r'equipment_requests_total\{method="GET",status="200",view="[^"]*history[^"]*"\} \d+'
+        )
+        self.assertIn('equipment_phase_seconds_count{phase="query"}', body)
+
+
+@override_settings(EQUIPMENT_TOKEN_CACHE={"ENABLED": True, "MAX_ENTRIES": 2, "TTL": 300})
+class TokenCacheTests(TestCase):
+    url = "/api/equipment/cache/tokens/"
+
+    def setUp(self):
+        authentication.clear()
+        self.addCleanup(authentication.clear)
+        # Staff, since only staff may read the token cache stats.
+        self.user = User.objects.create_user("owner", password="pw", is_staff=True)
+        self.token = Token.objects.create(user=self.user)
+
+    def get(self, token=None):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {(token or self.token).key}")
+        return client.get(self.url)
+
+    def test_stats_are_for_staff_only(self):
+        self.user.is_staff = False
+        self.user.save()
+        self.assertEqual(self.get().status_code, 403)
+
+    def test_hits_need_no_query(self):
+        self.assertEqual(self.get().status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get().status_code, 200)
+
+    def test_logout_revokes_the_cached_token(self):
+        self.get()
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        self.assertEqual(client.post("/api/token/logout/").status_code, 204)
+        self.assertEqual(self.get().status_code, 401)
+
+    def test_deactivated_users_are_refused(self):
+        self.get()
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.get().status_code, 401)
+
+    def test_deleted_users_are_refused(self):
+        self.get()
+        key = self.token.key
+        self.user.delete()
+        self.assertIsNone(authentication.get(key))
+
+    def test_entries_expire(self):
+        self.get()
+        with mock.patch("time.monotonic", return_value=time.monotonic() + 301):
+            with self.assertNumQueries(1):
+                self.assertEqual(self.get().status_code, 200)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        tokens = [self.token] + [
+            Token.objects.create(user=User.objects.create_user(f"user{i}", password="pw", is_staff=True))
+            for i in range(2)
+        ]
+        self.get(tokens[0])
+        self.get(tokens[1])
+        self.get(tokens[0])
+        self.get(tokens[2])
+
+        self.assertEqual(authentication.stats()["entries"], 2)
+        self.assertIsNotNone(authentication.get(tokens[0].key))
+        self.assertIsNone(authentication.get(tokens[1].key))
+
+
+class RetentionTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user("owner", password="pw")
+        self.other = User.objects.create_user("other", password="pw")
+        self.now = timezone.now()
+
+    def make_upload(self, owner, age):
+        upload = EquipmentUpload.objects.create(
+            owner=owner, total_equipment=1,
+            average_flowrate=1, average_pressure=1, average_temperature=1,
+            equipment_type_distribution={"Pump": 1},
+        )
+        EquipmentUpload.objects.filter(pk=upload.pk).update(uploaded_at=self.now - age)
+        return upload.pk
+
+    def remaining(self, owner):
+        return set(EquipmentUpload.objects.filter(owner=owner).values_list("id", flat=True))
+
+    @override_settings(EQUIPMENT_RETENTION={**NO_AUTO_PRUNE, "KEEP_LATEST": 3, "MAX_AGE_DAYS": None})
+    def test_keeps_the_latest_uploads_per_owner(self):
+        ages = [timedelta(hours=hours) for hours in (5, 4, 3, 2, 1)]
+        owned = [self.make_upload(self.owner, age) for age in ages]
+        # These share owned[3]'s instant, which falls on the boundary; ids break the tie.
+        tied = [self.make_upload(self.owner, timedelta(hours=2)) for _ in range(2)]
+        others = [self.make_upload(self.other, age) for age in ages[:3]]
+
+        self.assertEqual(prune_uploads(batch_size=2), 4)
+
+        self.assertEqual(self.remaining(self.owner), {owned[4], tied[0], tied[1]})
+        self.assertEqual(self.remaining(self.other), set(others))
+
+    @override_settings(EQUIPMENT_RETENTION={**NO_AUTO_PRUNE, "KEEP_LATEST": 3, "MAX_AGE_DAYS": None})
+    def test_only_the_given_owners_are_trimmed(self):
+        owned = [self.make_upload(self.owner, timedelta(hours=hours)) for hours in range(4)]
+        others = [self.make_upload(self.other, timedelta(hours=hours)) for hours in range(4)]
+
+        self.assertEqual(prune_uploads(owner_ids=[self.owner.pk]), 1)
+
+        self.assertEqual(self.remaining(self.owner), set(owned[:3]))
+        self.assertEqual(self.remaining(self.other), set(others))
+
+    @override_settings(EQUIPMENT_RETENTION={**NO_AUTO_PRUNE, "KEEP_LATEST": None, "MAX_AGE_DAYS": 30})
+    def test_removes_uploads_past_the_age_cutoff(self):
+        recent = self.make_upload(self.owner, timedelta(days=29))
+        self.make_upload(self.owner, timedelta(days=31))
+        others_recent = self.make_upload(self.other, timedelta(days=1))
+        self.make_upload(self.other, timedelta(days=365))
+
+        self.assertEqual(prune_uploads(owner_ids=[self.owner.pk]), 2)
+
+        self.assertEqual(self.remaining(self.owner), {recent})
+        self.assertEqual(self.remaining(self.other), {others_recent})
+
+
+@override_settings(CACHES=LOCMEM_CACHES, EQUIPMENT_RETENTION=NO_AUTO_PRUNE)
+class AggregateTests(TestCase):
+    def setUp(self):
+        caches["responses"].clear()
+        self.user = User.objects.create_user("owner", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.texts = [make_csv(5), make_csv(8, types=("Pump", "Mixer")), make_csv(3)]
+        self.uploads = [create_upload(csv_file(text), self.user.pk)[0] for text in self.texts]
+
+    def aggregate(self, query=""):
+        return self.client.get(f"/api/equipment/aggregate/?{query}")
+
+    def test_matches_one_combined_upload(self):
+        combined_text = self.texts[0] + "".join(text[len(CSV_HEADER):] for text in self.texts[1:])
+        other = User.objects.create_user("other", password="pw")
+        combined, _ = create_upload(csv_file(combined_text), other.pk)
+        expected = UploadStatistics.from_dict(combined.statistics).describe()
+
+        body = self.aggregate().json()
+
+        self.assertEqual(body["uploads"], [upload.pk for upload in self.uploads])
+        self.assertEqual(body["total_equipment"], 16)
+        self.assertEqual(body["types"].keys(), expected["types"].keys())
+        for metrics, expected_metrics in [
+            (body["metrics"], expected["metrics"]),
+            *((body["types"][name], expected["types"][name]) for name in expected["types"]),
+        ]:
+            for key, metric in expected_metrics.items():
+                self.assertEqual(metrics[key]["count"], metric["count"])
+                self.assertAlmostEqual(metrics[key]["mean"], metric["mean"])
+                self.assertAlmostEqual(metrics[key]["variance"], metric["variance"])
+
+    def test_ids_select_uploads(self):
+        first, _, last = self.uploads
+        body = self.aggregate(f"ids={last.pk},{first.pk}").json()
+        self.assertEqual(body["uploads"], [first.pk, last.pk])
+        self.assertEqual(body["total_equipment"], 8)
+
+    def test_foreign_and_missing_ids_are_ignored(self):
+        other = User.objects.create_user("other", password="pw")
+        foreign, _ = create_upload(csv_file(make_csv(4)), other.pk)
+        missing = max(upload.pk for upload in self.uploads) + 100
+
+        body = self.aggregate(f"ids={self.uploads[0].pk},{foreign.pk},{missing}").json()
+        self.assertEqual(body["uploads"], [self.uploads[0].pk])
+
+        response = self.aggregate(f"ids={foreign.pk},{missing}")
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {"error": "No uploads found"})
+
+    def test_invalid_ids(self):
+        response = self.aggregate("ids=1,x")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json(), {"error": "ids must be a comma-separated list of upload ids"}
+        )
+
+    def test_uploads_without_statistics_are_skipped(self):
+        legacy = EquipmentUpload.objects.create(
+            owner=self.user, total_equipment=1,
+            average_flowrate=1, average_pressure=1, average_temperature=1,
+            equipment_type_distribution={"Pump": 1},
+        )
+        body = self.aggregate().json()
+        self.assertEqual(body["skipped_uploads"], [legacy.pk])
+        self.assertEqual(body["total_equipment"], 16)
+
+        self.assertEqual(self.aggregate(f"ids={legacy.pk}").status_code, 404)
+
+
+class LegacyUploadTests(TestCase):
+    def make_unowned_upload(self):
+        return EquipmentUpload.objects.create(
+            total_equipment=1, average_flowrate=1, average_pressure=1, average_temperature=1,
+            equipment_type_distribution={"Pump": 1},
+        )
+
+    def test_assigns_to_the_only_user(self):
+        user = User.objects.create_user("owner", password="pw")
+        upload = self.make_unowned_upload()
+
+        call_command("assign_legacy_uploads", stdout=StringIO())
+
+        upload.refresh_from_db()
+        self.assertEqual(upload.owner, user)
+
+    def test_needs_an_owner_when_there_are_several_users(self):
+        User.objects.create_user("first", password="pw")
+        second = User.objects.create_user("second", password="pw")
+        upload = self.make_unowned_upload()
+
+        with self.assertRaises(CommandError):
+            call_command("assign_legacy_uploads", stdout=StringIO())
+        with override_settings(EQUIPMENT_LEGACY_UPLOAD_OWNER="second"):
+            call_command("assign_legacy_uploads", stdout=StringIO())
+
+        upload.refresh_from_db()
+        self.assertEqual(upload.owner, second)
+
+
+class LegacyUploadMigrationTests(TransactionTestCase):
+    before = [("equipment", "0009_uploadcacheentry_upload_cascade")]
+    after = [("equipment", "0010_assign_legacy_uploads")]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def make_unowned_upload(self, apps):
+        return apps.get_model("equipment", "EquipmentUpload").objects.create(
+            total_equipment=1, average_flowrate=1, average_pressure=1, average_temperature=1,
+            equipment_type_distribution={"Pump": 1},
+        )
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_assigns_to_the_named_or_only_user(self):
+        for username, users in ((None, ["only"]), ("second", ["first", "second"])):
+            with self.subTest(username=username):
+                apps = self.migrate(self.before)
+                User = apps.get_model("auth", "User")
+                User.objects.all().delete()
+                for name in users:
+                    User.objects.create(username=name)
+                upload = self.make_unowned_upload(apps)
+
+                with mock.patch.dict("os.environ", {"EQUIPMENT_LEGACY_UPLOAD_OWNER": username or ""}):
+                    apps = self.migrate(self.after)
+
+                upload = apps.get_model("equipment", "EquipmentUpload").objects.get(pk=upload.pk)
+                self.assertEqual(upload.owner.username, username or "only")
+
+    def test_leaves_uploads_when_the_owner_is_unknown(self):
+        apps = self.migrate(self.before)
+        User = apps.get_model("auth", "User")
+        User.objects.create(username="first")
+        User.objects.create(username="second")
+        upload = self.make_unowned_upload(apps)
+
+        with mock.patch.dict("os.environ", {"EQUIPMENT_LEGACY_UPLOAD_OWNER": ""}), \
+                self.assertLogs("equipment.migrations.0010_assign_legacy_uploads", "WARNING"):
+            apps = self.migrate(self.after)
+
+        upload = apps.get_model("equipment", "EquipmentUpload").objects.get(pk=upload.pk)
+        self.assertIsNone(upload.owner)
+
+
+class BenchmarkDataTests(TestCase):
+    def test_frames_are_reproducible(self):
+        pd.testing.assert_frame_equal(
+            generate_frame(500, seed=3, types=8, invalid_share=0.05),
+            generate_frame(500, seed=3, types=8, invalid_share=0.05),
+        )
+
+    def test_invalid_rows_are_rejected_on_upload(self):
+        valid = generate_frame(200, seed=1, types=8)
+        self.assertEqual(summarize_csv(csv_file(valid.to_csv(index=False)))["total_equipment"], 200)
+        self.assertEqual(len(valid["Type"].unique()), 8)
+
+        invalid = generate_frame(200, seed=1, invalid_share=0.5)
+        with self.assertRaisesMessage(CSVIngestError, "CSV contains invalid numeric values"):
+            summarize_csv(csv_file(invalid.to_csv(index=False)))
@@ -0,0 +1,138 @@
+import hashlib
+import threading
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.db.models import F
+from django.utils import timezone
+
+from . import instrumentation
+from .models import UploadCacheEntry
+
+_lock = threading.Lock()
+# (owner_id, "hits" | "misses") -> lookups in this process.
+_counters = Counter()
+_stores_since_evict = 0
+
+
+def _config():
+    return settings.EQUIPMENT_UPLOAD_CACHE
+
+
+def enabled():
+    return _config().get("ENABLED", True)
+
+
+def _count(owner_id, name):
+    with _lock:
+        _counters[owner_id, name] += 1
+    instrumentation.increment(
+        instrumentation.UPLOAD_CACHE_TOTAL, result="hit" if name == "hits" else "miss"
+    )
+
+
+def stats(owner_id):
+    """Hits and misses of ``owner_id``'s uploads in this process, and their cached files."""
+    with _lock:
+        hits, misses = _counters[owner_id, "hits"], _counters[owner_id, "misses"]
+    lookups = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / lookups if lookups else 0.0,
+        "entries": UploadCacheEntry.objects.filter(owner_id=owner_id).count(),
+    }
+
+
+def hash_file(uploaded_file):
+    digest = hashlib.sha256()
+    for block in uploaded_file.chunks():
+        digest.update(block)
+    uploaded_file.seek(0)
+    return digest.hexdigest()
+
+
+def _fresh_entries():
+    entries = UploadCacheEntry.objects.all()
+    max_age = _config().get("MAX_AGE")
+    if max_age is not None:
+        entries = entries.filter(created_at__gte=timezone.now() - timedelta(seconds=max_age))
+    return entries
+
+
+def lookup(owner_id, content_hash):
+    """The entry for ``content_hash``, with its upload loaded, or None."""
+    entry = (
+        _fresh_entries()
+        .select_related("upload")
+        .filter(owner_id=owner_id, content_hash=content_hash)
+        .first()
+    )
+
+    if entry is None:
+        _count(owner_id, "misses")
+        return None
+
+    _count(owner_id, "hits")
+    UploadCacheEntry.objects.filter(pk=entry.pk).update(
+        hit_count=F("hit_count") + 1,
+        last_used_at=timezone.now(),
+    )
+    return entry
+
+
+def attach(entry, upload):
+    """Point ``entry`` at ``upload``, the newest copy and so the last one retention deletes."""
+    UploadCacheEntry.objects.filter(pk=entry.pk).update(upload=upload)
+
+
+def store(owner_id, content_hash, upload, summary):
+    try:
+        UploadCacheEntry.objects.update_or_create(
+            owner_id=owner_id,
+            content_hash=content_hash,
+            defaults={
+                "upload": upload,
+                "summary": summary,
+                "created_at": timezone.now(),
+                "last_used_at": timezone.now(),
+                "hit_count": 0,
+            },
+        )
+    except IntegrityError:
+        # A concurrent upload of the same file stored it first.
+        pass
+
+    if _evict_due():
+        evict()
+
+
+def _evict_due():
+    """True on every EVICT_EVERY-th store in this process."""
+    global _stores_since_evict
+    with _lock:
+        _stores_since_evict += 1
+        if _stores_since_evict < _config().get("EVICT_EVERY", 1):
+            return False
+        _stores_since_evict = 0
+        return True
+
+
+def evict():
+    config = _config()
+
+    max_age = config.get("MAX_AGE")
+    if max_age is not None:
+        cutoff = timezone.now() - timedelta(seconds=max_age)
+        UploadCacheEntry.objects.filter(created_at__lt=cutoff).delete()
+
+    max_entries = config.get("MAX_ENTRIES")
+    if max_entries is not None:
+        excess = UploadCacheEntry.objects.count() - max_entries
+        if excess > 0:
+            stale_ids = list(
+                UploadCacheEntry.objects.order_by("last_used_at").values_list("id", flat=True)[:excess]
+            )
+            UploadCacheEntry.objects.filter(id__in=stale_ids).delete()
@@ -0,0 +1,136 @@
+"""
+Resumable uploads.
+
+A client creates a session for a file of known size, PUTs it in chunks
+(each with a ``Content-Range: bytes start-end/size`` header) and then
+completes the session with the file's SHA-256, at which point it is
+ingested like a regular upload. After a dropped connection the client asks
+for the session's offset and carries on from there. Chunks are written to
+EQUIPMENT_UPLOAD_SESSION_DIR; sessions untouched for
+EQUIPMENT_UPLOAD_SESSION_MAX_AGE seconds are discarded.
+"""
+
+import hashlib
+import re
+import shutil
+import tempfile
+import uuid
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import UploadSession
+
+CONTENT_RANGE = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+
+COPY_BLOCK_SIZE = 1024 * 1024
+
+
+class UploadSessionError(Exception):
+    pass
+
+
+class OffsetMismatch(UploadSessionError):
+    def __init__(self, offset):
+        super().__init__(f"Expected a chunk starting at byte {offset}")
+        self.offset = offset
+
+
+def _session_dir():
+    session_dir = Path(settings.EQUIPMENT_UPLOAD_SESSION_DIR)
+    session_dir.mkdir(parents=True, exist_ok=True)
+    return session_dir
+
+
+def expire_sessions():
+    cutoff = timezone.now() - timedelta(seconds=settings.EQUIPMENT_UPLOAD_SESSION_MAX_AGE)
+    # QuerySet.delete() sends post_delete per session, so signals.py
+    # removes their files.
+    return UploadSession.objects.filter(updated_at__lt=cutoff).delete()[0]
+
+
+def create_session(owner_id, file_name, size):
+    expire_sessions()
+
+    session_id = uuid.uuid4()
+    path = _session_dir() / f"{session_id.hex}.part"
+    path.touch()
+    return UploadSession.objects.create(
+        id=session_id,
+        owner_id=owner_id,
+        file_name=file_name,
+        file_path=str(path),
+        size=size,
+    )
+
+
+def parse_content_range(header, size):
+    """(start, length) from a Content-Range header for an upload of ``size`` bytes."""
+    match = CONTENT_RANGE.match(header.strip())
+    if match is None:
+        raise UploadSessionError("Content-Range must be 'bytes start-end/size'")
+
+    start, end, total = (int(value) for value in match.groups())
+    if total != size or end < start or end >= size:
+        raise UploadSessionError(f"Content-Range must lie within the {size}-byte upload")
+    return start, end - start + 1
+
+
+def append_chunk(session, start, length, stream):
+    """
+    Write ``length`` bytes read from ``stream`` at ``start`` and return the
+    session's new offset. A chunk the session already has (a retried
+    request) is accepted without being written again.
+    """
+    max_size = settings.EQUIPMENT_UPLOAD_CHUNK_MAX_SIZE
+    if length > max_size:
+        raise UploadSessionError(f"Chunks cannot exceed {max_size // (1024 * 1024)}MB")
+
+    # The chunk is received in full before the session row is locked, so a
+    # slow client never holds up the database.
+    with tempfile.TemporaryFile(dir=_session_dir()) as chunk:
+        received = 0
+        while stream is not None and received < length:
+            block = stream.read(min(COPY_BLOCK_SIZE, length - received))
+            if not block:
+                break
+            chunk.write(block)
+            received += len(block)
+        if received != length:
+            raise UploadSessionError("Chunk is shorter than its Content-Range")
+        chunk.seek(0)
+
+        with transaction.atomic():
+            current = UploadSession.objects.select_for_update().get(pk=session.pk)
+            if start + length <= current.offset:
+                return current.offset
+            if start != current.offset:
+                raise OffsetMismatch(current.offset)
+
+            with open(current.file_path, "r+b") as part:
+                part.seek(start)
+                shutil.copyfileobj(chunk, part, COPY_BLOCK_SIZE)
+                part.truncate()
+
+            current.offset = start + length
+            current.save(update_fields=["offset", "updated_at"])
+            return current.offset
+
+
+def verify_session(session, sha256):
+    """Check that the whole file has arrived and matches ``sha256`` (hex)."""
+    if session.offset != session.size:
+        raise UploadSessionError(
+            f"Upload incomplete: {session.offset} of {session.size} bytes received"
+        )
+
+    digest = hashlib.sha256()
+    with open(session.file_path, "rb") as part:
+        for block in iter(lambda: part.read(COPY_BLOCK_SIZE), b""):
+            digest.update(block)
+
+    if digest.hexdigest() != (sha256 or "").strip().lower():
+        raise UploadSessionError("Checksum does not match the uploaded data")
@@ -1,9 +1,54 @@
+from django.conf import settings
 from django.urls import path
-from .views import CSVUploadView, UploadHistoryView, PDFReportView, SignupView
+
+from . import async_views
+from .views import (
+    CSVUploadView,
+    BatchUploadView,
+    SummaryUploadView,
+    UploadHistoryView,
+    PDFReportView,
+    ReportExportView,
+    SignupView,
+    TokenCacheStatsView,
+    UploadAggregateView,
+    UploadCacheStatsView,
+    UploadStatisticsView,
+    UploadJobView,
+    UploadSessionCompleteView,
+    UploadSessionListView,
+    UploadSessionView,
+)
 
 urlpatterns = [
     path("upload/", CSVUploadView.as_view(), name="upload_csv"),
+    path("upload/batch/", BatchUploadView.as_view(), name="upload_batch"),
+    path("upload/summary/", SummaryUploadView.as_view(), name="upload_summary"),
     path("history/", UploadHistoryView.as_view(), name="upload_history"),
     path("report/", PDFReportView.as_view(), name="pdf_report"),
+    path("report/<int:upload_id>/", PDFReportView.as_view(), name="upload_report"),
+    path("report/export/", ReportExportView.as_view(), name="report_export"),
     path("signup/", SignupView.as_view(), name="signup"),
+    path("jobs/<uuid:job_id>/", UploadJobView.as_view(), name="upload_job"),
+    path("uploads/sessions/", UploadSessionListView.as_view(), name="upload_sessions"),
+    path("uploads/sessions/<uuid:session_id>/", UploadSessionView.as_view(), name="upload_session"),
+    path(
+        "uploads/sessions/<uuid:session_id>/complete/",
+        UploadSessionCompleteView.as_view(),
+        name="upload_session_complete",
+    ),
+    path("uploads/<int:upload_id>/statistics/", UploadStatisticsView.as_view(), name="upload_statistics"),
+    path("aggregate/", UploadAggregateView.as_view(), name="upload_aggregate"),
+    path("cache/", UploadCacheStatsView.as_view(), name="upload_cache_stats"),
+    path("cache/tokens/", TokenCacheStatsView.as_view(), name="token_cache_stats"),
 ]
+
+if settings.EQUIPMENT_ASYNC_VIEWS:
+    # Same routes and names, served by the async views; Django resolves the
+    # first match, so these go in front of the DRF views.
+    urlpatterns = [
+        path("upload/", async_views.upload_csv, name="upload_csv"),
+        path("history/", async_views.upload_history, name="upload_history"),
+        path("report/", async_views.pdf_report, name="pdf_report"),
+        path("report/<int:upload_id>/", async_views.pdf_report, name="upload_report"),
+    ] + urlpatterns
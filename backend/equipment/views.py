@@ -1,126 +1,538 @@
-from django.http import HttpResponse
-from django.db import transaction
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import inch
-from reportlab.platypus import Table, TableStyle
-from reportlab.lib import colors
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.core.files import File
+from django.http import FileResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date
 
 from rest_framework.views import APIView
 from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+
+from .parsers import CSVBodyParser
+from .serializers import (
+    BatchUploadSerializer,
+    CSVUploadSerializer,
+    SummaryUploadSerializer,
+    UploadSessionSerializer,
+)
+from .models import EquipmentUpload, UploadJob, UploadSession
+from .batch import ingest_files
+from .ingest import CSVIngestError, combine_summaries
+from .instrumentation import phase
+from .jobs import enqueue_file, enqueue_upload
+from .pagination import PAGE_FORMAT, keyset_page, page_etag
+from .reports import (
+    ReportRenderError,
+    open_report,
+    report_etag,
+    report_filename,
+    request_report,
+    stream_report_archive,
+)
+from .stats import UploadStatistics
+from .retention import schedule_prune
+from .services import aggregate_uploads, create_summary_upload, ingest_upload
+from .upload_sessions import (
+    OffsetMismatch,
+    UploadSessionError,
+    append_chunk,
+    create_session,
+    parse_content_range,
+    verify_session,
+)
+from . import authentication, response_cache, upload_cache
 
-from .serializers import CSVUploadSerializer
-from .models import EquipmentUpload
+class CSVUploadView(APIView):
+    parser_classes = [MultiPartParser, CSVBodyParser]
+    permission_classes = [IsAuthenticated]
 
-import pandas as pd
+    def post(self, request):
+        with phase("multipart"):
+            data = request.data
+        serializer = CSVUploadSerializer(data=data)
 
-class CSVUploadView(APIView):
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        csv_file = serializer.validated_data["file"]
+
+        if _wants_async(request.query_params, request.data):
+            job = enqueue_upload(csv_file, request.user.pk)
+            response = Response(_job_payload(job), status=status.HTTP_202_ACCEPTED)
+            response["Location"] = reverse("upload_job", args=[job.pk])
+            return response
+
+        try:
+            summary = ingest_upload(csv_file, request.user.pk)
+        except CSVIngestError as e:
+            return Response(
+                {"error": str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        schedule_prune(request.user.pk)
+
+        return Response(summary, status=status.HTTP_200_OK)
+
+
+class SummaryUploadView(APIView):
+    """An upload summarized by the client; only the summary is sent, not the rows."""
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = SummaryUploadSerializer(data=request.data)
+
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = dict(serializer.validated_data)
+        statistics = data.pop("statistics", None)
+        summary = create_summary_upload(data, statistics, request.user.pk)
+
+        schedule_prune(request.user.pk)
+
+        return Response(summary, status=status.HTTP_200_OK)
+
+
+class BatchUploadView(APIView):
     parser_classes = [MultiPartParser]
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
-        serializer = CSVUploadSerializer(data=request.data)
+        serializer = BatchUploadSerializer(data=request.data)
 
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        csv_file = serializer.validated_data["file"]
+        results = [None] * len(serializer.validated_data["files"])
+        valid_files = []
+
+        for index, csv_file in enumerate(serializer.validated_data["files"]):
+            file_serializer = CSVUploadSerializer(data={"file": csv_file})
+            if file_serializer.is_valid():
+                valid_files.append((index, csv_file))
+            else:
+                results[index] = {"error": " ".join(file_serializer.errors["file"])}
+
+        if valid_files:
+            outcomes = ingest_files(
+                [csv_file for _, csv_file in valid_files], request.user.pk
+            )
+            for (index, _), outcome in zip(valid_files, outcomes):
+                results[index] = outcome
+            schedule_prune(request.user.pk)
+
+        files = []
+        for csv_file, result in zip(serializer.validated_data["files"], results):
+            files.append({"name": csv_file.name, **result})
+
+        combined = combine_summaries([item["summary"] for item in files if "summary" in item])
+
+        return Response({"files": files, "combined": combined}, status=status.HTTP_200_OK)
+
+
+def _wants_async(query_params, data):
+    flag = query_params.get("async") or data.get("async") or ""
+    return str(flag).lower() in ("1", "true", "yes")
+
+
+def _job_payload(job):
+    return {
+        "job_id": str(job.pk),
+        "state": job.state,
+        "progress": job.progress,
+        "rows_processed": job.rows_processed,
+        "summary": job.summary,
+        "error": job.error or None,
+        "created_at": job.created_at.strftime("%d %b %Y, %I:%M %p UTC"),
+    }
+
+
+class UploadJobView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        job = UploadJob.objects.filter(pk=job_id, owner=request.user).first()
+
+        if not job:
+            return Response(
+                {"error": "Job not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        return Response(_job_payload(job), status=status.HTTP_200_OK)
+
+
+def _session_payload(session):
+    return {
+        "session_id": str(session.pk),
+        "file_name": session.file_name,
+        "size": session.size,
+        "offset": session.offset,
+        "chunk_size": settings.EQUIPMENT_UPLOAD_CHUNK_MAX_SIZE,
+    }
+
+
+def _session_not_found():
+    return Response(
+        {"error": "Upload session not found"},
+        status=status.HTTP_404_NOT_FOUND
+    )
+
+
+class UploadSessionListView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = UploadSessionSerializer(data=request.data)
+
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        session = create_session(
+            request.user.pk,
+            serializer.validated_data["file_name"],
+            serializer.validated_data["size"],
+        )
+
+        response = Response(_session_payload(session), status=status.HTTP_201_CREATED)
+        response["Location"] = reverse("upload_session", args=[session.pk])
+        return response
+
+
+class UploadSessionView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, session_id):
+        session = UploadSession.objects.filter(pk=session_id, owner=request.user).first()
+        if not session:
+            return _session_not_found()
+
+        return Response(_session_payload(session), status=status.HTTP_200_OK)
+
+    def put(self, request, session_id):
+        session = UploadSession.objects.filter(pk=session_id, owner=request.user).first()
+        if not session:
+            return _session_not_found()
 
         try:
-            df = pd.read_csv(csv_file)
-        except Exception as e:
+            start, length = parse_content_range(
+                request.META.get("HTTP_CONTENT_RANGE", ""), session.size
+            )
+            with phase("store"):
+                session.offset = append_chunk(session, start, length, request.stream)
+        except OffsetMismatch as e:
             return Response(
-                {"error": f"Failed to read CSV: {str(e)}"}, 
+                {"error": str(e), "offset": e.offset},
+                status=status.HTTP_409_CONFLICT
+            )
+        except UploadSessionError as e:
+            return Response(
+                {"error": str(e)},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        if df.empty:
+        return Response(_session_payload(session), status=status.HTTP_200_OK)
+
+    def delete(self, request, session_id):
+        UploadSession.objects.filter(pk=session_id, owner=request.user).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class UploadSessionCompleteView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, session_id):
+        session = UploadSession.objects.filter(pk=session_id, owner=request.user).first()
+        if not session:
+            return _session_not_found()
+
+        try:
+            with phase("hash"):
+                verify_session(session, request.data.get("sha256"))
+        except UploadSessionError as e:
+            if session.offset == session.size:
+                # Every byte arrived but they are the wrong ones; resending
+                # chunks into this session cannot fix that.
+                session.delete()
             return Response(
-                {"error": "CSV file is empty"},
+                {"error": str(e)},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        required_columns = {"Type", "Flowrate", "Pressure", "Temperature"}
-        if not required_columns.issubset(df.columns):
+        if _wants_async(request.query_params, request.data):
+            job = enqueue_file(session.file_path, session.file_name, request.user.pk)
+            session.delete()
+            response = Response(_job_payload(job), status=status.HTTP_202_ACCEPTED)
+            response["Location"] = reverse("upload_job", args=[job.pk])
+            return response
+
+        try:
+            with open(session.file_path, "rb") as handle:
+                summary = ingest_upload(File(handle, name=session.file_name), request.user.pk)
+        except CSVIngestError as e:
             return Response(
-                {
-                    "error": "CSV must contain columns: Type, Flowrate, Pressure, Temperature"
-                },
-                status=status.HTTP_400_BAD_REQUEST,
+                {"error": str(e)},
+                status=status.HTTP_400_BAD_REQUEST
             )
+        finally:
+            session.delete()
+
+        schedule_prune(request.user.pk)
+
+        return Response(summary, status=status.HTTP_200_OK)
+
+
+def _parse_timestamp(value):
+    try:
+        parsed = parse_datetime(value)
+    except ValueError:
+        # Well formed, but not a valid date (e.g. month 13).
+        return None
+    if parsed is not None and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, dt_timezone.utc)
+    return parsed
+
+
+def _parse_ids(value):
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
+def _page_size(query_params):
+    page_size = min(
+        int(query_params.get("page_size", settings.EQUIPMENT_HISTORY_PAGE_SIZE)),
+        settings.EQUIPMENT_HISTORY_MAX_PAGE_SIZE,
+    )
+    if page_size < 1:
+        raise ValueError(page_size)
+    return page_size
+
+
+def _history_item(item):
+    return {
+        "uploaded_at": item.uploaded_at.strftime("%d %b %Y, %I:%M %p UTC"),
+        # For clients: the display string above is locale-dependent and
+        # only has minute resolution.
+        "uploaded_at_iso": item.uploaded_at.isoformat(),
+        "total_equipment": item.total_equipment,
+        "average_flowrate": item.average_flowrate,
+        "average_pressure": item.average_pressure,
+        "average_temperature": item.average_temperature,
+        "equipment_type_distribution": item.equipment_type_distribution,
+    }
+
+
+def _not_modified(request, etag, last_modified):
+    not_modified = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+    if not_modified is not None:
+        not_modified["ETag"] = etag
+    return not_modified
+
+
+def _set_history_headers(response, request, query_params, etag, last_modified, next_cursor):
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    if next_cursor:
+        query = query_params.copy()
+        query["cursor"] = next_cursor
+        response["Link"] = f'<{request.build_absolute_uri(request.path)}?{query.urlencode()}>; rel="next"'
+
+
+def history_page(request, query_params):
+    """
+    Return (page, None) for the history page ``query_params`` asks for, read
+    from the response cache or the database, or (None, response) when the
+    client's copy is current. Invalid parameters raise ValueError with the
+    message for the client. Shared by the sync and async history views.
+    """
+    try:
+        page_size = _page_size(query_params)
+    except ValueError:
+        raise ValueError("page_size must be a positive integer")
+
+    uploads = EquipmentUpload.objects.filter(owner=request.user)
+
+    since = query_params.get("since")
+    if since:
+        since_at = _parse_timestamp(since)
+        if since_at is None:
+            raise ValueError("since must be an ISO 8601 datetime")
+        uploads = uploads.filter(uploaded_at__gt=since_at)
+
+    cursor = query_params.get("cursor")
+    cache_key, page = response_cache.lookup("history", request.user.pk, PAGE_FORMAT, since, cursor, page_size)
+
+    if page is not None:
+        not_modified = _not_modified(request, page["etag"], page["last_modified"])
+        return (None, not_modified) if not_modified is not None else (page, None)
+
+    with phase("query"):
+        keys, next_cursor = keyset_page(uploads, cursor, page_size)
+
+    etag = page_etag(keys, next_cursor)
+    last_modified = max((uploaded_at for _, uploaded_at in keys), default=None)
+
+    not_modified = _not_modified(request, etag, last_modified)
+    if not_modified is not None:
+        return None, not_modified
+
+    with phase("query"):
+        rows = EquipmentUpload.objects.defer("statistics").in_bulk(
+            [upload_id for upload_id, _ in keys],
+        )
+
+    with phase("serialize"):
+        items = [_history_item(rows[upload_id]) for upload_id, _ in keys]
 
+    page = {
+        "etag": etag,
+        "last_modified": last_modified,
+        "next_cursor": next_cursor,
+        "items": items,
+    }
+    response_cache.store(cache_key, page)
+    return page, None
+
+
+class UploadHistoryView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
         try:
-            df["Flowrate"] = pd.to_numeric(df["Flowrate"], errors='coerce')
-            df["Pressure"] = pd.to_numeric(df["Pressure"], errors='coerce')
-            df["Temperature"] = pd.to_numeric(df["Temperature"], errors='coerce')
-            
-            if df[["Flowrate", "Pressure", "Temperature"]].isnull().any().any():
+            page, not_modified = history_page(request, request.query_params)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if not_modified is not None:
+            return not_modified
+
+        result = Response(page["items"], status=status.HTTP_200_OK)
+        _set_history_headers(
+            result,
+            request,
+            request.query_params,
+            page["etag"],
+            page["last_modified"],
+            page["next_cursor"],
+        )
+        return result
+
+
+class UploadAggregateView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        uploads = EquipmentUpload.objects.filter(owner=request.user)
+        upload_ids = None
+
+        ids = request.query_params.get("ids")
+        if ids:
+            try:
+                upload_ids = sorted(set(_parse_ids(ids)))
+            except ValueError:
                 return Response(
-                    {"error": "CSV contains invalid numeric values"},
+                    {"error": "ids must be a comma-separated list of upload ids"},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-        except Exception as e:
+            uploads = uploads.filter(id__in=upload_ids)
+
+        cache_key, aggregate = response_cache.lookup("aggregate", request.user.pk, upload_ids)
+        if aggregate is None:
+            aggregate = aggregate_uploads(uploads)
+            if aggregate is not None:
+                response_cache.store(cache_key, aggregate)
+
+        if aggregate is None:
             return Response(
-                {"error": f"Data validation error: {str(e)}"},
-                status=status.HTTP_400_BAD_REQUEST
+                {"error": "No uploads found"},
+                status=status.HTTP_404_NOT_FOUND
             )
 
-        summary = {
-            "total_equipment": int(len(df)),
-            "average_flowrate": float(df["Flowrate"].mean()),
-            "average_pressure": float(df["Pressure"].mean()),
-            "average_temperature": float(df["Temperature"].mean()),
-            "equipment_type_distribution": df["Type"].value_counts().to_dict(),
-        }
+        return Response(aggregate, status=status.HTTP_200_OK)
+
+
+class UploadStatisticsView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, upload_id):
+        cache_key, described = response_cache.lookup("statistics", request.user.pk, upload_id)
+        if described is not None:
+            return Response(described, status=status.HTTP_200_OK)
+
+        statistics = (
+            EquipmentUpload.objects.filter(pk=upload_id, owner=request.user)
+            .values_list("statistics", flat=True)
+            .first()
+        )
 
-        with transaction.atomic():
-            EquipmentUpload.objects.create(
-                total_equipment=summary["total_equipment"],
-                average_flowrate=summary["average_flowrate"],
-                average_pressure=summary["average_pressure"],
-                average_temperature=summary["average_temperature"],
-                equipment_type_distribution=summary["equipment_type_distribution"],
+        if statistics is None:
+            return Response(
+                {"error": "Upload not found"},
+                status=status.HTTP_404_NOT_FOUND
             )
 
-            uploads = EquipmentUpload.objects.order_by("-uploaded_at")
-            if uploads.count() > 5:
-                old_ids = list(uploads.values_list('id', flat=True)[5:])
-                if old_ids:
-                    EquipmentUpload.objects.filter(id__in=old_ids).delete()
+        if not statistics:
+            return Response(
+                {"error": "No statistics recorded for this upload"},
+                status=status.HTTP_404_NOT_FOUND
+            )
 
-        return Response(summary, status=status.HTTP_200_OK)
+        described = UploadStatistics.from_dict(statistics).describe()
+        response_cache.store(cache_key, described)
+        return Response(described, status=status.HTTP_200_OK)
 
 
-class UploadHistoryView(APIView):
+class UploadCacheStatsView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        uploads = EquipmentUpload.objects.order_by("-uploaded_at")[:5]
+        return Response(upload_cache.stats(request.user.pk), status=status.HTTP_200_OK)
+
+
+class TokenCacheStatsView(APIView):
+    # The cache is process-wide, so its numbers cover every user's requests.
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(authentication.stats(), status=status.HTTP_200_OK)
 
-        response = []
-        for item in uploads:
-            response.append(
-                {
-                    "uploaded_at": item.uploaded_at.strftime("%d %b %Y, %I:%M %p UTC"),
-                    "total_equipment": item.total_equipment,
-                    "average_flowrate": item.average_flowrate,
-                    "average_pressure": item.average_pressure,
-                    "average_temperature": item.average_temperature,
-                    "equipment_type_distribution": item.equipment_type_distribution,
-                }
-            )
 
-        return Response(response, status=status.HTTP_200_OK)
+def _report_response(report, upload, upload_id, etag):
+    response = FileResponse(
+        report,
+        as_attachment=True,
+        filename="equipment_report.pdf" if upload_id is None else report_filename(upload),
+        content_type="application/pdf",
+    )
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
+    return response
 
 
 class PDFReportView(APIView):
     permission_classes = [IsAuthenticated]
 
-    def get(self, request):
-        latest = EquipmentUpload.objects.order_by("-uploaded_at").first()
+    def get(self, request, upload_id=None):
+        uploads = EquipmentUpload.objects.filter(owner=request.user)
+
+        with phase("query"):
+            if upload_id is None:
+                latest = uploads.order_by("-uploaded_at").first()
+            else:
+                latest = uploads.filter(pk=upload_id).first()
 
         if not latest:
             return Response(
@@ -128,59 +540,84 @@ class PDFReportView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        response = HttpResponse(content_type="application/pdf")
-        response["Content-Disposition"] = 'attachment; filename="equipment_report.pdf"'
+        etag = report_etag(latest.pk)
 
-        c = canvas.Canvas(response, pagesize=A4)
-        width, height = A4
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            not_modified["ETag"] = etag
+            return not_modified
 
-        c.setFont("Helvetica-Bold", 18)
-        c.drawCentredString(width / 2, height - 50, "Chemical Equipment Report")
+        try:
+            with phase("render"):
+                report = open_report(latest, timeout=settings.EQUIPMENT_REPORT_WAIT)
+        except ReportRenderError as e:
+            return Response(
+                {"error": str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
 
-        uploaded_at = latest.uploaded_at.strftime("%d %b %Y, %I:%M %p UTC")
+        if report is None:
+            response = Response({"status": "rendering"}, status=status.HTTP_202_ACCEPTED)
+            response["Retry-After"] = str(settings.EQUIPMENT_REPORT_RETRY_AFTER)
+            return response
 
-        c.setFont("Helvetica", 11)
-        y = height - 100
+        return _report_response(report, latest, upload_id, etag)
 
-        c.drawString(50, y, f"Uploaded At: {uploaded_at}")
-        y -= 20
-        c.drawString(50, y, f"Total Equipment: {latest.total_equipment}")
-        y -= 20
-        c.drawString(50, y, f"Average Flowrate: {latest.average_flowrate:.2f}")
-        y -= 20
-        c.drawString(50, y, f"Average Pressure: {latest.average_pressure:.2f}")
-        y -= 20
-        c.drawString(50, y, f"Average Temperature: {latest.average_temperature:.2f}")
+class ReportExportView(APIView):
+    permission_classes = [IsAuthenticated]
 
-        y -= 40
-        c.setFont("Helvetica-Bold", 13)
-        c.drawString(50, y, "Equipment Type Distribution")
+    def get(self, request):
+        uploads = EquipmentUpload.objects.filter(owner=request.user)
 
-        table_data = [["Equipment Type", "Count"]]
-        for key, value in latest.equipment_type_distribution.items():
-            table_data.append([key, str(value)])
+        ids = request.query_params.get("ids")
+        if ids:
+            try:
+                uploads = uploads.filter(id__in=_parse_ids(ids))
+            except ValueError:
+                return Response(
+                    {"error": "ids must be a comma-separated list of upload ids"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
 
-        table = Table(table_data, colWidths=[3 * inch, 2 * inch])
-        table.setStyle(
-            TableStyle(
-                [
-                    ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
-                    ("GRID", (0, 0), (-1, -1), 1, colors.black),
-                    ("FONT", (0, 0), (-1, 0), "Helvetica-Bold"),
-                    ("ALIGN", (1, 1), (-1, -1), "CENTER"),
-                ]
+        for param, lookup in (("since", "uploaded_at__gte"), ("until", "uploaded_at__lt")):
+            value = request.query_params.get(param)
+            if value:
+                timestamp = _parse_timestamp(value)
+                if timestamp is None:
+                    return Response(
+                        {"error": f"{param} must be an ISO 8601 datetime"},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                uploads = uploads.filter(**{lookup: timestamp})
+
+        limit = settings.EQUIPMENT_REPORT_EXPORT_MAX_UPLOADS
+        uploads = list(uploads.order_by("uploaded_at", "id")[:limit + 1])
+
+        if not uploads:
+            return Response(
+                {"error": "No uploads found"},
+                status=status.HTTP_404_NOT_FOUND
             )
-        )
 
-        table.wrapOn(c, width, height)
-        table.drawOn(c, 50, y - (25 * len(table_data)))
+        if len(uploads) > limit:
+            return Response(
+                {"error": f"Cannot export more than {limit} reports at once"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        c.showPage()
-        c.save()
+        # Queue every render before streaming so they run in parallel; the
+        # archive is written in upload order as each one finishes.
+        reports = [(report_filename(upload), request_report(upload)) for upload in uploads]
 
+        response = StreamingHttpResponse(
+            stream_report_archive(reports),
+            content_type="application/zip",
+        )
+        response["Content-Disposition"] = 'attachment; filename="equipment_reports.zip"'
         return response
 
 from django.contrib.auth.models import User
+from rest_framework.authtoken.models import Token
 from rest_framework.permissions import AllowAny
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -214,4 +651,14 @@ class SignupView(APIView):
         return Response(
             {"message": "User created successfully"},
             status=status.HTTP_201_CREATED
-        )
\ No newline at end of file
+        )
+
+
+class LogoutView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        # Deleting the token also drops it from the authentication cache
+        # (see signals.py).
+        Token.objects.filter(key=request.auth.key).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
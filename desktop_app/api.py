@@ -1,9 +1,67 @@
+import gzip
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+
 import requests
+from requests import RequestException
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Server address; override with EQUIPMENT_SERVER_URL to use another backend.
+SERVER_URL = os.environ.get("EQUIPMENT_SERVER_URL", "http://127.0.0.1:8001").rstrip("/")
+BASE_URL = f"{SERVER_URL}/api/equipment"
+TOKEN_URL = f"{SERVER_URL}/api/token/"
+
+# (connect, read) timeouts in seconds. Uploads get a longer read timeout
+# because the server answers only after parsing the whole file.
+TIMEOUT = (5, 30)
+UPLOAD_TIMEOUT = (5, 300)
+
+# Idempotent requests are retried on connection errors and 502/503/504,
+# waiting 0.5, 1, 2... seconds (or the server's Retry-After) in between.
+# POSTs are only retried when the connection could not be made at all.
+RETRIES = 3
+RETRY_BACKOFF = 0.5
+RETRY_STATUSES = (502, 503, 504)
+
+POOL_SIZE = 4
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
 
-BASE_URL = "http://127.0.0.1:8001/api/equipment"
-TOKEN_URL = "http://127.0.0.1:8001/api/token/"
+# Files larger than this are compressed through a temporary file on disk.
+COMPRESS_SPOOL_SIZE = 16 * 1024 * 1024
+
+# Files larger than one chunk go through a resumable upload session: after a
+# dropped connection only the chunk in flight is sent again, up to
+# RESUME_ATTEMPTS times in a row.
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+RESUME_ATTEMPTS = 5
 
 _auth_token = None
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    """The process-wide session; its pooled keep-alive connections are shared by all windows."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=RETRIES,
+                backoff_factor=RETRY_BACKOFF,
+                status_forcelist=RETRY_STATUSES,
+                allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+            _session = requests.Session()
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
 
 def set_token(token):
     global _auth_token
@@ -14,31 +72,189 @@ def _auth_headers():
         raise Exception("Not authenticated")
     return {"Authorization": f"Token {_auth_token}"}
 
-def upload_csv(file_path):
-    url = f"{BASE_URL}/upload/"
+def request(method, url, auth=True, timeout=TIMEOUT, **kwargs):
+    """Send a request through the shared session, with the token unless ``auth`` is False."""
+    if auth:
+        kwargs["headers"] = {**_auth_headers(), **kwargs.get("headers", {})}
+    return get_session().request(method, url, timeout=timeout, **kwargs)
 
-    with open(file_path, "rb") as f:
-        response = requests.post(
-            url,
-            files={"file": f},
-            headers=_auth_headers(),
-        )
+def login(username, password):
+    response = request(
+        "POST", TOKEN_URL, auth=False, data={"username": username, "password": password}
+    )
+    response.raise_for_status()
+    token = response.json()["token"]
+    set_token(token)
+    return token
 
+def signup(username, password):
+    response = request(
+        "POST", f"{BASE_URL}/signup/", auth=False, data={"username": username, "password": password}
+    )
     response.raise_for_status()
     return response.json()
 
-def download_pdf(save_path):
-    url = f"{BASE_URL}/report/"
+def get_history(etag=None):
+    """(uploads, etag), or None when ``etag`` is still current."""
+    headers = {"If-None-Match": etag} if etag else {}
+    response = request("GET", f"{BASE_URL}/history/", headers=headers)
+    if response.status_code == 304:
+        return None
+    response.raise_for_status()
+    return response.json(), response.headers.get("ETag", "")
+
+def iter_history(page_size=100, limit=None):
+    """Yield uploads newest first, following the server's next-page links."""
+    url = f"{BASE_URL}/history/"
+    params = {"page_size": page_size}
+    count = 0
+    while url:
+        response = request("GET", url, params=params)
+        response.raise_for_status()
+        for item in response.json():
+            yield item
+            count += 1
+            if limit is not None and count >= limit:
+                return
+        # The next link already carries page_size and the cursor.
+        url = response.links.get("next", {}).get("url")
+        params = None
+
+def _gzip_file(file_path):
+    # mtime=0 and no embedded name keep the output identical for identical
+    # input, so the server recognises re-uploads of the same file.
+    spool = tempfile.SpooledTemporaryFile(max_size=COMPRESS_SPOOL_SIZE)
+    with open(file_path, "rb") as source, \
+            gzip.GzipFile(filename="", fileobj=spool, mode="wb", compresslevel=6, mtime=0) as target:
+        shutil.copyfileobj(source, target, 1024 * 1024)
+    spool.seek(0)
+    return spool
+
+def _sha256(f):
+    digest = hashlib.sha256()
+    for block in iter(lambda: f.read(1024 * 1024), b""):
+        digest.update(block)
+    f.seek(0)
+    return digest.hexdigest()
+
+def upload_csv(file_path, compress=True, progress=None):
+    """
+    Upload a CSV file and return the server's summary. ``progress`` is
+    called with (bytes sent, total bytes) as chunks of a large file arrive.
+    """
+    name = os.path.basename(file_path)
+
+    if compress and not name.endswith((".gz", ".zst")):
+        f = _gzip_file(file_path)
+        name += ".gz"
+    else:
+        f = open(file_path, "rb")
 
-    response = requests.get(
-        url,
-        headers=_auth_headers(),
+    with f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(0)
+        if size <= UPLOAD_CHUNK_SIZE:
+            response = request(
+                "POST", f"{BASE_URL}/upload/", files={"file": (name, f)}, timeout=UPLOAD_TIMEOUT
+            )
+        else:
+            response = _upload_in_chunks(f, name, size, progress)
+
+    response.raise_for_status()
+    return response.json()
+
+def _upload_in_chunks(f, name, size, progress):
+    sha256 = _sha256(f)
+
+    response = request("POST", f"{BASE_URL}/uploads/sessions/", json={"file_name": name, "size": size})
+    response.raise_for_status()
+    session = response.json()
+    session_url = f"{BASE_URL}/uploads/sessions/{session['session_id']}/"
+    chunk_size = min(UPLOAD_CHUNK_SIZE, session["chunk_size"])
+
+    offset = 0
+    failures = 0
+    while offset < size:
+        f.seek(offset)
+        chunk = f.read(chunk_size)
+        headers = {
+            "Content-Type": "application/octet-stream",
+            "Content-Range": f"bytes {offset}-{offset + len(chunk) - 1}/{size}",
+        }
+        try:
+            response = request("PUT", session_url, data=chunk, headers=headers, timeout=UPLOAD_TIMEOUT)
+            # 409: the server has a different offset than ours (an earlier
+            # attempt landed after all); its answer says where to resume.
+            if response.status_code != 409:
+                response.raise_for_status()
+            failures = 0
+        except (requests.ConnectionError, requests.Timeout):
+            failures += 1
+            if failures > RESUME_ATTEMPTS:
+                raise
+            time.sleep(RETRY_BACKOFF * 2 ** failures)
+            response = request("GET", session_url)
+            response.raise_for_status()
+
+        offset = response.json()["offset"]
+        if progress:
+            progress(offset, size)
+
+    return request(
+        "POST", f"{session_url}complete/", json={"sha256": sha256}, timeout=UPLOAD_TIMEOUT
     )
 
+def upload_summary(summary, statistics=None):
+    """Send a summary computed locally (see summarize.py) instead of the file itself."""
+    payload = {**summary, "statistics": statistics} if statistics else summary
+    response = request("POST", f"{BASE_URL}/upload/summary/", json=payload)
     response.raise_for_status()
+    return response.json()
+
+def download_pdf(save_path, max_wait=120):
+    url = f"{BASE_URL}/report/"
+    deadline = time.monotonic() + max_wait
+
+    while True:
+        response = request("GET", url, stream=True)
+        try:
+            response.raise_for_status()
+
+            # 202: the report is still being rendered on the server.
+            if response.status_code != 202:
+                _save_stream(response, save_path)
+                return
+        finally:
+            response.close()
+
+        if time.monotonic() >= deadline:
+            raise Exception("Timed out waiting for the report to be generated")
+        time.sleep(int(response.headers.get("Retry-After", 2)))
+
+def _save_stream(response, save_path):
+    # Written next to the target and renamed into place, so a failed
+    # download never leaves a truncated PDF behind.
+    directory = os.path.dirname(os.path.abspath(save_path))
+    fd, partial_path = tempfile.mkstemp(suffix=".part", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                f.write(chunk)
+        os.replace(partial_path, save_path)
+    except BaseException:
+        os.unlink(partial_path)
+        raise
 
-    with open(save_path, "wb") as f:
-        f.write(response.content)
+def logout():
+    # Revokes the token on the server; the local token is cleared either way.
+    try:
+        if _auth_token:
+            request("POST", f"{TOKEN_URL}logout/", timeout=(5, 5))
+    except RequestException:
+        pass
+    finally:
+        set_token(None)
 
 def get_auth_headers():
-    return _auth_headers()
\ No newline at end of file
+    return _auth_headers()
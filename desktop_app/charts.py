@@ -0,0 +1,281 @@
+"""
+Charts for the desktop app.
+
+Each chart keeps one matplotlib Figure and updates its artists in place
+rather than rebuilding the axes. Figures are rendered with Agg into an image
+that the widget paints; charts with many points are rendered on a worker
+thread so the window stays responsive. While a render is running, further
+updates and resizes are held back and applied together once it finishes.
+"""
+
+from datetime import datetime
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import matplotlib.dates as mdates
+from PyQt5 import QtWidgets
+from PyQt5.QtCore import QThread, QTimer, pyqtSignal
+from PyQt5.QtGui import QImage, QPainter
+
+PALETTE = ['#3498db', '#e74c3c', '#2ecc71', '#f39c12', '#9b59b6',
+           '#1abc9c', '#34495e', '#e67e22', '#95a5a6', '#d35400']
+OTHER_COLOR = '#bdc3c7'
+OTHER_LABEL = "Other"
+
+# Types beyond the largest TOP_N are shown as one "Other" bar.
+TOP_N = 12
+
+# Charts drawing at least this many points render on a worker thread.
+THREADED_RENDER_POINTS = 2000
+
+# Longer trends are reduced to this many points, keeping each bucket's
+# minimum and maximum so spikes stay visible.
+MAX_TREND_POINTS = 4000
+
+DPI = 100
+RESIZE_DELAY_MS = 50
+LABEL_MAX_LENGTH = 14
+
+
+def top_n(distribution, n=TOP_N):
+    """(type, count) pairs, largest first, with everything past ``n`` summed into "Other"."""
+    items = sorted(distribution.items(), key=lambda item: item[1], reverse=True)
+    # Folding a single type into "Other" would only hide its name.
+    if len(items) > n + 1:
+        items = items[:n] + [(OTHER_LABEL, sum(count for _, count in items[n:]))]
+    return items
+
+
+def downsample(x, y, max_points=MAX_TREND_POINTS):
+    """Reduce (x, y) to about ``max_points`` points by keeping each bucket's min and max."""
+    if len(x) <= max_points:
+        return x, y
+
+    buckets = max_points // 2
+    size = -(-len(x) // buckets)
+    padded = np.full(buckets * size, np.nan)
+    padded[:len(y)] = y
+    rows = padded.reshape(buckets, size)
+    # Buckets past the end of the data are all NaN; nanarg* rejects them.
+    filled = ~np.isnan(rows).all(axis=1)
+    offsets = np.arange(buckets)[filled] * size
+    low = offsets + np.nanargmin(rows[filled], axis=1)
+    high = offsets + np.nanargmax(rows[filled], axis=1)
+    indexes = np.unique(np.concatenate([low, high]))
+    return x[indexes], y[indexes]
+
+
+def render_image(canvas):
+    """Draw ``canvas`` and return its pixels as a QImage that owns its memory."""
+    canvas.draw()
+    pixels = np.asarray(canvas.buffer_rgba())
+    height, width = pixels.shape[:2]
+    return QImage(pixels.tobytes(), width, height, width * 4, QImage.Format_RGBA8888).copy()
+
+
+class RenderWorker(QThread):
+    finished = pyqtSignal(QImage)
+
+    def __init__(self, canvas):
+        super().__init__()
+        self.canvas = canvas
+
+    def run(self):
+        self.finished.emit(render_image(self.canvas))
+
+
+class ChartWidget(QtWidgets.QWidget):
+    """
+    Base class: subclasses create their artists once in __init__ and update
+    them in apply(data). Charts that can draw many points report how many
+    from point_count() so large renders move to a worker thread.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.figure = Figure(dpi=DPI)
+        self.figure.patch.set_facecolor('#ffffff')
+        self.canvas = FigureCanvasAgg(self.figure)
+
+        self.image = None
+        self.worker = None
+        self.data = None
+        self.data_changed = False
+        self.render_pending = False
+
+        # Resizes and updates arriving together are rendered once.
+        self.render_timer = QTimer(self)
+        self.render_timer.setSingleShot(True)
+        self.render_timer.setInterval(RESIZE_DELAY_MS)
+        self.render_timer.timeout.connect(self.render)
+
+    def apply(self, data):
+        """Update the figure's artists for ``data``; the base chart draws nothing."""
+
+    def point_count(self):
+        return 0
+
+    def set_data(self, data):
+        self.data = data
+        self.data_changed = True
+        self.render_timer.start(0)
+
+    def render(self):
+        if self.worker is not None:
+            # Picked up again in on_rendered.
+            self.render_pending = True
+            return
+        self.render_pending = False
+
+        if self.data_changed:
+            self.data_changed = False
+            self.apply(self.data)
+
+        ratio = self.devicePixelRatioF()
+        self.figure.set_dpi(DPI * ratio)
+        self.figure.set_size_inches(
+            max(self.width(), 1) / DPI, max(self.height(), 1) / DPI, forward=False
+        )
+
+        if self.point_count() >= THREADED_RENDER_POINTS:
+            self.worker = RenderWorker(self.canvas)
+            self.worker.finished.connect(self.on_rendered)
+            self.worker.start()
+        else:
+            self.show_image(render_image(self.canvas))
+
+    def on_rendered(self, image):
+        self.worker.wait()
+        self.worker = None
+        self.show_image(image)
+        if self.render_pending:
+            self.render_timer.start(0)
+
+    def show_image(self, image):
+        image.setDevicePixelRatio(self.devicePixelRatioF())
+        self.image = image
+        self.update()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.render_timer.start()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), self.palette().base())
+        if self.image is not None:
+            painter.drawImage(0, 0, self.image)
+
+    def wait(self):
+        if self.worker is not None:
+            self.worker.wait()
+
+
+class DistributionChart(ChartWidget):
+    """Bar chart of equipment counts per type, top TOP_N types plus "Other"."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.figure.subplots_adjust(left=0.1, right=0.98, top=0.88, bottom=0.36)
+        self.ax = self.figure.add_subplot(111)
+
+        slots = range(TOP_N + 1)
+        self.bars = self.ax.bar(slots, [0] * len(slots), edgecolor='white', linewidth=1.5)
+        self.counts = [
+            self.ax.text(0, 0, "", ha='center', va='bottom', fontsize=10, fontweight='bold')
+            for _ in slots
+        ]
+
+        self.ax.set_title("Equipment Type Distribution", fontsize=14, fontweight='bold', pad=15)
+        self.ax.set_ylabel("Count", fontsize=11, fontweight='600')
+        self.ax.set_xlabel("Equipment Type", fontsize=11, fontweight='600')
+        self.ax.tick_params(axis='x', rotation=45, labelsize=9)
+        self.ax.tick_params(axis='y', labelsize=9)
+        self.ax.grid(axis='y', alpha=0.3, linestyle='--')
+        self.ax.set_axisbelow(True)
+        self.apply({})
+
+    def apply(self, distribution):
+        distribution = distribution or {}
+        items = top_n(distribution)
+        collapsed = len(items) < len(distribution)
+
+        for index, (bar, label) in enumerate(zip(self.bars, self.counts)):
+            visible = index < len(items)
+            bar.set_visible(visible)
+            label.set_visible(visible)
+            if not visible:
+                continue
+
+            name, count = items[index]
+            bar.set_height(count)
+            bar.set_color(OTHER_COLOR if collapsed and index == len(items) - 1
+                          else PALETTE[index % len(PALETTE)])
+            bar.set_edgecolor('white')
+            label.set_position((index, count))
+            label.set_text(f"{int(count)}")
+
+        names = [
+            name if len(name) <= LABEL_MAX_LENGTH else name[:LABEL_MAX_LENGTH - 1] + "…"
+            for name, _ in items
+        ]
+        if collapsed:
+            names[-1] = f"{OTHER_LABEL} ({len(distribution) - len(items) + 1})"
+        self.ax.set_xticks(range(len(items)))
+        self.ax.set_xticklabels(names, ha='right', rotation_mode='anchor')
+        self.ax.set_xlim(-0.6, max(len(items), 1) - 0.4)
+        self.ax.set_ylim(0, max((count for _, count in items), default=1) * 1.15)
+
+
+TREND_METRICS = [
+    ("average_flowrate", "Flowrate", '#3498db'),
+    ("average_pressure", "Pressure", '#e74c3c'),
+    ("average_temperature", "Temperature", '#2ecc71'),
+]
+
+
+class TrendChart(ChartWidget):
+    """Average flowrate, pressure and temperature of each upload over time."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.figure.subplots_adjust(left=0.09, right=0.98, top=0.9, bottom=0.12, hspace=0.15)
+        self.axes = self.figure.subplots(len(TREND_METRICS), 1, sharex=True)
+        self.lines = []
+        self.drawn_points = 0
+
+        for ax, (_, label, color) in zip(self.axes, TREND_METRICS):
+            (line,) = ax.plot([], [], color=color, linewidth=1.2, marker='o', markersize=3)
+            ax.set_ylabel(label, fontsize=9, fontweight='600')
+            ax.tick_params(labelsize=8)
+            ax.grid(alpha=0.3, linestyle='--')
+            self.lines.append(line)
+
+        self.axes[0].set_title("Average Values per Upload", fontsize=12, fontweight='bold')
+        locator = mdates.AutoDateLocator()
+        self.axes[-1].xaxis.set_major_locator(locator)
+        self.axes[-1].xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
+
+    def apply(self, uploads):
+        uploads = sorted(uploads or [], key=lambda item: item["uploaded_at"])
+        x = np.asarray(mdates.date2num([item["uploaded_at"] for item in uploads]), dtype=float)
+
+        self.drawn_points = 0
+        for ax, line, (key, _, _) in zip(self.axes, self.lines, TREND_METRICS):
+            y = np.array([item[key] for item in uploads], dtype=float)
+            shown_x, shown_y = downsample(x, y)
+            line.set_data(shown_x, shown_y)
+            # Markers only help while the points can be told apart.
+            line.set_marker('o' if len(shown_x) <= 200 else '')
+            self.drawn_points += len(shown_x)
+            ax.relim()
+            ax.autoscale_view()
+
+    def point_count(self):
+        return self.drawn_points
+
+
+def parse_history_item(item):
+    """A history entry from the API with ``uploaded_at`` as a (UTC) datetime."""
+    return {**item, "uploaded_at": datetime.fromisoformat(item["uploaded_at_iso"])}
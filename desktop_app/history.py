@@ -2,25 +2,43 @@ from PyQt5 import QtWidgets, QtCore
 from PyQt5.QtCore import QThread, pyqtSignal
 from PyQt5.QtGui import QFont
 
-import requests
-from api import get_auth_headers
+from api import get_history, iter_history
+from charts import TrendChart, parse_history_item
 
-BASE_URL = "http://127.0.0.1:8001/api/equipment/history/"
+# Uploads plotted in the trend chart, newest first.
+TREND_MAX_UPLOADS = 10_000
 
 class HistoryLoadWorker(QThread):
-    finished = pyqtSignal(list)
+    finished = pyqtSignal(list, str)
+    not_modified = pyqtSignal()
     error = pyqtSignal(str)
+
+    def __init__(self, etag=None):
+        super().__init__()
+        self.etag = etag
     
     def run(self):
         try:
-            response = requests.get(
-                BASE_URL,
-                headers=get_auth_headers(),
-                timeout=10
-            )
-            response.raise_for_status()
-            data = response.json()
-            self.finished.emit(data)
+            result = get_history(self.etag)
+            if result is None:
+                self.not_modified.emit()
+                return
+
+            data, etag = result
+            self.finished.emit(data, etag)
+        except Exception as e:
+            self.error.emit(str(e))
+
+
+class TrendLoadWorker(QThread):
+    finished = pyqtSignal(list)
+    error = pyqtSignal(str)
+
+    def run(self):
+        try:
+            uploads = [parse_history_item(item) for item in iter_history(limit=TREND_MAX_UPLOADS)]
+            uploads.reverse()
+            self.finished.emit(uploads)
         except Exception as e:
             self.error.emit(str(e))
 
@@ -30,7 +48,7 @@ class HistoryDialog(QtWidgets.QDialog):
         super().__init__(parent)
 
         self.setWindowTitle("Upload History")
-        self.resize(1100, 650)
+        self.resize(1100, 850)
 
         self.setWindowFlag(QtCore.Qt.WindowContextHelpButtonHint, False)
 
@@ -122,6 +140,10 @@ class HistoryDialog(QtWidgets.QDialog):
         self.loading_label.hide()
         layout.addWidget(self.loading_label)
 
+        self.trend_chart = TrendChart()
+        self.trend_chart.setMinimumHeight(280)
+        layout.addWidget(self.trend_chart)
+
         self.table = QtWidgets.QTableWidget()
         self.table.setColumnCount(5)
         self.table.setHorizontalHeaderLabels([
@@ -169,24 +191,43 @@ class HistoryDialog(QtWidgets.QDialog):
         layout.addLayout(button_layout)
 
         self.worker = None
+        self.trend_worker = None
+        self.etag = None
         
         self.load_data()
 
     def load_data(self):
         self.loading_label.show()
-        self.table.setRowCount(0)
         self.btn_refresh.setEnabled(False)
         self.btn_refresh.setText("Loading...")
         
-        self.worker = HistoryLoadWorker()
+        self.worker = HistoryLoadWorker(self.etag)
         self.worker.finished.connect(self.on_data_loaded)
+        self.worker.not_modified.connect(self.on_not_modified)
         self.worker.error.connect(self.on_load_error)
         self.worker.start()
 
-    def on_data_loaded(self, data):
+    def on_not_modified(self):
+        self.loading_label.hide()
+        self.btn_refresh.setEnabled(True)
+        self.btn_refresh.setText("Refresh")
+
+    def load_trend(self):
+        if self.trend_worker and self.trend_worker.isRunning():
+            return
+        self.trend_worker = TrendLoadWorker()
+        self.trend_worker.finished.connect(self.trend_chart.set_data)
+        self.trend_worker.error.connect(self.on_load_error)
+        self.trend_worker.start()
+
+    def on_data_loaded(self, data, etag):
+        self.etag = etag or None
+        self.load_trend()
         self.loading_label.hide()
         self.btn_refresh.setEnabled(True)
         self.btn_refresh.setText("Refresh")
+        self.table.clearSpans()
+        self.table.setRowCount(0)
         
         if not data:
             self.table.setRowCount(1)
@@ -229,7 +270,9 @@ class HistoryDialog(QtWidgets.QDialog):
         )
 
     def closeEvent(self, event):
-        if self.worker and self.worker.isRunning():
-            self.worker.terminate()
-            self.worker.wait()
+        for worker in (self.worker, self.trend_worker):
+            if worker and worker.isRunning():
+                worker.terminate()
+                worker.wait()
+        self.trend_chart.wait()
         event.accept()
@@ -2,8 +2,7 @@ from PyQt5 import QtWidgets, uic, QtCore
 from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import QMessageBox
 from PyQt5.QtGui import QIcon, QPixmap, QPainter
-import requests
-from api import set_token
+from api import RequestException, login, signup
 
 import sys
 import os
@@ -15,9 +14,6 @@ def resource_path(relative_path):
         base_path = os.path.abspath(".")
     return os.path.join(base_path, relative_path)
 
-TOKEN_URL = "http://127.0.0.1:8001/api/token/"
-SIGNUP_URL = "http://127.0.0.1:8001/api/equipment/signup/"
-
 class LoginDialog(QtWidgets.QDialog):
     def __init__(self):
         super().__init__()
@@ -162,19 +158,14 @@ class LoginDialog(QtWidgets.QDialog):
         self.set_loading(True)
 
         try:
-            response = requests.post(
-                SIGNUP_URL,
-                data={"username": username, "password": password},
-                timeout=5
-            )
-            response.raise_for_status()
+            signup(username, password)
 
             QMessageBox.information(
                 self, "Success", "Account created successfully. Please login."
             )
             self.show_login()
 
-        except requests.RequestException:
+        except RequestException:
             QMessageBox.critical(
                 self, "Signup Failed", "Username already exists or server error"
             )
@@ -192,18 +183,10 @@ class LoginDialog(QtWidgets.QDialog):
         self.set_loading(True)
 
         try:
-            response = requests.post(
-                TOKEN_URL,
-                data={"username": username, "password": password},
-                timeout=5
-            )
-            response.raise_for_status()
-
-            token = response.json()["token"]
-            set_token(token)
+            login(username, password)
             self.accept()
 
-        except requests.RequestException:
+        except RequestException:
             QMessageBox.critical(self, "Login Failed", "Invalid credentials")
         finally:
             self.set_loading(False)
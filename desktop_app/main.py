@@ -3,10 +3,10 @@ import os
 from PyQt5 import QtWidgets, uic, QtCore
 from PyQt5.QtCore import QThread, pyqtSignal
 from PyQt5.QtWidgets import QFileDialog, QMessageBox
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
 from PyQt5.QtGui import QIcon
-from api import upload_csv, download_pdf, set_token
+from api import upload_csv, upload_summary, download_pdf, logout
+import summarize
+from charts import DistributionChart, top_n
 from login import LoginDialog
 from history import HistoryDialog
 
@@ -20,18 +20,26 @@ def resource_path(relative_path):
 class UploadWorker(QThread):
     finished = pyqtSignal(dict)
     error = pyqtSignal(str)
+    progress = pyqtSignal(int)
     
-    def __init__(self, file_path):
+    def __init__(self, file_path, summarize_locally=False):
         super().__init__()
         self.file_path = file_path
+        self.summarize_locally = summarize_locally
     
     def run(self):
         try:
-            data = upload_csv(self.file_path)
+            if self.summarize_locally:
+                data = upload_summary(*summarize.summarize_file(self.file_path))
+            else:
+                data = upload_csv(self.file_path, progress=self.report_progress)
             self.finished.emit(data)
         except Exception as e:
             self.error.emit(str(e))
 
+    def report_progress(self, sent, total):
+        self.progress.emit(int(sent * 100 / total) if total else 100)
+
 
 class DownloadWorker(QThread):
     finished = pyqtSignal()
@@ -69,15 +77,17 @@ class MainWindow(QtWidgets.QMainWindow):
         self.btn_logout.clicked.connect(self.handle_logout)
         self.btn_history.clicked.connect(self.open_history)
 
+        if not summarize.available():
+            self.chk_summarize.setEnabled(False)
+            self.chk_summarize.setToolTip("Summarizing locally needs pandas")
+
         self.centralwidget.layout().setContentsMargins(20, 20, 20, 20)
         self.centralwidget.layout().setSpacing(15)
 
-        self.figure = Figure(figsize=(8, 4), dpi=100)
-        self.figure.patch.set_facecolor('#ffffff')
-        self.canvas = FigureCanvas(self.figure)
+        self.chart = DistributionChart()
         layout = QtWidgets.QVBoxLayout(self.chartFrame)
         layout.setContentsMargins(0, 0, 0, 0)
-        layout.addWidget(self.canvas)
+        layout.addWidget(self.chart)
 
         self.setWindowFlag(QtCore.Qt.WindowContextHelpButtonHint, False)
         
@@ -94,19 +104,26 @@ class MainWindow(QtWidgets.QMainWindow):
 
     def handle_upload(self):
         file_path, _ = QFileDialog.getOpenFileName(
-            self, "Select CSV File", "", "CSV Files (*.csv)"
+            self, "Select CSV File", "", "CSV Files (*.csv *.csv.gz *.csv.zst)"
         )
         if not file_path:
             return
 
         self.btn_upload.setEnabled(False)
-        self.btn_upload.setText("Uploading...")
+        self.btn_upload.setText("Summarizing..." if self.chk_summarize.isChecked() else "Uploading...")
         
-        self.upload_worker = UploadWorker(file_path)
+        self.upload_worker = UploadWorker(file_path, self.chk_summarize.isChecked())
         self.upload_worker.finished.connect(self.on_upload_success)
         self.upload_worker.error.connect(self.on_upload_error)
+        self.upload_worker.progress.connect(self.on_upload_progress)
         self.upload_worker.start()
 
+    def on_upload_progress(self, percent):
+        if percent < 100:
+            self.btn_upload.setText(f"Uploading... {percent}%")
+        else:
+            self.btn_upload.setText("Processing...")
+
     def on_upload_success(self, data):
         try:
             self.lbl_total.setText(f"Total Equipment: {data['total_equipment']}")
@@ -117,10 +134,10 @@ class MainWindow(QtWidgets.QMainWindow):
             dist = data["equipment_type_distribution"]
             self.lbl_distribution.setText(
                 "Equipment Type Distribution: " +
-                ", ".join(f"{k}: {v}" for k, v in dist.items())
+                ", ".join(f"{k}: {v}" for k, v in top_n(dist))
             )
 
-            self.draw_chart(dist)
+            self.chart.set_data(dist)
             
             QMessageBox.information(self, "Success", "CSV file uploaded and processed successfully!")
             
@@ -135,36 +152,6 @@ class MainWindow(QtWidgets.QMainWindow):
         self.btn_upload.setEnabled(True)
         self.btn_upload.setText("Upload CSV File")
 
-    def draw_chart(self, distribution):
-        self.figure.clear()
-        ax = self.figure.add_subplot(111)
-
-        types = list(distribution.keys())
-        counts = list(distribution.values())
-
-        colors = ['#3498db', '#e74c3c', '#2ecc71', '#f39c12', '#9b59b6', 
-                  '#1abc9c', '#34495e', '#e67e22', '#95a5a6', '#d35400']
-        colors = colors[:len(types)]
-        
-        bars = ax.bar(types, counts, color=colors, edgecolor='white', linewidth=1.5)
-        
-        for bar in bars:
-            height = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2., height,
-                   f'{int(height)}',
-                   ha='center', va='bottom', fontsize=10, fontweight='bold')
-
-        ax.set_title("Equipment Type Distribution", fontsize=14, fontweight='bold', pad=15)
-        ax.set_ylabel("Count", fontsize=11, fontweight='600')
-        ax.set_xlabel("Equipment Type", fontsize=11, fontweight='600')
-        ax.tick_params(axis='x', rotation=45, labelsize=9)
-        ax.tick_params(axis='y', labelsize=9)
-        ax.grid(axis='y', alpha=0.3, linestyle='--')
-        ax.set_axisbelow(True)
-        
-        self.figure.tight_layout()
-        self.canvas.draw()
-
     def handle_download_pdf(self):
         save_path, _ = QFileDialog.getSaveFileName(
             self, "Save PDF", "equipment_report.pdf", "PDF Files (*.pdf)"
@@ -201,7 +188,7 @@ class MainWindow(QtWidgets.QMainWindow):
         if reply == QMessageBox.No:
             return
             
-        set_token(None)
+        logout()
         self.close()
 
         login_dialog = LoginDialog()
@@ -223,7 +210,8 @@ class MainWindow(QtWidgets.QMainWindow):
         if self.download_worker and self.download_worker.isRunning():
             self.download_worker.terminate()
             self.download_worker.wait()
-        
+
+        self.chart.wait()
         event.accept()
 
 
@@ -0,0 +1,240 @@
+"""
+Local pre-aggregation: compute an upload's summary on this machine and send
+only the summary, instead of every row, to the server's uploads/summary/
+endpoint.
+
+Reading and validation follow backend/equipment/ingest.py, so a file is
+accepted or rejected with the same message whichever way it is uploaded;
+DesktopSummaryParityTests in backend/equipment/tests.py checks this against
+/upload/, so change both sides together.
+Alongside the summary, per-metric and per-type moments (count, sum, sum of
+squared deviations, min, max) are sent so the upload still takes part in
+the server's aggregate statistics. Needs pandas; without it the app falls
+back to uploading the file.
+"""
+
+import os
+from collections import Counter
+
+try:
+    import pandas as pd
+    from pandas.api.types import is_bool_dtype, is_numeric_dtype
+except ImportError:
+    pd = None
+
+REQUIRED_COLUMNS = {"Type", "Flowrate", "Pressure", "Temperature"}
+METRIC_COLUMNS = ["Flowrate", "Pressure", "Temperature"]
+METRIC_KEYS = {
+    "Flowrate": "flowrate",
+    "Pressure": "pressure",
+    "Temperature": "temperature",
+}
+
+PARSED_COLUMNS = {"Equipment Name", "Type", *METRIC_COLUMNS}
+TEXT_DTYPES = {"Equipment Name": "str", "Type": "str"}
+
+CHUNK_SIZE = 100_000
+
+NOT_UTF8_MESSAGE = "CSV must be UTF-8 encoded"
+
+
+class SummaryError(Exception):
+    pass
+
+
+def available():
+    return pd is not None
+
+
+class Moments:
+    """Count, sum, M2, min and max of one metric; merged like the server's stats.Moments."""
+
+    __slots__ = ("count", "total", "m2", "minimum", "maximum")
+
+    def __init__(self, count=0, total=0.0, m2=0.0, minimum=None, maximum=None):
+        self.count = count
+        self.total = total
+        self.m2 = m2
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.total, self.m2 = other.count, other.total, other.m2
+            self.minimum, self.maximum = other.minimum, other.maximum
+            return self
+
+        count = self.count + other.count
+        delta = other.total / other.count - self.total / self.count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.total += other.total
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        return self
+
+    def to_dict(self):
+        # No quantile sketch or histogram: their bucket layout is server
+        # configuration, so those statistics come only from uploaded rows.
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "m2": self.m2,
+            "min": self.minimum,
+            "max": self.maximum,
+            "sketch": None,
+            "histogram": None,
+        }
+
+
+def _new_metrics():
+    return {key: Moments() for key in METRIC_KEYS.values()}
+
+
+class SummaryAccumulator:
+    def __init__(self):
+        self.count = 0
+        self.sums = {column: 0.0 for column in METRIC_COLUMNS}
+        self.type_counts = Counter()
+        self.metrics = _new_metrics()
+        self.types = {}
+
+    def update(self, chunk):
+        self.count += len(chunk)
+        for column in METRIC_COLUMNS:
+            self.sums[column] += float(chunk[column].sum())
+        self.type_counts.update(chunk["Type"].value_counts(sort=False).to_dict())
+
+        # As in the server's UploadStatistics.update: one pass gives every
+        # type's moments, rows without a type count only overall, and the
+        # overall moments are the exact merge of the types'.
+        codes, type_names = pd.factorize(chunk["Type"], use_na_sentinel=False)
+        type_metrics = [
+            None if pd.isna(type_name) else self.types.setdefault(str(type_name), _new_metrics())
+            for type_name in type_names
+        ]
+        aggregated = chunk[METRIC_COLUMNS].groupby(codes, sort=False).agg(
+            ["count", "sum", "min", "max", "var"]
+        )
+        for code, row in zip(aggregated.index.tolist(), aggregated.to_numpy().tolist()):
+            for index, key in enumerate(METRIC_KEYS.values()):
+                count, total, minimum, maximum, variance = row[index * 5:index * 5 + 5]
+                moments = Moments(
+                    count=int(count),
+                    total=float(total),
+                    m2=float(variance) * (count - 1) if count > 1 else 0.0,
+                    minimum=float(minimum),
+                    maximum=float(maximum),
+                )
+                if type_metrics[code] is not None:
+                    type_metrics[code][key].merge(moments)
+                self.metrics[key].merge(moments)
+
+    def summary(self):
+        return {
+            "total_equipment": self.count,
+            "average_flowrate": self.sums["Flowrate"] / self.count,
+            "average_pressure": self.sums["Pressure"] / self.count,
+            "average_temperature": self.sums["Temperature"] / self.count,
+            "equipment_type_distribution": dict(self.type_counts.most_common()),
+        }
+
+    def statistics(self):
+        return {
+            "metrics": {key: metric.to_dict() for key, metric in self.metrics.items()},
+            "types": {
+                type_name: {key: metric.to_dict() for key, metric in metrics.items()}
+                for type_name, metrics in self.types.items()
+            },
+        }
+
+
+def _parsed_column(name):
+    return name in PARSED_COLUMNS
+
+
+def read_chunks(file_path, chunk_size=CHUNK_SIZE):
+    """Yield DataFrames of the columns the summary uses; .gz and .zst files are decompressed."""
+    try:
+        columns = pd.read_csv(
+            file_path, nrows=0, compression="infer", encoding_errors="replace"
+        ).columns
+        # The server decodes the header line strictly.
+        if any("\ufffd" in str(name) for name in columns):
+            raise SummaryError(NOT_UTF8_MESSAGE)
+        # Without the required columns, read everything so the error below
+        # is raised at the same point as on the server.
+        prune = REQUIRED_COLUMNS.issubset(columns)
+        reader = pd.read_csv(
+            file_path,
+            chunksize=chunk_size,
+            usecols=_parsed_column if prune else None,
+            dtype=TEXT_DTYPES if prune else None,
+            compression="infer",
+            encoding_errors="replace",
+            engine="c",
+        )
+        with reader:
+            for chunk in reader:
+                # As on the server, only the parsed text columns must be UTF-8.
+                for column in TEXT_DTYPES if prune else ():
+                    if column in chunk and chunk[column].str.contains("\ufffd", regex=False).any():
+                        raise SummaryError(NOT_UTF8_MESSAGE)
+                yield chunk
+    except SummaryError:
+        raise
+    except UnicodeDecodeError:
+        raise SummaryError(NOT_UTF8_MESSAGE)
+    except Exception as e:
+        raise SummaryError(f"Failed to read CSV: {str(e)}")
+
+
+def clean_chunk(chunk):
+    if not REQUIRED_COLUMNS.issubset(chunk.columns):
+        raise SummaryError(
+            "CSV must contain columns: Type, Flowrate, Pressure, Temperature"
+        )
+
+    # As on the server: a column of only True/False is read as booleans,
+    # which are not numbers.
+    if any(is_bool_dtype(chunk[column]) for column in METRIC_COLUMNS):
+        raise SummaryError("CSV contains invalid numeric values")
+
+    try:
+        for column in METRIC_COLUMNS:
+            if not is_numeric_dtype(chunk[column]):
+                chunk[column] = pd.to_numeric(chunk[column], errors='coerce')
+    except Exception as e:
+        raise SummaryError(f"Data validation error: {str(e)}")
+
+    if chunk[METRIC_COLUMNS].isnull().any().any():
+        raise SummaryError("CSV contains invalid numeric values")
+
+    return chunk
+
+
+def summarize_file(file_path, chunk_size=CHUNK_SIZE):
+    """Return (summary, statistics) for a CSV file, or raise SummaryError."""
+    if pd is None:
+        raise SummaryError("Summarizing locally needs pandas")
+    # Rejected by the upload serializer before ingestion on the server.
+    if os.path.getsize(file_path) == 0:
+        raise SummaryError("The submitted file is empty.")
+
+    accumulator = SummaryAccumulator()
+    for chunk in read_chunks(file_path, chunk_size):
+        if chunk.empty:
+            continue
+        try:
+            accumulator.update(clean_chunk(chunk))
+        except SummaryError:
+            raise
+        except Exception as e:
+            raise SummaryError(f"Data validation error: {str(e)}")
+
+    if accumulator.count == 0:
+        raise SummaryError("CSV file is empty")
+
+    return accumulator.summary(), accumulator.statistics()
@@ -2,7 +2,7 @@ import { useState, useEffect } from "react";
 import Login from "./components/Login";
 import Signup from "./components/Signup";
 import Dashboard from "./components/Dashboard";
-import { setAuthToken } from "./api";
+import { api, setAuthToken } from "./api";
 
 function App() {
 //   const [isAuthenticated, setIsAuthenticated] = useState(false);
@@ -79,6 +79,8 @@ const [authView, setAuthView] = useState("login");
 
             {authView === "dashboard" && (
               <Dashboard onLogout={() => {
+                // Revoke the token server-side; log out locally regardless.
+                api.post("/api/token/logout/").catch(() => {});
                 setAuthToken(null);
                 setAuthView("login");
                 localStorage.removeItem("token");
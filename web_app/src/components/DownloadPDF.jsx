@@ -1,18 +1,34 @@
 import { useState } from "react";
 import { api } from "../api";
 
+// Give up on a report that is still rendering after this long, as the
+// desktop app does.
+const MAX_WAIT_MS = 120 * 1000;
+
 function DownloadPDF() {
   const [downloading, setDownloading] = useState(false);
 
   const handleDownload = async () => {
     setDownloading(true);
     try {
-      const response = await api.get(
-        "/api/equipment/report/",
-        {
-          responseType: "blob",
+      let response;
+      const deadline = Date.now() + MAX_WAIT_MS;
+      // The server answers 202 while the report is still being rendered.
+      for (;;) {
+        response = await api.get(
+          "/api/equipment/report/",
+          {
+            responseType: "blob",
+          }
+        );
+        if (response.status !== 202) break;
+        if (Date.now() >= deadline) {
+          alert("Timed out waiting for the report to be generated");
+          return;
         }
-      );
+        const retryAfter = Number(response.headers["retry-after"]) || 2;
+        await new Promise((resolve) => setTimeout(resolve, retryAfter * 1000));
+      }
 
       const url = window.URL.createObjectURL(
         new Blob([response.data])
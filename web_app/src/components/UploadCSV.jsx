@@ -62,7 +62,7 @@ function UploadCSV({ onResult }) {
           id="csvFile"
           type="file"
           className="form-control"
-          accept=".csv"
+          accept=".csv,.gz,.zst"
           onChange={handleFileChange}
           disabled={uploading}
         />